@@ -0,0 +1,244 @@
+"""
+Модуль асинхронного HTTP API для главной страницы и страницы событий.
+
+Эндпоинты:
+    GET /home - главная страница
+    GET /events?period=M - страница событий
+    GET /health - проверка доступности
+    GET /metrics - метрики этапов в формате Prometheus (?format=json - в JSON)
+
+Сервер работает на asyncio. Рыночные данные запрашиваются в отдельных
+потоках параллельно, один запрос на всех клиентов, и кешируются; если
+внешний сервис не ответил за отведенное время, используются последние
+полученные данные. Построение страниц выполняется в пуле потоков
+ограниченного размера, а каждый запрос ограничен сроком выполнения.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from src.daemon import DaemonSource
+from src.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+API_HOST = "127.0.0.1"
+API_PORT = 8080
+API_WORKERS = 4
+REQUEST_DEADLINE = 10.0
+MARKET_DATA_DEADLINE = 3.0
+MARKET_DATA_TTL = 300
+HEADER_TIMEOUT = 5.0
+
+PERIODS = ("D", "W", "M")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error", 504: "Gateway Timeout"}
+
+
+class MarketDataCache:
+    """
+    Кеш рыночных данных с одним запросом к внешним сервисам на всех клиентов.
+
+    Attributes:
+        ttl: Время жизни данных в секундах
+        deadline: Сколько ждать внешние сервисы, прежде чем отдать старые данные
+    """
+
+    def __init__(self, ttl: float = MARKET_DATA_TTL, deadline: float = MARKET_DATA_DEADLINE) -> None:
+        self.ttl = ttl
+        self.deadline = deadline
+        self.fetches = 0
+        self._data: Dict[str, Any] = {"exchange_rates": {}, "stock_prices": {}}
+        self._fetched_at: Optional[float] = None
+        self._pending: Optional[asyncio.Task] = None
+
+    async def _fetch(self) -> Dict[str, Any]:
+        """Запрашивает курсы валют и цены акций параллельно в потоках."""
+        from src.utils import get_exchange_rates, get_stock_prices
+
+        self.fetches += 1
+        rates, prices = await asyncio.gather(
+            asyncio.to_thread(get_exchange_rates),
+            asyncio.to_thread(get_stock_prices),
+        )
+        self._data = {"exchange_rates": rates, "stock_prices": prices}
+        self._fetched_at = time.monotonic()
+        return self._data
+
+    async def get(self) -> Dict[str, Any]:
+        """
+        Возвращает рыночные данные, обновляя их по истечении ttl.
+
+        Returns:
+            Словарь с ключами exchange_rates и stock_prices
+        """
+        fresh = self._fetched_at is not None and time.monotonic() - self._fetched_at < self.ttl
+        if fresh:
+            return self._data
+
+        if self._pending is None or self._pending.done():
+            self._pending = asyncio.ensure_future(self._fetch())
+        try:
+            # shield: таймаут одного клиента не отменяет общий запрос
+            return await asyncio.wait_for(asyncio.shield(self._pending), self.deadline)
+        except asyncio.TimeoutError:
+            logger.warning("Рыночные данные не получены вовремя, используются последние известные")
+            return self._data
+
+
+class DashboardAPI:
+    """
+    HTTP API страниц поверх данных в памяти.
+
+    Attributes:
+        source: Источник данных (перечитывает файл при изменении)
+        workers: Размер пула потоков для построения страниц
+        request_deadline: Срок выполнения запроса в секундах
+        market_data: Кеш рыночных данных
+    """
+
+    def __init__(
+        self,
+        source: DaemonSource,
+        workers: int = API_WORKERS,
+        request_deadline: float = REQUEST_DEADLINE,
+        market_data: Optional[MarketDataCache] = None,
+    ) -> None:
+        self.source = source
+        self.workers = workers
+        self.request_deadline = request_deadline
+        self.market_data = market_data or MarketDataCache()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+
+    def _render(self, page: str, period: str, market_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Строит страницу в рабочем потоке."""
+        from src.views import events_page, home_page
+
+        self.source.refresh()
+        # Отпечаток вычислен при загрузке, поэтому куб не хеширует данные на каждый запрос
+        frame, fingerprint = self.source.frame(), self.source.fingerprint()
+        if page == "home":
+            return home_page(frame, fingerprint=fingerprint, **market_data)
+        return events_page(frame, period, fingerprint=fingerprint, **market_data)
+
+    async def _page(self, page: str, period: str) -> Dict[str, Any]:
+        """Получает рыночные данные и строит страницу в пуле потоков."""
+        market_data = await self.market_data.get()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._render, page, period, market_data)
+
+    async def dispatch(self, method: str, target: str) -> Tuple[int, Any]:
+        """
+        Обрабатывает запрос и возвращает код ответа и тело.
+
+        Args:
+            method: HTTP-метод
+            target: Путь запроса со строкой параметров
+
+        Returns:
+            Кортеж (код ответа, данные для JSON или текст метрик)
+        """
+        url = urlsplit(target)
+        if url.path not in ("/home", "/events", "/health", "/metrics"):
+            return 404, {"status": "error", "error": f"Неизвестный путь: {url.path}"}
+        if method != "GET":
+            return 405, {"status": "error", "error": f"Метод не поддерживается: {method}"}
+        if url.path == "/health":
+            return 200, {"status": "ok"}
+
+        query = parse_qs(url.query)
+        if url.path == "/metrics":
+            from src.metrics import render_prometheus, snapshot
+
+            return 200, snapshot() if query.get("format") == ["json"] else render_prometheus()
+
+        period = query.get("period", ["M"])[0]
+        if period not in PERIODS:
+            return 400, {"status": "error", "error": f"Неизвестный период: {period}"}
+
+        try:
+            result = await asyncio.wait_for(self._page(url.path[1:], period), self.request_deadline)
+        except asyncio.TimeoutError:
+            logger.error(f"Запрос {url.path} не выполнен за {self.request_deadline} с")
+            return 504, {"status": "error", "error": "Превышен срок выполнения запроса"}
+        except Exception as e:
+            logger.error(f"Ошибка построения страницы {url.path}: {e}")
+            return 500, {"status": "error", "error": str(e)}
+        return (500 if result.get("status") == "error" else 200), result
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Читает один HTTP-запрос из соединения и отправляет ответ."""
+        try:
+            try:
+                request_line = await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT)
+                while True:
+                    header = await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT)
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            except (asyncio.TimeoutError, ValueError):
+                status, body = 400, {"status": "error", "error": "Некорректный запрос"}
+            else:
+                status, body = await self.dispatch(method, target)
+
+            if isinstance(body, str):
+                payload, content_type = body.encode("utf-8"), PROMETHEUS_CONTENT_TYPE
+            else:
+                payload, content_type = dumps(body), "application/json; charset=utf-8"
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1") + payload
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = API_HOST, port: int = API_PORT) -> asyncio.AbstractServer:
+        """Запускает сервер и возвращает его."""
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        logger.info(f"HTTP API слушает {host}:{port}")
+        return server
+
+    def close(self) -> None:
+        """Останавливает пул потоков."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_api(
+    source: DaemonSource,
+    host: str = API_HOST,
+    port: int = API_PORT,
+    workers: int = API_WORKERS,
+    request_deadline: float = REQUEST_DEADLINE,
+) -> None:
+    """
+    Запускает HTTP API и обслуживает запросы до прерывания.
+
+    Args:
+        source: Источник данных
+        host: Адрес для прослушивания
+        port: Порт
+        workers: Размер пула потоков для построения страниц
+        request_deadline: Срок выполнения запроса в секундах
+    """
+    api = DashboardAPI(source, workers, request_deadline)
+
+    async def serve() -> None:
+        server = await api.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    finally:
+        api.close()
@@ -0,0 +1,126 @@
+"""
+Модуль сравнения программ кешбэка на истории расходов.
+
+Программа кешбэка задается словарем:
+    {
+        "name": "Супермаркеты x5",
+        "base_rate": 1.0,
+        "tiers": [{"min_monthly_spend": 50000, "rate": 1.5}],
+        "category_multipliers": {"Супермаркеты": 5},
+        "mcc_multipliers": {5411: 3},
+        "monthly_cap": 3000,
+    }
+
+Ставки указаны в процентах. Ставка месяца определяется по максимальному
+уровню tiers, порог которого не превышает расходы за месяц (иначе
+base_rate). Множитель по MCC имеет приоритет над множителем категории.
+Выплата за месяц ограничивается monthly_cap.
+"""
+import logging
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def build_spend_cells(spend: pd.DataFrame) -> pd.DataFrame:
+    """
+    Сворачивает расходы в ячейки месяц × категория × MCC.
+
+    Операции без даты не учитываются: их нельзя отнести к месяцу.
+
+    Args:
+        spend: DataFrame со столбцами month, category, mcc, amount
+
+    Returns:
+        DataFrame с суммой расходов по ячейкам
+    """
+    return (
+        spend.dropna(subset=["month"])
+        .groupby(["month", "category", "mcc"], dropna=False, sort=True)["amount"]
+        .sum()
+        .reset_index()
+    )
+
+
+def _program_rates(
+    program: Dict[str, Any], monthly_spend: np.ndarray
+) -> np.ndarray:
+    """Возвращает ставку программы для каждого месяца по уровням расходов."""
+    rates = np.full(len(monthly_spend), float(program.get("base_rate", 0.0)))
+    tiers = sorted(program.get("tiers", []), key=lambda tier: tier["min_monthly_spend"])
+    for tier in tiers:
+        rates = np.where(monthly_spend >= tier["min_monthly_spend"], float(tier["rate"]), rates)
+    return rates
+
+
+def evaluate_programs(
+    cells: pd.DataFrame, programs: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Рассчитывает выплаты по всем программам матричными операциями.
+
+    Args:
+        cells: Ячейки расходов из build_spend_cells
+        programs: Список программ кешбэка
+
+    Returns:
+        Список результатов по программам, отсортированный по убыванию выплат
+    """
+    for program in programs:
+        if not program.get("name"):
+            raise ValueError("У программы кешбэка должно быть имя")
+
+    month_codes, months = pd.factorize(cells["month"], sort=True)
+    amounts = cells["amount"].to_numpy(dtype=float)
+    categories = cells["category"].to_numpy()
+    mccs = cells["mcc"].to_numpy()
+
+    # Расходы по месяцам: групповая сумма ячеек по коду месяца
+    monthly_spend = np.bincount(month_codes, weights=amounts, minlength=len(months))
+
+    rates = np.zeros((len(programs), len(months)))
+    for i, program in enumerate(programs):
+        rates[i] = _program_rates(program, monthly_spend)
+
+    multipliers = np.ones((len(programs), len(cells)))
+    for i, program in enumerate(programs):
+        category_multipliers = program.get("category_multipliers", {})
+        mcc_multipliers = program.get("mcc_multipliers", {})
+        if category_multipliers:
+            multipliers[i] = pd.Series(categories).map(category_multipliers).fillna(1.0).to_numpy()
+        if mcc_multipliers:
+            by_mcc = pd.Series(mccs).map(mcc_multipliers).to_numpy(dtype=float)
+            multipliers[i] = np.where(np.isnan(by_mcc), multipliers[i], by_mcc)
+
+    # Выплаты программ по месяцам одним bincount: код = номер программы * месяцев + месяц
+    cell_payouts = rates[:, month_codes] * multipliers * amounts / 100
+    codes = np.arange(len(programs)).reshape(-1, 1) * len(months) + month_codes
+    payouts = np.bincount(
+        codes.ravel(), weights=cell_payouts.ravel(), minlength=len(programs) * len(months)
+    ).reshape(len(programs), len(months))
+
+    caps = np.array([
+        program.get("monthly_cap") if program.get("monthly_cap") is not None else np.inf
+        for program in programs
+    ], dtype=float).reshape(-1, 1)
+    capped = np.minimum(payouts, caps)
+    totals = capped.sum(axis=1)
+
+    result = []
+    for i, program in enumerate(programs):
+        result.append({
+            "name": program["name"],
+            "payout": round(float(totals[i]), 2),
+            "months": {str(month): round(float(capped[i, m]), 2) for m, month in enumerate(months)},
+            "capped_months": int((payouts[i] > caps[i]).sum()),
+        })
+
+    result.sort(key=lambda item: item["payout"], reverse=True)
+    for rank, item in enumerate(result, 1):
+        item["rank"] = rank
+
+    logger.info(f"Рассчитаны выплаты по {len(programs)} программам кешбэка")
+    return result
@@ -0,0 +1,240 @@
+"""
+Модуль потоковой обработки истории транзакций частями.
+
+Excel файл читается построчно и складывается в колоночный кеш: набор
+файлов-сегментов с DataFrame, размер которых подобран под бюджет памяти. Отчеты строятся
+сверткой сегментов в частичные кубы агрегатов, которые объединяются
+друг с другом, поэтому в памяти одновременно находится только одна часть
+данных и куб, размер которого зависит от числа ячеек, а не строк.
+"""
+import glob
+import hashlib
+import itertools
+import logging
+import os
+import shutil
+from typing import List, Any, Iterator, Optional
+
+import pandas as pd
+
+from src.cube import CUBE_CACHE_DIR, SpendingCube
+from src.metrics import add_bytes, add_rows
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_BUDGET_MB = 256
+PROBE_ROWS = 1000
+
+# Сколько последних колоночных кешей (версий файла и бюджетов памяти) хранится на диске
+SEGMENTS_DISK_LIMIT = 2
+
+# Во сколько раз память на обработку части больше самой части:
+# строки Excel, DataFrame и промежуточные столбцы куба
+CHUNK_OVERHEAD = 4
+
+
+def _convert_cell(value: Any) -> Any:
+    """Приводит значение ячейки так же, как pandas.read_excel."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def frame_from_rows(rows: List[List[Any]], names: List[str]) -> pd.DataFrame:
+    """
+    Строит DataFrame из строк листа с теми же типами столбцов, что и pandas.read_excel.
+
+    Конструктор DataFrame сам выводит числа, даты и строки (пустые ячейки
+    становятся NaN); столбцы из строк, которые целиком читаются как числа,
+    дополнительно приводятся к числам, как это делает read_excel.
+
+    Args:
+        rows: Значения ячеек по строкам
+        names: Имена столбцов
+
+    Returns:
+        DataFrame части листа
+    """
+    frame = pd.DataFrame(rows, columns=range(len(names)))
+    for position in frame.columns:
+        column = frame[position]
+        if column.dtype == object or pd.api.types.is_string_dtype(column):
+            try:
+                frame[position] = pd.to_numeric(column)
+            except (ValueError, TypeError):
+                pass
+    frame.columns = names
+    return frame
+
+
+def chunk_rows_for_budget(sample: pd.DataFrame, memory_budget_mb: float) -> int:
+    """
+    Вычисляет размер части в строках по бюджету памяти.
+
+    Args:
+        sample: Пробная часть данных
+        memory_budget_mb: Бюджет памяти в мегабайтах
+
+    Returns:
+        Количество строк в части
+    """
+    row_bytes = sample.memory_usage(index=False, deep=True).sum() / max(len(sample), 1)
+    return max(1, int(memory_budget_mb * 1024 * 1024 // (max(row_bytes, 1) * CHUNK_OVERHEAD)))
+
+
+def iter_excel_chunks(
+    file_path: str, memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB
+) -> Iterator[pd.DataFrame]:
+    """
+    Читает Excel файл частями, не загружая его целиком.
+
+    Первые PROBE_ROWS строк служат для оценки размера строки; они, как и
+    остальные строки, выдаются частями, подобранными под бюджет памяти.
+
+    Args:
+        file_path: Путь к Excel файлу
+        memory_budget_mb: Бюджет памяти в мегабайтах
+
+    Returns:
+        Итератор DataFrame с частями файла
+    """
+    import openpyxl
+
+    add_bytes(os.path.getsize(file_path))
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        names = [str(name) for name in header]
+
+        size = None
+        while True:
+            batch = [[_convert_cell(v) for v in row] for row in itertools.islice(rows, size or PROBE_ROWS)]
+            if not batch:
+                break
+            chunk = frame_from_rows(batch, names)
+            if size is None:
+                size = chunk_rows_for_budget(chunk, memory_budget_mb)
+                if size < len(chunk):
+                    # Пробная часть больше бюджета: выдается кусками по size строк
+                    for start in range(0, len(chunk), size):
+                        yield chunk.iloc[start:start + size].reset_index(drop=True)
+                    continue
+            yield chunk
+    finally:
+        workbook.close()
+
+
+def _segments_dir(file_path: str, cache_dir: str, memory_budget_mb: float) -> str:
+    """
+    Возвращает каталог сегментов для версии файла и бюджета памяти.
+
+    Версия файла определяется путем, размером и временем изменения, а
+    бюджет входит в ключ, потому что от него зависит размер сегментов.
+    """
+    stat = os.stat(file_path)
+    key = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}|{float(memory_budget_mb)!r}"
+    return os.path.join(cache_dir, f"segments_{hashlib.sha1(key.encode('utf-8')).hexdigest()}")
+
+
+def prune_segment_cache(cache_dir: str, keep: int = SEGMENTS_DISK_LIMIT) -> int:
+    """
+    Удаляет из каталога кеша все колоночные кеши, кроме keep последних.
+
+    Порядок определяется временем изменения метки готовности, которая
+    обновляется при каждом чтении кеша. Незавершенные кеши не удаляются:
+    их может в этот момент записывать другой процесс.
+
+    Args:
+        cache_dir: Каталог кеша
+        keep: Сколько последних по времени использования кешей оставить
+
+    Returns:
+        Количество удаленных каталогов
+    """
+    markers = sorted(
+        glob.glob(os.path.join(cache_dir, "segments_*", "complete")), key=os.path.getmtime, reverse=True
+    )
+    removed = 0
+    for marker in markers[keep:]:
+        directory = os.path.dirname(marker)
+        try:
+            shutil.rmtree(directory)
+            removed += 1
+        except OSError as e:
+            logger.warning(f"Не удалось удалить колоночный кеш {directory}: {e}")
+    if removed:
+        logger.info(f"Удалено устаревших колоночных кешей из {cache_dir}: {removed}")
+    return removed
+
+
+def iter_cached_chunks(
+    file_path: str,
+    memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+    cache_dir: Optional[str] = CUBE_CACHE_DIR,
+) -> Iterator[pd.DataFrame]:
+    """
+    Выдает части истории из колоночного кеша, создавая его при первом чтении.
+
+    Кеш привязан к версии файла и бюджету памяти. Сегменты пишутся по мере чтения Excel,
+    и кеш считается готовым только после записи последнего сегмента. На диске
+    хранятся SEGMENTS_DISK_LIMIT последних использованных кешей.
+
+    Args:
+        file_path: Путь к Excel файлу
+        memory_budget_mb: Бюджет памяти в мегабайтах
+        cache_dir: Каталог кеша (None - читать Excel без кеша)
+
+    Returns:
+        Итератор DataFrame с частями истории
+    """
+    if not cache_dir:
+        yield from iter_excel_chunks(file_path, memory_budget_mb)
+        return
+
+    directory = _segments_dir(file_path, cache_dir, memory_budget_mb)
+    marker = os.path.join(directory, "complete")
+    if os.path.exists(marker):
+        # Время изменения метки - время последнего использования кеша
+        os.utime(marker)
+        for path in sorted(glob.glob(os.path.join(directory, "part-*.pkl"))):
+            add_bytes(os.path.getsize(path))
+            yield pd.read_pickle(path)
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "part-*.pkl")):
+        os.remove(path)
+    for number, chunk in enumerate(iter_excel_chunks(file_path, memory_budget_mb)):
+        chunk.to_pickle(os.path.join(directory, f"part-{number:05d}.pkl"))
+        yield chunk
+    with open(marker, "w", encoding="utf-8"):
+        pass
+    logger.info(f"Создан колоночный кеш {directory}")
+    prune_segment_cache(cache_dir)
+
+
+def build_cube_from_chunks(chunks: Iterator[pd.DataFrame]) -> Optional[SpendingCube]:
+    """
+    Сворачивает части истории в один куб агрегатов.
+
+    Args:
+        chunks: Итератор частей истории
+
+    Returns:
+        Куб по всей истории или None, если данных нет
+    """
+    cube: Optional[SpendingCube] = None
+    rows = 0
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        partial = SpendingCube.from_dataframe(chunk)
+        cube = partial if cube is None else cube.merge(partial)
+        rows += len(chunk)
+    add_rows(rows)
+    logger.info(f"Куб агрегатов построен по частям: {rows} транзакций")
+    return cube
+
@@ -0,0 +1,201 @@
+"""
+Модуль команд приложения.
+
+Команды выполняются над источником данных: FileSource читает транзакции
+из кеша src.dataset при каждом запуске, а демон (src.daemon) держит их в
+памяти. Каждая команда импортирует только нужные ей модули.
+"""
+from typing import List, Dict, Any, Callable, Optional
+
+from src.dataset import DATASET_CACHE_DIR, DEFAULT_DATA_FILE, load_cached_transactions
+from src.metrics import ROWS_FROM_OUTPUT, timed
+
+
+class FileSource:
+    """
+    Источник данных, читающий транзакции из файла при первом обращении.
+
+    Attributes:
+        data_file: Excel файл с транзакциями
+        cache_dir: Каталог кеша транзакций (None - без кеша)
+    """
+
+    def __init__(self, data_file: str = DEFAULT_DATA_FILE, cache_dir: Optional[str] = DATASET_CACHE_DIR) -> None:
+        self.data_file = data_file
+        self.cache_dir = cache_dir
+        self._transactions: Optional[List[Dict[str, Any]]] = None
+        self._frame: Any = None
+        self._spend_index: Any = None
+        self._fingerprint: Optional[str] = None
+        self._report_state: Any = None
+
+    def transactions(self) -> List[Dict[str, Any]]:
+        """Возвращает список транзакций."""
+        if self._transactions is None:
+            self._transactions = load_cached_transactions(self.data_file, self.cache_dir)
+        return self._transactions
+
+    def frame(self) -> Any:
+        """Возвращает транзакции в DataFrame."""
+        if self._frame is None:
+            import pandas as pd
+
+            self._frame = pd.DataFrame(self.transactions())
+        return self._frame
+
+    def fingerprint(self) -> Optional[str]:
+        """Возвращает отпечаток данных (None, если данных нет)."""
+        if self._fingerprint is None and not self.frame().empty:
+            from src.cube import dataset_fingerprint
+
+            self._fingerprint = dataset_fingerprint(self.frame())
+        return self._fingerprint
+
+    def spend_index(self) -> Any:
+        """Возвращает индекс накопленных сумм расходов."""
+        if self._spend_index is None:
+            from src.indexes import SpendPrefixIndex
+
+            self._spend_index = SpendPrefixIndex(self.transactions())
+        return self._spend_index
+
+    def report_state(self) -> Any:
+        """Возвращает состояние отчетов, дополненное транзакциями, дописанными с прошлого запуска."""
+        if self._report_state is None:
+            from src.reports import IncrementalReportState, report_state_path
+
+            state = IncrementalReportState(report_state_path(self.cache_dir))
+            state.refresh(self.transactions())
+            self._report_state = state
+        return self._report_state
+
+    def market_data(self) -> Dict[str, Any]:
+        """Возвращает рыночные данные (пусто - страницы запросят их сами)."""
+        return {}
+
+
+# Параметр, в котором демон передает рыночные данные, полученные до блокировки команд
+MARKET_DATA_PARAM = "_market_data"
+
+
+def _market_data(source: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Возвращает уже полученные рыночные данные из params или запрашивает их у источника."""
+    market_data = params.get(MARKET_DATA_PARAM)
+    return market_data if market_data is not None else source.market_data()
+
+
+@timed(rows=None)
+def command_home(source: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Главная страница."""
+    from src.views import home_page
+
+    return home_page(source.frame(), fingerprint=source.fingerprint(), **_market_data(source, params))
+
+
+@timed(rows=None)
+def command_events(source: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Страница событий за период params["period"]."""
+    from src.views import events_page
+
+    return events_page(
+        source.frame(), params.get("period", "M"), fingerprint=source.fingerprint(), **_market_data(source, params)
+    )
+
+
+@timed(rows=ROWS_FROM_OUTPUT)
+def command_search(source: Any, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Поиск транзакций по params["query"], с params["fuzzy"] - нечеткий."""
+    from src.search import get_inverted_index, get_trigram_index
+
+    transactions = source.transactions()
+    limit = params.get("limit", 20)
+    if params.get("fuzzy"):
+        index = get_trigram_index(transactions)
+        rows = [row for row, _ in index.search(params["query"], limit)]
+    else:
+        index = get_inverted_index(transactions)
+        rows = index.substring_rows(params["query"])[:limit]
+    return list(index.project(rows))
+
+
+@timed(rows=None)
+def command_spend(source: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Расходы с params["start"] по params["end"] по индексу накопленных сумм.
+
+    С params["category"] или params["card"] итог и сравнение считаются по
+    одной категории или карте. Если заданы обе даты, добавляется сравнение
+    с предыдущим периодом той же длины.
+    """
+    index = source.spend_index()
+    start, end = params.get("start"), params.get("end")
+    category, card = params.get("category"), params.get("card")
+    result: Dict[str, Any] = {
+        "start": start,
+        "end": end,
+        "total": index.total(start, end, category, card),
+        "by_category": index.totals_by_category(start, end),
+        "by_card": index.totals_by_card(start, end),
+    }
+    if start and end:
+        result["comparison"] = index.compare(start, end, category=category, card=card)
+    return result
+
+
+@timed(rows=None)
+def command_report(source: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Отчет params["name"] с параметрами params["params"] по инкрементальному состоянию отчетов."""
+    from src.reports import REPORTS, run_report_batch
+
+    name = params.get("name")
+    if name not in REPORTS:
+        raise ValueError(f"Неизвестный отчет: {name}. Доступны: {', '.join(REPORTS)}")
+    spec = {"name": name, "params": params.get("params", {})}
+    return run_report_batch(
+        source.transactions(), [spec], save=params.get("save", True),
+        frame=source.frame(), fingerprint=source.fingerprint(), cube=source.report_state().cube,
+    )[0]
+
+
+@timed(rows=None)
+def command_stats(source: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Статистика по транзакциям."""
+    from src.utils import calculate_statistics
+
+    return calculate_statistics(source.transactions())
+
+
+@timed(rows=None)
+def command_metrics(source: Any, params: Dict[str, Any]) -> Any:
+    """Метрики этапов: JSON, с params["format"] == "prometheus" - текст Prometheus."""
+    from src.metrics import render_prometheus, snapshot
+
+    return render_prometheus() if params.get("format") == "prometheus" else snapshot()
+
+
+COMMANDS: Dict[str, Callable[[Any, Dict[str, Any]], Any]] = {
+    "home": command_home,
+    "events": command_events,
+    "search": command_search,
+    "spend": command_spend,
+    "report": command_report,
+    "stats": command_stats,
+    "metrics": command_metrics,
+}
+
+
+def run_command(source: Any, command: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Выполняет команду над источником данных.
+
+    Args:
+        source: Источник данных с методами transactions, frame, market_data
+        command: Имя команды из COMMANDS
+        params: Параметры команды
+
+    Returns:
+        Результат команды
+    """
+    if command not in COMMANDS:
+        raise ValueError(f"Неизвестная команда: {command}")
+    return COMMANDS[command](source, params or {})
@@ -0,0 +1,379 @@
+"""
+Модуль предрасчитанного куба агрегатов по транзакциям.
+
+Куб хранит сумму, количество операций и кешбэк в разрезе категории,
+месяца, дня недели, часа, типа дня, карты и направления операции.
+Отчеты и страницы сворачивают куб вместо повторной группировки исходных строк.
+"""
+import glob
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.indexes import spend_mask
+
+logger = logging.getLogger(__name__)
+
+CUBE_CACHE_DIR = os.path.join("data", ".cache")
+CUBE_MEMORY_LIMIT = 8
+
+# Сколько последних кубов хранится на диске в каталоге кеша
+CUBE_DISK_LIMIT = 8
+
+# Версия схемы куба входит в имя файла кеша, чтобы не читать кубы старой схемы
+CUBE_VERSION = 3
+
+DIMENSIONS = ["category", "month", "weekday", "hour", "day_type", "card", "direction"]
+MEASURES = ["amount", "count", "cashback"]
+
+INCOME_CATEGORIES = ['Пополнение', 'Зачисление', 'Возврат', 'Начисление', 'Доход', 'Зарплата']
+
+WORKDAY = "Рабочий день"
+WEEKEND = "Выходной"
+
+_memory_cache: "OrderedDict[str, SpendingCube]" = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def find_amount_column(df: pd.DataFrame) -> Optional[str]:
+    """Определяет столбец с суммой так же, как analyze_expenses."""
+    for col in ['Сумма операции', 'Сумма платежа', 'amount']:
+        if col in df.columns:
+            return col
+    return None
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> Optional[str]:
+    """
+    Вычисляет отпечаток содержимого DataFrame.
+
+    Args:
+        df: DataFrame с транзакциями
+
+    Returns:
+        Шестнадцатеричный хеш или None, если данные не удалось захешировать
+    """
+    try:
+        digest = hashlib.sha1()
+        digest.update("|".join(map(str, df.columns)).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+    except Exception as e:
+        logger.warning(f"Не удалось вычислить отпечаток данных: {e}")
+        return None
+
+
+def card_suffixes(numbers: pd.Series) -> pd.Series:
+    """
+    Возвращает последние 4 цифры номеров карт.
+
+    Номера, прочитанные как float из-за пропусков, приводятся к целым,
+    чтобы результат не зависел от того, есть ли пропуски в той же части данных.
+
+    Args:
+        numbers: Номера карт
+
+    Returns:
+        Series с последними 4 символами номера ("nan" для пропусков)
+    """
+    if pd.api.types.is_float_dtype(numbers):
+        present = numbers.dropna()
+        if (present == present.round()).all():
+            return numbers.astype("Int64").astype(str).str[-4:].where(numbers.notna(), "nan")
+    return numbers.astype(str).str.strip().str[-4:]
+
+
+class SpendingCube:
+    """
+    Материализованный куб агрегатов по транзакциям.
+
+    Attributes:
+        cells: DataFrame с измерениями DIMENSIONS и мерами MEASURES
+        columns: Столбцы исходного DataFrame
+        amount_column: Столбец, из которого взята сумма операции
+    """
+
+    def __init__(self, cells: pd.DataFrame, columns: List[str], amount_column: Optional[str]) -> None:
+        self.cells = cells
+        self.columns = list(columns)
+        self.amount_column = amount_column
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "SpendingCube":
+        """
+        Строит куб по DataFrame с транзакциями за одну группировку.
+
+        Args:
+            df: DataFrame с транзакциями
+
+        Returns:
+            Куб агрегатов
+        """
+        amount_column = find_amount_column(df)
+        size = len(df)
+
+        if amount_column is not None:
+            amounts = pd.to_numeric(df[amount_column], errors="coerce")
+        else:
+            amounts = pd.Series(np.nan, index=df.index)
+
+        if "Дата операции" in df.columns:
+            dates = pd.to_datetime(df["Дата операции"], errors="coerce")
+        else:
+            dates = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+        weekday = dates.dt.dayofweek
+
+        if "Номер карты" in df.columns:
+            card = card_suffixes(df["Номер карты"])
+        else:
+            card = pd.Series(np.nan, index=df.index, dtype=object)
+
+        if "Кешбэк" in df.columns:
+            cashback = pd.to_numeric(df["Кешбэк"], errors="coerce").fillna(0)
+        else:
+            cashback = pd.Series(0.0, index=df.index)
+
+        frame = pd.DataFrame({
+            "category": df["Категория"] if "Категория" in df.columns else pd.Series(np.nan, index=df.index),
+            "month": dates.dt.to_period("M").astype(str).where(dates.notna()),
+            "weekday": weekday,
+            "hour": dates.dt.hour,
+            # Как и в отчете по типам дней, операции без даты относятся к выходным
+            "day_type": np.where(weekday < 5, WORKDAY, WEEKEND),
+            "card": card,
+            # Направление 1 - расходы по общему правилу spend_mask, -1 - поступления
+            "direction": np.where(spend_mask(amounts), 1, np.sign(amounts)),
+            "amount": amounts,
+            "cashback": cashback,
+        })
+
+        cells = (
+            frame.groupby(DIMENSIONS, dropna=False, sort=False)
+            .agg(amount=("amount", "sum"), count=("amount", "size"), cashback=("cashback", "sum"))
+            .reset_index()
+        )
+
+        logger.info(f"Построен куб агрегатов: {len(cells)} ячеек из {size} транзакций")
+        return cls(cells, list(df.columns), amount_column)
+
+    def rollup(self, dimensions: List[str], **filters: Any) -> pd.DataFrame:
+        """
+        Сворачивает куб до указанных измерений.
+
+        Args:
+            dimensions: Измерения, которые остаются в результате
+            **filters: Фильтры вида измерение=значение
+
+        Returns:
+            DataFrame с измерениями и мерами amount, count, cashback
+        """
+        cells = self.cells
+        for dimension, value in filters.items():
+            cells = cells[cells[dimension] == value]
+
+        if not dimensions:
+            return cells[MEASURES].sum().to_frame().T
+
+        return (
+            cells.groupby(dimensions, sort=False)[MEASURES]
+            .sum()
+            .reset_index()
+        )
+
+    def category_totals(self, direction: int, default_category: str) -> pd.Series:
+        """
+        Возвращает суммы по категориям для расходов (1) или поступлений (-1).
+
+        Args:
+            direction: Знак суммы операции
+            default_category: Категория для данных без столбца 'Категория'
+
+        Returns:
+            Series категория -> сумма
+        """
+        if "Категория" not in self.columns:
+            total = self.rollup([], direction=direction)
+            if not total["count"].iloc[0]:
+                return pd.Series(dtype=float)
+            return pd.Series({default_category: total["amount"].iloc[0]})
+
+        totals = self.rollup(["category"], direction=direction)
+        return totals.set_index("category")["amount"]
+
+    def expense_totals(self) -> pd.Series:
+        """Возвращает суммы расходов по категориям, как analyze_expenses."""
+        return self.category_totals(1, "Без категории")
+
+    def income_totals(self) -> pd.Series:
+        """Возвращает суммы поступлений по категориям, как analyze_incomes."""
+        totals = self.category_totals(-1, "Поступления").abs()
+        if totals.empty and "Категория" in self.columns:
+            # Если нет отрицательных сумм, ищем категории поступлений среди положительных
+            positive = self.category_totals(1, "Поступления")
+            mask = positive.index.astype(str).str.contains('|'.join(INCOME_CATEGORIES), case=False, na=False)
+            totals = positive[mask]
+        return totals
+
+    def card_totals(self) -> pd.DataFrame:
+        """Возвращает суммы расходов и кешбэка по картам, как analyze_cards."""
+        if "Номер карты" not in self.columns or self.amount_column != "Сумма операции":
+            return pd.DataFrame(columns=["card"] + MEASURES)
+        return self.rollup(["card"], direction=1)
+
+    def merge(self, other: "SpendingCube") -> "SpendingCube":
+        """
+        Объединяет куб с кубом по другой части транзакций.
+
+        Меры аддитивны, поэтому ячейки с одинаковыми измерениями складываются.
+
+        Args:
+            other: Куб по другой части транзакций
+
+        Returns:
+            Новый куб по объединению транзакций
+        """
+        if other.amount_column != self.amount_column:
+            raise ValueError(
+                f"Нельзя объединить кубы с разными столбцами суммы: "
+                f"{self.amount_column} и {other.amount_column}"
+            )
+        cells = (
+            pd.concat([self.cells, other.cells], ignore_index=True)
+            .groupby(DIMENSIONS, dropna=False, sort=False)[MEASURES]
+            .sum()
+            .reset_index()
+        )
+        columns = self.columns + [c for c in other.columns if c not in self.columns]
+        return SpendingCube(cells, columns, self.amount_column)
+
+    def normalized_cells(self) -> pd.DataFrame:
+        """Возвращает ячейки, отсортированные по измерениям, для сравнения кубов."""
+        cells = self.cells.astype({"weekday": float, "hour": float, "direction": float})
+        return cells.groupby(DIMENSIONS, dropna=False)[MEASURES].sum().sort_index()
+
+    def equals(self, other: "SpendingCube") -> bool:
+        """Проверяет, что кубы содержат одинаковые агрегаты с точностью до округления."""
+        left = self.normalized_cells()
+        right = other.normalized_cells()
+        return (
+            self.amount_column == other.amount_column
+            and left.index.equals(right.index)
+            and bool(np.allclose(left.to_numpy(dtype=float), right.to_numpy(dtype=float), equal_nan=True))
+        )
+
+    def save(self, path: str) -> None:
+        """Сохраняет куб в файл."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        pd.to_pickle(
+            {"cells": self.cells, "columns": self.columns, "amount_column": self.amount_column},
+            path,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "SpendingCube":
+        """Загружает куб из файла."""
+        state = pd.read_pickle(path)
+        return cls(state["cells"], state["columns"], state["amount_column"])
+
+
+def prune_cube_cache(cache_dir: str, keep: int = CUBE_DISK_LIMIT) -> int:
+    """
+    Удаляет из каталога кеша кубы старых версий схемы и все, кроме keep последних.
+
+    Args:
+        cache_dir: Каталог кеша
+        keep: Сколько последних по времени изменения кубов оставить
+
+    Returns:
+        Количество удаленных файлов
+    """
+    current = f"cube_v{CUBE_VERSION}_"
+    paths = sorted(glob.glob(os.path.join(cache_dir, "cube_*.pkl")), key=os.path.getmtime, reverse=True)
+    kept = 0
+    removed = 0
+    for path in paths:
+        if os.path.basename(path).startswith(current) and kept < keep:
+            kept += 1
+            continue
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError as e:
+            logger.warning(f"Не удалось удалить куб {path}: {e}")
+    if removed:
+        logger.info(f"Удалено устаревших кубов из {cache_dir}: {removed}")
+    return removed
+
+
+def get_cube(
+    df: pd.DataFrame,
+    cache_dir: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+) -> SpendingCube:
+    """
+    Возвращает куб для DataFrame, строя его не чаще одного раза на версию данных.
+
+    Куб ищется сначала в памяти, затем, если задан каталог кеша, на диске
+    по отпечатку данных. На диске хранятся CUBE_DISK_LIMIT последних кубов.
+    Отпечаток без fingerprint считается по всем строкам df, поэтому
+    вызывающий код передает отпечаток, вычисленный один раз при загрузке.
+
+    Args:
+        df: DataFrame с транзакциями
+        cache_dir: Каталог для сохранения куба (None - только память)
+        fingerprint: Уже вычисленный отпечаток df (None - вычислить)
+
+    Returns:
+        Куб агрегатов
+    """
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(df)
+    if fingerprint is None:
+        return SpendingCube.from_dataframe(df)
+
+    with _memory_lock:
+        if fingerprint in _memory_cache:
+            _memory_cache.move_to_end(fingerprint)
+            return _memory_cache[fingerprint]
+
+    cube = None
+    path = os.path.join(cache_dir, f"cube_v{CUBE_VERSION}_{fingerprint}.pkl") if cache_dir else None
+    if path and os.path.exists(path):
+        try:
+            cube = SpendingCube.load(path)
+            logger.info(f"Куб агрегатов загружен из {path}")
+        except Exception as e:
+            logger.warning(f"Не удалось загрузить куб из {path}: {e}")
+
+    if cube is None:
+        cube = SpendingCube.from_dataframe(df)
+        if path:
+            try:
+                cube.save(path)
+                prune_cube_cache(cache_dir)
+            except Exception as e:
+                logger.warning(f"Не удалось сохранить куб в {path}: {e}")
+
+    remember_cube(fingerprint, cube)
+    return cube
+
+
+def remember_cube(fingerprint: str, cube: SpendingCube) -> None:
+    """
+    Кладет уже построенный куб в кеш памяти get_cube.
+
+    Args:
+        fingerprint: Отпечаток данных, по которым построен куб
+        cube: Куб агрегатов (например, из инкрементального состояния отчетов)
+    """
+    with _memory_lock:
+        _memory_cache[fingerprint] = cube
+        _memory_cache.move_to_end(fingerprint)
+        while len(_memory_cache) > CUBE_MEMORY_LIMIT:
+            _memory_cache.popitem(last=False)
@@ -0,0 +1,303 @@
+"""
+Модуль демона, отвечающего на запросы через Unix-сокет.
+
+Демон держит в памяти транзакции, DataFrame, поисковые индексы, куб
+агрегатов, индекс накопленных сумм расходов и рыночные данные, поэтому запрос стоит миллисекунды, а не
+запуск интерпретатора, импорт pandas и разбор Excel. При изменении файла
+данных демон перечитывает его перед следующим запросом; транзакции,
+дописанные в конец файла, добавляются в состояние отчетов дельтой
+(IncrementalReportState), а куб не строится заново по всей истории.
+
+Протокол: одна JSON-строка запроса {"command": ..., "params": {...}} и
+одна JSON-строка ответа {"status": "ok", "result": ...} или
+{"status": "error", "error": ..., "kind": ...}. Команды - из src.commands,
+а также ping и reload.
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from src.commands import MARKET_DATA_PARAM, run_command
+from src.dataset import DATASET_CACHE_DIR, DEFAULT_DATA_FILE, DEFAULT_SOCKET_PATH, load_cached_transactions
+from src.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+MARKET_DATA_TTL = 300
+
+# Команды, которым нужны рыночные данные
+MARKET_DATA_COMMANDS = ("home", "events")
+
+
+class DaemonSource:
+    """
+    Источник данных демона, перечитывающий файл при его изменении.
+
+    Attributes:
+        data_file: Excel файл с транзакциями
+        cache_dir: Каталог кеша транзакций
+        market_data_ttl: Время жизни рыночных данных в секундах
+        reloads: Сколько раз данные были загружены
+    """
+
+    def __init__(
+        self,
+        data_file: str = DEFAULT_DATA_FILE,
+        cache_dir: Optional[str] = DATASET_CACHE_DIR,
+        market_data_ttl: float = MARKET_DATA_TTL,
+    ) -> None:
+        self.data_file = data_file
+        self.cache_dir = cache_dir
+        self.market_data_ttl = market_data_ttl
+        self.reloads = 0
+        self._signature: Optional[Tuple[int, int]] = None
+        self._transactions: List[Dict[str, Any]] = []
+        self._frame: Any = None
+        self._spend_index: Any = None
+        self._fingerprint: Optional[str] = None
+        self._report_state: Any = None
+        self._market_data: Dict[str, Any] = {}
+        self._market_data_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._market_lock = threading.Lock()
+        self.refresh()
+
+    def _file_signature(self) -> Tuple[int, int]:
+        """Возвращает размер и время изменения файла данных."""
+        stat = os.stat(self.data_file)
+        return stat.st_size, stat.st_mtime_ns
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Перечитывает данные, если файл изменился.
+
+        Args:
+            force: Перечитать независимо от изменений
+
+        Returns:
+            True, если данные были перечитаны
+        """
+        with self._refresh_lock:
+            return self._reload(force)
+
+    def _reload(self, force: bool) -> bool:
+        """Перечитывает данные под блокировкой refresh."""
+        signature = self._file_signature()
+        if signature == self._signature and not force:
+            return False
+
+        import pandas as pd
+        from src.cube import dataset_fingerprint, remember_cube
+        from src.indexes import SpendPrefixIndex
+        from src.reports import IncrementalReportState, report_state_path
+        from src.search import get_inverted_index
+
+        transactions = load_cached_transactions(self.data_file, self.cache_dir)
+        frame = pd.DataFrame(transactions)
+        # Прогрев индексов и куба, чтобы первый запрос не платил за их построение
+        get_inverted_index(transactions)
+        fingerprint = dataset_fingerprint(frame) if not frame.empty else None
+
+        # Дописанные в файл транзакции добавляются в состояние отчетов дельтой,
+        # и его куб служит страницам, поэтому куб не строится заново по всей истории
+        if self._report_state is None:
+            self._report_state = IncrementalReportState(report_state_path(self.cache_dir))
+        self._report_state.refresh(transactions)
+        if fingerprint is not None and self._report_state.cube is not None:
+            remember_cube(fingerprint, self._report_state.cube)
+
+        spend_index = SpendPrefixIndex(transactions)
+
+        self._transactions = transactions
+        self._frame = frame
+        self._spend_index = spend_index
+        self._fingerprint = fingerprint
+        self._signature = signature
+        self.reloads += 1
+        logger.info(f"Демон загрузил {len(transactions)} транзакций из {self.data_file}")
+        return True
+
+    def transactions(self) -> List[Dict[str, Any]]:
+        """Возвращает список транзакций."""
+        return self._transactions
+
+    def frame(self) -> Any:
+        """Возвращает транзакции в DataFrame."""
+        return self._frame
+
+    def spend_index(self) -> Any:
+        """Возвращает индекс накопленных сумм расходов, построенный при загрузке."""
+        return self._spend_index
+
+    def fingerprint(self) -> Optional[str]:
+        """Возвращает отпечаток данных, вычисленный при загрузке."""
+        return self._fingerprint
+
+    def report_state(self) -> Any:
+        """Возвращает состояние отчетов, обновленное при загрузке."""
+        return self._report_state
+
+    def _market_data_stale(self) -> bool:
+        """Проверяет, истек ли срок жизни рыночных данных."""
+        return not self._market_data or time.monotonic() - self._market_data_at > self.market_data_ttl
+
+    def market_data(self) -> Dict[str, Any]:
+        """
+        Возвращает курсы валют и цены акций, обновляя их раз в market_data_ttl секунд.
+
+        Внешние сервисы опрашивает один поток; остальные в это время
+        получают последние известные данные, а ждут только при их отсутствии.
+        """
+        if not self._market_data_stale():
+            return self._market_data
+        if not self._market_lock.acquire(blocking=not self._market_data):
+            return self._market_data
+        try:
+            if self._market_data_stale():
+                from src.utils import get_exchange_rates, get_stock_prices
+
+                self._market_data = {
+                    "exchange_rates": get_exchange_rates(),
+                    "stock_prices": get_stock_prices(),
+                }
+                self._market_data_at = time.monotonic()
+        finally:
+            self._market_lock.release()
+        return self._market_data
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Обрабатывает запросы одного соединения, по одному на строку."""
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.daemon.handle(line)
+            self.wfile.write(dumps(response) + b"\n")
+            self.wfile.flush()
+
+
+def _socket_answers(socket_path: str) -> bool:
+    """Проверяет, принимает ли кто-то соединения на Unix-сокете."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(1.0)
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+class ReportDaemon:
+    """
+    Демон, выполняющий команды над данными в памяти.
+
+    Attributes:
+        source: Источник данных
+        socket_path: Путь к Unix-сокету
+    """
+
+    def __init__(self, source: DaemonSource, socket_path: str = DEFAULT_SOCKET_PATH) -> None:
+        self.source = source
+        self.socket_path = socket_path
+        # Команды выполняются по одной: индексы и кеши не рассчитаны на потоки
+        self._lock = threading.Lock()
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+
+    def handle(self, raw: bytes) -> Dict[str, Any]:
+        """
+        Выполняет запрос и возвращает ответ.
+
+        Args:
+            raw: JSON-строка запроса
+
+        Returns:
+            Словарь ответа
+        """
+        try:
+            request = json.loads(raw)
+            command = request.get("command")
+            # Рыночные данные передает только сам демон, не клиент
+            params = {k: v for k, v in (request.get("params") or {}).items() if k != MARKET_DATA_PARAM}
+            if command in MARKET_DATA_COMMANDS:
+                # Вне общей блокировки: медленный внешний сервис не задерживает другие команды,
+                # а команда получает уже запрошенные данные и не обращается к сервису под блокировкой
+                params[MARKET_DATA_PARAM] = self.source.market_data()
+            with self._lock:
+                if command == "ping":
+                    result: Any = "pong"
+                elif command == "reload":
+                    result = self.source.refresh(force=True)
+                else:
+                    self.source.refresh()
+                    result = run_command(self.source, command, params)
+            return {"status": "ok", "result": result}
+        except Exception as e:
+            logger.error(f"Ошибка выполнения запроса демона: {e}")
+            return {"status": "error", "error": str(e), "kind": type(e).__name__}
+
+    def serve_forever(self) -> None:
+        """Слушает сокет до вызова shutdown."""
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        if os.path.exists(self.socket_path):
+            if _socket_answers(self.socket_path):
+                raise RuntimeError(f"Демон уже запущен на {self.socket_path}")
+            # Сокет остался от завершившегося демона
+            os.remove(self.socket_path)
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, _RequestHandler)
+        self._server.daemon_threads = True
+        self._server.daemon = self
+        logger.info(f"Демон слушает {self.socket_path}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def shutdown(self) -> None:
+        """Останавливает демон."""
+        if self._server is not None:
+            self._server.shutdown()
+
+
+def request(
+    command: str,
+    params: Optional[Dict[str, Any]] = None,
+    socket_path: str = DEFAULT_SOCKET_PATH,
+    timeout: float = 60.0,
+) -> Any:
+    """
+    Отправляет команду демону и возвращает результат.
+
+    Args:
+        command: Имя команды
+        params: Параметры команды
+        socket_path: Путь к Unix-сокету демона
+        timeout: Таймаут ожидания ответа в секундах
+
+    Returns:
+        Результат команды
+
+    Raises:
+        ValueError: Если демон отклонил команду или ее параметры
+        RuntimeError: Если команда завершилась другой ошибкой
+    """
+    payload = dumps({"command": command, "params": params or {}})
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(payload + b"\n")
+        with sock.makefile("rb") as stream:
+            response = json.loads(stream.readline())
+
+    if response.get("status") != "ok":
+        error_class = ValueError if response.get("kind") == "ValueError" else RuntimeError
+        raise error_class(response.get("error"))
+    return response["result"]
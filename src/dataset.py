@@ -0,0 +1,87 @@
+"""
+Модуль кеша набора транзакций для быстрого запуска.
+
+Транзакции из Excel файла сохраняются в pickle из стандартных типов
+Python (datetime вместо Timestamp, None вместо NaT), поэтому повторная
+загрузка не требует ни pandas, ни разбора Excel. Кеш привязан к версии
+файла по пути, размеру и времени изменения.
+"""
+import hashlib
+import logging
+import os
+import pickle
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_FILE = os.path.join("data", "operations.xlsx")
+
+# Тот же каталог, что и у кеша куба агрегатов
+DATASET_CACHE_DIR = os.path.join("data", ".cache")
+
+# Сокет демона (src.daemon); объявлен здесь, чтобы разбор аргументов не импортировал демон
+DEFAULT_SOCKET_PATH = os.path.join(DATASET_CACHE_DIR, "daemon.sock")
+
+
+def _cache_path(file_path: str, cache_dir: str) -> str:
+    """Возвращает путь к кешу для текущей версии файла."""
+    stat = os.stat(file_path)
+    key = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return os.path.join(cache_dir, f"transactions_{hashlib.sha1(key.encode('utf-8')).hexdigest()}.pkl")
+
+
+def _plain_value(value: Any) -> Any:
+    """Приводит значение из DataFrame к стандартному типу Python."""
+    if isinstance(value, datetime):
+        # NaT - тоже datetime, но не равен сам себе
+        if value != value:
+            return None
+        return value.to_pydatetime() if hasattr(value, "to_pydatetime") else value
+    if hasattr(value, "item"):
+        return value.item()
+    if type(value).__module__.startswith("pandas"):
+        # pd.NA и другие пропуски pandas
+        return None
+    return value
+
+
+def load_cached_transactions(
+    file_path: str = DEFAULT_DATA_FILE, cache_dir: Optional[str] = DATASET_CACHE_DIR
+) -> List[Dict[str, Any]]:
+    """
+    Загружает транзакции из кеша, читая Excel только при его отсутствии.
+
+    Args:
+        file_path: Путь к Excel файлу
+        cache_dir: Каталог кеша (None - всегда читать Excel)
+
+    Returns:
+        Список словарей с транзакциями
+    """
+    path = _cache_path(file_path, cache_dir) if cache_dir and os.path.exists(file_path) else None
+    if path and os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать кеш транзакций {path}: {e}")
+
+    from src.utils import load_transactions
+
+    transactions = [
+        {key: _plain_value(value) for key, value in transaction.items()}
+        for transaction in load_transactions(file_path)
+    ]
+
+    if path and transactions:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(transactions, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            logger.info(f"Транзакции сохранены в кеш {path}")
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить кеш транзакций {path}: {e}")
+    return transactions
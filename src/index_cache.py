@@ -0,0 +1,75 @@
+"""
+Модуль кеша индексов, привязанных к списку транзакций.
+
+Модуль не зависит от pandas, чтобы поиск по описаниям можно было
+выполнять без его загрузки.
+"""
+import threading
+import weakref
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple
+
+# Сколько индексов одного класса хранится одновременно (разные списки и поля)
+INDEX_CACHE_SIZE = 8
+
+_index_cache: "Dict[type, OrderedDict[Tuple[int, str], Tuple[Any, Any]]]" = {}
+_index_lock = threading.Lock()
+
+
+def _source_ref(transactions: List[Dict[str, Any]]) -> Any:
+    """
+    Возвращает ссылку на список для проверки попадания в кеш.
+
+    Обычный list не поддерживает слабые ссылки, поэтому для него хранится
+    сам список: он удерживается, только пока его индекс в кеше, а кеш
+    ограничен INDEX_CACHE_SIZE записями на класс индекса.
+    """
+    try:
+        return weakref.ref(transactions)
+    except TypeError:
+        return lambda: transactions
+
+
+def get_cached_index(index_class: type, transactions: List[Dict[str, Any]], field: str) -> Any:
+    """
+    Возвращает индекс класса index_class для списка транзакций.
+
+    Индексы хранятся в LRU-кеше по id списка и полю, по INDEX_CACHE_SIZE
+    на класс, поэтому чередование нескольких списков (например, разных
+    наборов данных или результатов filter_by_date_range) не перестраивает
+    индекс на каждом вызове. Попадание проверяется по самому объекту
+    списка, так что повторно использованный id не вернет чужой индекс.
+
+    Индекс привязан к объекту списка: если в список дописаны новые
+    транзакции, в индекс добавляются только они через метод add.
+    Изменение уже проиндексированных транзакций на месте не отслеживается.
+
+    Args:
+        index_class: Класс индекса с конструктором (transactions, field) и методом add
+        transactions: Список транзакций
+        field: Поле, по которому строится индекс
+
+    Returns:
+        Индекс
+    """
+    key = (id(transactions), field)
+    with _index_lock:
+        cache = _index_cache.setdefault(index_class, OrderedDict())
+        entry = cache.get(key)
+        if entry is not None:
+            cache.move_to_end(key)
+
+    index = None
+    if entry is not None and entry[0]() is transactions:
+        index = entry[1]
+
+    if index is None or len(index) > len(transactions):
+        index = index_class(transactions, field)
+        with _index_lock:
+            cache[key] = (_source_ref(transactions), index)
+            cache.move_to_end(key)
+            while len(cache) > INDEX_CACHE_SIZE:
+                cache.popitem(last=False)
+    elif len(index) < len(transactions):
+        index.add(transactions[len(index):])
+    return index
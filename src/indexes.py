@@ -0,0 +1,557 @@
+"""
+Модуль индексов для быстрых запросов по транзакциям.
+"""
+import logging
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.index_cache import get_cached_index  # noqa: F401 - реэкспорт для services
+
+logger = logging.getLogger(__name__)
+
+DateRange = Tuple[Optional[Any], Optional[Any]]
+
+
+def parse_dates(values: Sequence[Any]) -> pd.Series:
+    """
+    Разбирает последовательность дат за один векторизованный проход.
+
+    Args:
+        values: Значения дат (строки, datetime, Timestamp)
+
+    Returns:
+        Series с datetime64, нераспознанные значения заменены на NaT
+    """
+    series = pd.Series(list(values), dtype=object)
+    if series.empty:
+        return pd.Series([], dtype="datetime64[ns]")
+    return pd.to_datetime(series, errors="coerce", format="mixed")
+
+
+def spend_mask(amounts: Sequence[Any]) -> np.ndarray:
+    """
+    Отмечает расходы среди операций.
+
+    Расходом считается операция с положительной суммой - это правило
+    analyze_expenses, и ему же следуют куб агрегатов, индекс сумм расходов
+    и сервисы кешбэка, поэтому суммы расходов везде совпадают.
+
+    Args:
+        amounts: Суммы операций
+
+    Returns:
+        Булев массив той же длины, что и amounts
+    """
+    return np.asarray(amounts, dtype=float) > 0
+
+
+def _timestamp_value(value: Any) -> int:
+    """Переводит дату в количество наносекунд от эпохи."""
+    return pd.to_datetime(value).value
+
+
+class DateIndex:
+    """
+    Индекс транзакций, отсортированных по дате операции.
+
+    Даты разбираются один раз при построении индекса, поэтому запрос
+    по диапазону сводится к двум бинарным поискам и срезу.
+    Транзакции с нераспознанной датой в индекс не попадают.
+
+    Индекс совместим с get_cached_index: len - число просмотренных
+    транзакций, новые транзакции добавляются методом add.
+    """
+
+    def __init__(
+        self,
+        transactions: List[Dict[str, Any]],
+        date_column: str = "Дата операции",
+    ) -> None:
+        self.transactions = transactions
+        self.date_column = date_column
+        self.field = date_column
+        self._count = 0
+        self._positions = np.zeros(0, dtype=np.int64)
+        self._stamps = np.zeros(0, dtype=np.int64)
+
+        self.add(transactions)
+        logger.info(
+            f"Построен индекс дат: {len(self._positions)} из {len(transactions)} транзакций"
+        )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, transactions: List[Dict[str, Any]]) -> None:
+        """
+        Добавляет в индекс транзакции, дописанные в конец исходного списка.
+
+        Args:
+            transactions: Новые транзакции
+        """
+        if not transactions:
+            return
+
+        dates = parse_dates(t.get(self.date_column) for t in transactions)
+        valid = ~dates.isna().to_numpy()
+        stamps = dates.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        positions = np.flatnonzero(valid)
+
+        all_positions = np.concatenate([self._positions, positions + self._count])
+        all_stamps = np.concatenate([self._stamps, stamps[positions]])
+        # Старая часть уже упорядочена, поэтому устойчивая сортировка почти линейна
+        order = np.argsort(all_stamps, kind="stable")
+        self._positions = all_positions[order]
+        self._stamps = all_stamps[order]
+        self._count += len(transactions)
+
+    @property
+    def min_date(self) -> Optional[pd.Timestamp]:
+        """Самая ранняя дата в индексе."""
+        return pd.Timestamp(self._stamps[0]) if len(self._stamps) else None
+
+    @property
+    def max_date(self) -> Optional[pd.Timestamp]:
+        """Самая поздняя дата в индексе."""
+        return pd.Timestamp(self._stamps[-1]) if len(self._stamps) else None
+
+    def _bounds(self, start_date: Optional[Any], end_date: Optional[Any]) -> Tuple[int, int]:
+        """Возвращает границы среза для диапазона [start_date, end_date]."""
+        lo = 0
+        hi = len(self._stamps)
+        if start_date:
+            lo = int(np.searchsorted(self._stamps, _timestamp_value(start_date), side="left"))
+        if end_date:
+            hi = int(np.searchsorted(self._stamps, _timestamp_value(end_date), side="right"))
+        return lo, max(lo, hi)
+
+    def range_positions(
+        self, start_date: Optional[Any] = None, end_date: Optional[Any] = None
+    ) -> np.ndarray:
+        """
+        Возвращает позиции транзакций в диапазоне дат.
+
+        Args:
+            start_date: Начальная дата включительно
+            end_date: Конечная дата включительно
+
+        Returns:
+            Массив позиций в исходном списке, упорядоченный по дате
+        """
+        lo, hi = self._bounds(start_date, end_date)
+        return self._positions[lo:hi]
+
+    def range(
+        self, start_date: Optional[Any] = None, end_date: Optional[Any] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Возвращает транзакции в диапазоне дат в порядке возрастания даты.
+
+        Args:
+            start_date: Начальная дата включительно
+            end_date: Конечная дата включительно
+
+        Returns:
+            Список транзакций
+        """
+        return [self.transactions[i] for i in self.range_positions(start_date, end_date)]
+
+    def batch_range_positions(self, ranges: Sequence[DateRange]) -> List[np.ndarray]:
+        """
+        Выполняет сразу несколько запросов по диапазонам дат.
+
+        Границы всех диапазонов ищутся одним вызовом searchsorted.
+
+        Args:
+            ranges: Последовательность пар (start_date, end_date)
+
+        Returns:
+            Список массивов позиций, по одному на каждый диапазон
+        """
+        if not ranges:
+            return []
+
+        size = len(self._stamps)
+        starts = np.array(
+            [_timestamp_value(s) if s else np.iinfo(np.int64).min for s, _ in ranges],
+            dtype=np.int64,
+        )
+        ends = np.array(
+            [_timestamp_value(e) if e else np.iinfo(np.int64).max for _, e in ranges],
+            dtype=np.int64,
+        )
+        los = np.searchsorted(self._stamps, starts, side="left")
+        his = np.searchsorted(self._stamps, ends, side="right")
+
+        result = []
+        for (start, end), lo, hi in zip(ranges, los, his):
+            lo = int(lo) if start else 0
+            hi = int(hi) if end else size
+            result.append(self._positions[lo:max(lo, hi)])
+        return result
+
+
+def _card_key(card: Any) -> str:
+    """Возвращает последние 4 цифры номера карты, как в analyze_cards."""
+    if isinstance(card, float) and card.is_integer():
+        # Номера, прочитанные как float из-за пропусков, как в card_suffixes
+        card = int(card)
+    card_number = str(card if card is not None else "").strip()
+    if card_number.lower() == "nan":
+        return ""
+    return card_number[-4:] if len(card_number) >= 4 else card_number
+
+
+_NS_PER_DAY = 86_400 * 10**9
+
+
+def _day_number(value: Any) -> int:
+    """Переводит дату в номер дня от эпохи."""
+    return int(pd.to_datetime(value).normalize().value // _NS_PER_DAY)
+
+
+class SpendPrefixIndex:
+    """
+    Индекс накопленных сумм расходов по дням.
+
+    Хранит массивы префиксных сумм по всем расходам, по категориям и по
+    картам, поэтому сумма расходов за любой диапазон дней считается за O(1).
+    Расходы отбираются spend_mask, как и в analyze_expenses и кубе агрегатов,
+    поэтому сумма за диапазон совпадает с analyze_expenses(filter_by_date_range(...)).
+    """
+
+    def __init__(
+        self,
+        transactions: List[Dict[str, Any]],
+        date_column: str = "Дата операции",
+        amount_column: str = "Сумма операции",
+    ) -> None:
+        self.date_column = date_column
+        self.amount_column = amount_column
+
+        self._origin: Optional[int] = None
+        self._days = 0
+        self._overall = np.zeros(1)
+        self._categories: Dict[str, int] = {}
+        self._cards: Dict[str, int] = {}
+        self._by_category = np.zeros((0, 1))
+        self._by_card = np.zeros((0, 1))
+
+        self.append(transactions)
+
+    def _columns(
+        self, transactions: List[Dict[str, Any]]
+    ) -> Tuple[np.ndarray, np.ndarray, List[str], List[str]]:
+        """Извлекает дни, суммы расходов, категории и карты из транзакций."""
+        dates = parse_dates(t.get(self.date_column) for t in transactions)
+        amounts = pd.to_numeric(
+            pd.Series([t.get(self.amount_column, 0) for t in transactions], dtype=object),
+            errors="coerce",
+        ).fillna(0).to_numpy(dtype=float)
+
+        mask = (~dates.isna()).to_numpy() & spend_mask(amounts)
+        stamps = dates.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        days = stamps[mask] // _NS_PER_DAY
+
+        selected = np.flatnonzero(mask)
+        categories = [str(transactions[i].get("Категория", "Без категории")) for i in selected]
+        cards = [_card_key(transactions[i].get("Номер карты")) for i in selected]
+        return days, amounts[mask], categories, cards
+
+    def _grow(self, first_day: int, last_day: int) -> None:
+        """Расширяет массивы так, чтобы они покрывали дни [first_day, last_day]."""
+        if self._origin is None:
+            self._origin = first_day
+
+        prepend = max(0, self._origin - first_day)
+        append = max(0, last_day - (self._origin + self._days - 1))
+        if not prepend and not append:
+            return
+
+        def extend(cumulative: np.ndarray) -> np.ndarray:
+            # Слева накопленная сумма нулевая, справа повторяется последнее значение
+            head = np.zeros(cumulative.shape[:-1] + (prepend,))
+            tail = np.repeat(cumulative[..., -1:], append, axis=-1)
+            return np.concatenate([head, cumulative, tail], axis=-1)
+
+        self._overall = extend(self._overall)
+        self._by_category = extend(self._by_category)
+        self._by_card = extend(self._by_card)
+        self._origin -= prepend
+        self._days += prepend + append
+
+    @staticmethod
+    def _register(keys: List[str], registry: Dict[str, int], table: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Добавляет новые ключи в реестр и возвращает их коды и таблицу."""
+        for key in keys:
+            if key not in registry:
+                registry[key] = len(registry)
+        missing = len(registry) - table.shape[0]
+        if missing:
+            table = np.vstack([table, np.zeros((missing, table.shape[1]))])
+        codes = np.fromiter((registry[key] for key in keys), dtype=np.int64, count=len(keys))
+        return codes, table
+
+    def append(self, transactions: List[Dict[str, Any]]) -> None:
+        """
+        Добавляет новые транзакции в индекс.
+
+        Новые дни дописываются в конец массивов, а транзакции за уже
+        известные дни сдвигают накопленные суммы только начиная с их дня.
+
+        Args:
+            transactions: Список новых транзакций
+        """
+        if not transactions:
+            return
+
+        days, amounts, categories, cards = self._columns(transactions)
+        if not len(days):
+            return
+
+        self._grow(int(days.min()), int(days.max()))
+        # Пересчитываются только дни, начиная с самого раннего дня новых транзакций
+        first = int(days.min()) - self._origin
+        offsets = days - self._origin - first
+        width = self._days - first
+
+        daily = np.bincount(offsets, weights=amounts, minlength=width)
+        self._overall[first + 1:] += np.cumsum(daily)
+
+        category_codes, self._by_category = self._register(categories, self._categories, self._by_category)
+        card_codes, self._by_card = self._register(cards, self._cards, self._by_card)
+
+        for codes, table in ((category_codes, self._by_category), (card_codes, self._by_card)):
+            daily = np.bincount(
+                codes * width + offsets, weights=amounts, minlength=table.shape[0] * width
+            ).reshape(table.shape[0], width)
+            table[:, first + 1:] += np.cumsum(daily, axis=1)
+
+        logger.info(f"Индекс сумм расходов дополнен {len(days)} транзакциями")
+
+    def _slice(self, start_date: Optional[Any], end_date: Optional[Any]) -> Tuple[int, int]:
+        """Переводит диапазон дат во включительный диапазон индексов дней."""
+        if self._origin is None:
+            return 0, 0
+        lo = 0 if not start_date else _day_number(start_date) - self._origin
+        hi = self._days if not end_date else _day_number(end_date) - self._origin + 1
+        lo = min(max(lo, 0), self._days)
+        hi = min(max(hi, 0), self._days)
+        return lo, max(lo, hi)
+
+    def total(
+        self,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None,
+        category: Optional[str] = None,
+        card: Optional[str] = None,
+    ) -> float:
+        """
+        Возвращает сумму расходов за диапазон дней включительно.
+
+        Args:
+            start_date: Начальная дата
+            end_date: Конечная дата
+            category: Категория (если нужна сумма по одной категории)
+            card: Номер карты или его последние 4 цифры
+
+        Returns:
+            Сумма расходов
+        """
+        lo, hi = self._slice(start_date, end_date)
+        if category is not None:
+            row = self._categories.get(category)
+            if row is None:
+                return 0.0
+            cumulative = self._by_category[row]
+        elif card is not None:
+            row = self._cards.get(_card_key(card))
+            if row is None:
+                return 0.0
+            cumulative = self._by_card[row]
+        else:
+            cumulative = self._overall
+        return float(cumulative[hi] - cumulative[lo])
+
+    def totals_by_category(
+        self, start_date: Optional[Any] = None, end_date: Optional[Any] = None
+    ) -> Dict[str, float]:
+        """Возвращает суммы расходов по всем категориям за диапазон дней."""
+        lo, hi = self._slice(start_date, end_date)
+        totals = self._by_category[:, hi] - self._by_category[:, lo]
+        return {category: float(totals[row]) for category, row in self._categories.items()}
+
+    def totals_by_card(
+        self, start_date: Optional[Any] = None, end_date: Optional[Any] = None
+    ) -> Dict[str, float]:
+        """Возвращает суммы расходов по всем картам за диапазон дней."""
+        lo, hi = self._slice(start_date, end_date)
+        totals = self._by_card[:, hi] - self._by_card[:, lo]
+        return {card: float(totals[row]) for card, row in self._cards.items()}
+
+    def compare(
+        self,
+        start_date: Any,
+        end_date: Any,
+        previous_start: Optional[Any] = None,
+        previous_end: Optional[Any] = None,
+        category: Optional[str] = None,
+        card: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Сравнивает расходы за период с предыдущим периодом.
+
+        Если предыдущий период не указан, берется период той же длины,
+        непосредственно предшествующий текущему.
+
+        Args:
+            start_date: Начало текущего периода
+            end_date: Конец текущего периода
+            previous_start: Начало предыдущего периода
+            previous_end: Конец предыдущего периода
+            category: Категория для сравнения
+            card: Карта для сравнения
+
+        Returns:
+            Словарь с суммами за оба периода и разницей между ними
+        """
+        if previous_start is None or previous_end is None:
+            start = pd.to_datetime(start_date).normalize()
+            length = pd.to_datetime(end_date).normalize() - start + pd.Timedelta(days=1)
+            previous_end = start - pd.Timedelta(days=1)
+            previous_start = start - length
+
+        current = self.total(start_date, end_date, category, card)
+        previous = self.total(previous_start, previous_end, category, card)
+        delta = current - previous
+
+        return {
+            "current": current,
+            "previous": previous,
+            "delta": delta,
+            "delta_percentage": round(delta / previous * 100, 2) if previous else None,
+        }
+
+
+class MonthlyCashbackIndex:
+    """
+    Индекс кешбэка по месяцам и категориям.
+
+    Хранит накопленные по месяцам суммы кешбэка для каждой категории,
+    поэтому кешбэк за любой диапазон месяцев считается за O(категорий).
+    Учитывается только положительный кешбэк.
+    """
+
+    def __init__(
+        self,
+        transactions: Optional[List[Dict[str, Any]]] = None,
+        field: str = "Кешбэк",
+        date_column: str = "Дата операции",
+    ) -> None:
+        self.field = field
+        self.date_column = date_column
+        self._count = 0
+        self._monthly: Dict[int, Dict[str, float]] = {}
+        self._undated: Dict[str, float] = {}
+        self._categories: List[str] = []
+        self._first_month: Optional[int] = None
+        self._cumulative = np.zeros((0, 1))
+        self._dirty = False
+
+        if transactions:
+            self.add(transactions)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, transactions: List[Dict[str, Any]]) -> None:
+        """
+        Добавляет транзакции в индекс.
+
+        Args:
+            transactions: Новые транзакции
+        """
+        if not transactions:
+            return
+
+        months = parse_dates(t.get(self.date_column) for t in transactions).dt.to_period("M")
+        cashback = pd.to_numeric(
+            pd.Series([t.get(self.field, 0) for t in transactions], dtype=object), errors="coerce"
+        )
+
+        for transaction, month, amount in zip(transactions, months, cashback):
+            if not amount > 0:
+                continue
+            category = transaction.get("Категория", "Без категории")
+            bucket = self._undated if pd.isna(month) else self._monthly.setdefault(month.ordinal, {})
+            bucket[category] = bucket.get(category, 0.0) + float(amount)
+
+        self._count += len(transactions)
+        self._dirty = True
+
+    def _build(self) -> None:
+        """Пересчитывает массивы накопленных сумм по месяцам."""
+        categories = set(self._undated)
+        for bucket in self._monthly.values():
+            categories.update(bucket)
+        self._categories = sorted(categories, key=str)
+        rows = {category: row for row, category in enumerate(self._categories)}
+
+        if self._monthly:
+            self._first_month = min(self._monthly)
+            width = max(self._monthly) - self._first_month + 1
+        else:
+            self._first_month = None
+            width = 0
+
+        monthly = np.zeros((len(self._categories), width))
+        for ordinal, bucket in self._monthly.items():
+            for category, amount in bucket.items():
+                monthly[rows[category], ordinal - self._first_month] += amount
+
+        self._cumulative = np.zeros((len(self._categories), width + 1))
+        self._cumulative[:, 1:] = np.cumsum(monthly, axis=1)
+        self._dirty = False
+
+    @property
+    def latest_month(self) -> Optional[pd.Period]:
+        """Последний месяц с кешбэком."""
+        return pd.Period(ordinal=max(self._monthly), freq="M") if self._monthly else None
+
+    def totals(
+        self, start_month: Optional[pd.Period] = None, end_month: Optional[pd.Period] = None
+    ) -> Dict[str, float]:
+        """
+        Возвращает кешбэк по категориям за диапазон месяцев включительно.
+
+        Если границы не заданы, возвращается кешбэк за всю историю,
+        включая транзакции без даты.
+
+        Args:
+            start_month: Первый месяц
+            end_month: Последний месяц
+
+        Returns:
+            Словарь категория -> кешбэк
+        """
+        if self._dirty:
+            self._build()
+
+        width = self._cumulative.shape[1] - 1
+        lo, hi = 0, width
+        if self._first_month is not None:
+            if start_month is not None:
+                lo = min(max(start_month.ordinal - self._first_month, 0), width)
+            if end_month is not None:
+                hi = min(max(end_month.ordinal - self._first_month + 1, 0), width)
+        hi = max(lo, hi)
+
+        totals = self._cumulative[:, hi] - self._cumulative[:, lo]
+        result = {category: float(totals[row]) for row, category in enumerate(self._categories)}
+
+        if start_month is None and end_month is None:
+            for category, amount in self._undated.items():
+                result[category] += amount
+        return result
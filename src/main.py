@@ -1,21 +1,27 @@
 ﻿"""
 Главный модуль приложения для анализа банковских транзакций.
+
+Подкоманды:
+    home - главная страница
+    events - страница событий за период
+    search - поиск транзакций по описанию
+    report <name> - отчет из src.reports
+    stats - статистика по транзакциям
+    serve - демон, держащий данные в памяти (src.daemon)
+    api - асинхронный HTTP API страниц (src.api)
+
+Без подкоманды запускается демонстрация всех функций. Каждая подкоманда
+импортирует только нужные модули, а транзакции читает из кеша src.dataset,
+поэтому поиск по закешированным данным не загружает pandas. С флагом
+--daemon команда передается запущенному демону.
 """
+import argparse
+import json
 import logging
-from src.utils import load_transactions, read_excel_file
-from src.services import (
-    analyze_cashback_categories,
-    calculate_investment_piggybank,
-    search_transactions,
-    find_phone_transactions,
-    find_personal_transfers,
-)
-from src.reports import (
-    generate_spending_by_category_report,
-    generate_spending_by_weekday_report,
-    generate_spending_by_workday_report,
-)
-from src.views import home_page, events_page
+import signal
+import sys
+import threading
+from typing import List, Dict, Any, Optional
 
 # Настройка логирования
 logging.basicConfig(
@@ -25,10 +31,21 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def main() -> None:
+def demo() -> None:
     """
-    Основная функция приложения.
+    Демонстрация всех функций приложения (запуск без подкоманды).
     """
+    from src.utils import load_transactions, read_excel_file
+    from src.services import (
+        analyze_cashback_categories,
+        calculate_investment_piggybank,
+        search_transactions,
+        find_phone_transactions,
+        find_personal_transfers,
+    )
+    from src.reports import run_report_batch, MONTHLY_REPORT_PACK
+    from src.views import home_page, events_page
+
     print("Запуск приложения анализа банковских транзакций")
 
     try:
@@ -74,15 +91,11 @@ def main() -> None:
 
         # Демонстрация отчетов
         print("\nДемонстрация отчетов:")
-        category_report = generate_spending_by_category_report(
-            transactions, "Супермаркеты"
+        category_report, weekday_report, workday_report = run_report_batch(
+            transactions, MONTHLY_REPORT_PACK
         )
         print(f"Отчет по категории: {len(category_report.get('months', []))} месяцев")
-
-        weekday_report = generate_spending_by_weekday_report(transactions)
         print(f"Отчет по дням недели: {len(weekday_report.get('days', []))} дней")
-
-        workday_report = generate_spending_by_workday_report(transactions)
         print(f"Отчет по типам дней: {len(workday_report.get('categories', []))} категорий")
 
         print("\nВсе функции успешно выполнены!")
@@ -93,5 +106,169 @@ def main() -> None:
         print(f"Произошла ошибка: {e}")
 
 
+def _print_json(data: Any) -> None:
+    """Печатает результат в формате JSON."""
+    from src.serialization import dumps
+
+    print(dumps(data, indent=True).decode("utf-8"))
+
+
+def _parse_params(pairs: List[str]) -> Dict[str, Any]:
+    """
+    Разбирает параметры отчета вида ключ=значение.
+
+    Значение читается как JSON (числа, true/false, списки), иначе как строка.
+    """
+    params: Dict[str, Any] = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep or not key:
+            raise ValueError(f"Параметр отчета должен иметь вид ключ=значение: {pair}")
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    return params
+
+
+def _command_params(args: argparse.Namespace) -> Dict[str, Any]:
+    """Собирает параметры команды из аргументов командной строки."""
+    if args.command == "events":
+        return {"period": args.period}
+    if args.command == "search":
+        return {"query": args.query, "fuzzy": args.fuzzy, "limit": args.limit}
+    if args.command == "spend":
+        return {"start": args.start, "end": args.end, "category": args.category, "card": args.card}
+    if args.command == "report":
+        return {"name": args.name, "params": _parse_params(args.param), "save": not args.no_save}
+    if args.command == "metrics":
+        return {"format": "prometheus" if args.prometheus else "json"}
+    return {}
+
+
+def _serve(args: argparse.Namespace) -> int:
+    """Запускает демон и обслуживает запросы до прерывания."""
+    from src.daemon import DaemonSource, ReportDaemon
+
+    source = DaemonSource(args.data, None if args.no_cache else args.cache_dir)
+    daemon = ReportDaemon(source, args.socket)
+    # shutdown ждет завершения serve_forever, поэтому вызывается из другого потока
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=daemon.shutdown).start())
+    try:
+        daemon.serve_forever()
+    except RuntimeError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        logger.info("Демон остановлен")
+    return 0
+
+
+def _api(args: argparse.Namespace) -> int:
+    """Запускает HTTP API до прерывания."""
+    from src.api import run_api
+    from src.daemon import DaemonSource
+
+    source = DaemonSource(args.data, None if args.no_cache else args.cache_dir)
+    try:
+        run_api(source, args.host, args.port, args.workers, args.deadline)
+    except KeyboardInterrupt:
+        logger.info("HTTP API остановлен")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Создает парсер аргументов командной строки."""
+    from src.dataset import DATASET_CACHE_DIR, DEFAULT_DATA_FILE, DEFAULT_SOCKET_PATH
+
+    parser = argparse.ArgumentParser(prog="python -m src.main", description="Анализ банковских транзакций")
+    parser.add_argument("--data", default=DEFAULT_DATA_FILE, help="Excel файл с транзакциями")
+    parser.add_argument("--cache-dir", default=DATASET_CACHE_DIR, help="Каталог кеша транзакций")
+    parser.add_argument("--no-cache", action="store_true", help="Не использовать кеш транзакций")
+    parser.add_argument("--daemon", action="store_true", help="Выполнить команду через запущенный демон")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="Unix-сокет демона")
+    subparsers = parser.add_subparsers(dest="command")
+
+    subparsers.add_parser("home", help="Главная страница")
+
+    events = subparsers.add_parser("events", help="Страница событий")
+    events.add_argument("--period", default="M", choices=["D", "W", "M"], help="Период")
+
+    search = subparsers.add_parser("search", help="Поиск транзакций")
+    search.add_argument("query", help="Поисковый запрос")
+    search.add_argument("--fuzzy", action="store_true", help="Нечеткий поиск с учетом опечаток")
+    search.add_argument("--limit", type=int, default=20, help="Максимум результатов")
+
+    spend = subparsers.add_parser("spend", help="Расходы за период с разбивкой и сравнением")
+    spend.add_argument("--start", help="Начальная дата")
+    spend.add_argument("--end", help="Конечная дата")
+    spend.add_argument("--category", help="Категория")
+    spend.add_argument("--card", help="Номер карты или его последние 4 цифры")
+
+    report = subparsers.add_parser("report", help="Отчет")
+    report.add_argument("name", help="Имя отчета: category, categories, weekday, workday")
+    report.add_argument("--param", action="append", default=[], help="Параметр отчета ключ=значение")
+    report.add_argument("--no-save", action="store_true", help="Не сохранять отчет")
+
+    subparsers.add_parser("stats", help="Статистика")
+
+    metrics = subparsers.add_parser("metrics", help="Метрики этапов обработки (полезны с --daemon)")
+    metrics.add_argument("--prometheus", action="store_true", help="В текстовом формате Prometheus")
+
+    subparsers.add_parser("serve", help="Запустить демон, держащий данные в памяти")
+
+    api = subparsers.add_parser("api", help="Запустить HTTP API страниц")
+    api.add_argument("--host", default="127.0.0.1", help="Адрес")
+    api.add_argument("--port", type=int, default=8080, help="Порт")
+    api.add_argument("--workers", type=int, default=4, help="Потоков для построения страниц")
+    api.add_argument("--deadline", type=float, default=10.0, help="Срок выполнения запроса, с")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа командной строки.
+
+    Args:
+        argv: Аргументы командной строки (None - sys.argv)
+
+    Returns:
+        Код завершения: 0 - успех, 1 - ошибка выполнения, 2 - неверная команда
+    """
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        demo()
+        return 0
+    if args.command == "serve":
+        return _serve(args)
+    if args.command == "api":
+        return _api(args)
+
+    try:
+        params = _command_params(args)
+        if args.daemon:
+            from src.daemon import request
+
+            result = request(args.command, params, args.socket)
+        else:
+            from src.commands import FileSource, run_command
+
+            source = FileSource(args.data, None if args.no_cache else args.cache_dir)
+            result = run_command(source, args.command, params)
+    except ValueError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 2
+    except Exception as e:
+        logger.error(f"Ошибка выполнения команды {args.command}: {e}")
+        print(f"Произошла ошибка: {e}", file=sys.stderr)
+        return 1
+
+    if isinstance(result, str):
+        print(result, end="")
+        return 0
+    _print_json(result)
+    return 1 if isinstance(result, dict) and "error" in result else 0
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
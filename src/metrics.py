@@ -0,0 +1,329 @@
+"""
+Модуль метрик выполнения этапов обработки.
+
+Декоратор timed и контекстный менеджер stage считают для каждого этапа
+число вызовов и ошибок, гистограмму времени выполнения, число
+обработанных строк и прочитанных байт. Строки по умолчанию берутся из
+длины первого аргумента (DataFrame, список транзакций), а внутри этапа
+их и байты можно добавить через add_rows и add_bytes - они относятся к
+самому вложенному выполняющемуся этапу.
+
+Замер стоит две метки времени и одну короткую блокировку, поэтому метрики
+включены всегда; отключить их можно переменной окружения METRICS_ENABLED=0.
+Метрики выгружаются в текстовом формате Prometheus (render_prometheus) и
+в JSON (snapshot).
+"""
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Any, Callable, Iterator, Optional, Sequence
+
+# Верхние границы корзин гистограммы времени в секундах
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_PREFIX = "bank"
+
+ROWS_FROM_INPUT = "input"
+ROWS_FROM_OUTPUT = "output"
+
+
+class StageMeasure:
+    """
+    Счетчики одного выполнения этапа.
+
+    Attributes:
+        rows: Обработано строк
+        bytes_read: Прочитано байт
+    """
+
+    __slots__ = ("rows", "bytes_read")
+
+    def __init__(self, rows: int = 0) -> None:
+        self.rows = rows
+        self.bytes_read = 0
+
+
+_current: ContextVar[Optional[StageMeasure]] = ContextVar("metrics_stage", default=None)
+
+
+class _StageStats:
+    """Накопленные метрики одного этапа."""
+
+    __slots__ = ("calls", "errors", "seconds", "max_seconds", "rows", "bytes_read", "buckets")
+
+    def __init__(self, bucket_count: int) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.bytes_read = 0
+        # Последняя корзина - значения больше всех границ (+Inf)
+        self.buckets = [0] * (bucket_count + 1)
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик этапов.
+
+    Attributes:
+        buckets: Границы корзин гистограммы времени в секундах
+        enabled: Записываются ли метрики
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS, enabled: bool = True) -> None:
+        self.buckets = tuple(buckets)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages: Dict[str, _StageStats] = {}
+
+    def observe(self, name: str, seconds: float, rows: int = 0, bytes_read: int = 0, failed: bool = False) -> None:
+        """
+        Записывает одно выполнение этапа.
+
+        Args:
+            name: Имя этапа
+            seconds: Время выполнения в секундах
+            rows: Обработано строк
+            bytes_read: Прочитано байт
+            failed: Завершился ли этап исключением
+        """
+        bucket = bisect_left(self.buckets, seconds)
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = _StageStats(len(self.buckets))
+            stats.calls += 1
+            stats.errors += failed
+            stats.seconds += seconds
+            if seconds > stats.max_seconds:
+                stats.max_seconds = seconds
+            stats.rows += rows
+            stats.bytes_read += bytes_read
+            stats.buckets[bucket] += 1
+
+    def reset(self) -> None:
+        """Удаляет все накопленные метрики."""
+        with self._lock:
+            self._stages.clear()
+
+    def _copy(self) -> Dict[str, _StageStats]:
+        """Возвращает согласованную копию метрик для выгрузки."""
+        with self._lock:
+            copies = {}
+            for name, stats in self._stages.items():
+                copy = _StageStats(0)
+                for field in _StageStats.__slots__:
+                    setattr(copy, field, getattr(stats, field))
+                copy.buckets = list(stats.buckets)
+                copies[name] = copy
+            return copies
+
+    def _quantile(self, stats: _StageStats, q: float) -> float:
+        """Оценивает квантиль времени по гистограмме (верхняя граница корзины)."""
+        target = q * stats.calls
+        cumulative = 0
+        for bound, count in zip(self.buckets, stats.buckets):
+            cumulative += count
+            if cumulative >= target:
+                return min(bound, stats.max_seconds)
+        return stats.max_seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Возвращает метрики всех этапов для выгрузки в JSON.
+
+        Returns:
+            Словарь {этап: метрики}, гистограмма - накопительная, по границам корзин
+        """
+        result = {}
+        for name, stats in sorted(self._copy().items()):
+            cumulative = 0
+            histogram = {}
+            for bound, count in zip(self.buckets + (float("inf"),), stats.buckets):
+                cumulative += count
+                histogram["+Inf" if bound == float("inf") else repr(bound)] = cumulative
+            result[name] = {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "seconds_total": stats.seconds,
+                "seconds_avg": stats.seconds / stats.calls if stats.calls else 0.0,
+                "seconds_max": stats.max_seconds,
+                "seconds_p50": self._quantile(stats, 0.5),
+                "seconds_p95": self._quantile(stats, 0.95),
+                "rows": stats.rows,
+                "bytes_read": stats.bytes_read,
+                "histogram": histogram,
+            }
+        return result
+
+    def render_prometheus(self) -> str:
+        """
+        Возвращает метрики в текстовом формате Prometheus.
+
+        Returns:
+            Текст для эндпоинта /metrics
+        """
+        stages = sorted(self._copy().items())
+        metric = f"{METRIC_PREFIX}_stage"
+        lines: List[str] = [
+            f"# HELP {metric}_calls_total Число вызовов этапа.",
+            f"# TYPE {metric}_calls_total counter",
+        ]
+        lines += [f'{metric}_calls_total{{stage="{name}"}} {stats.calls}' for name, stats in stages]
+        lines += [
+            f"# HELP {metric}_errors_total Число вызовов этапа, завершившихся исключением.",
+            f"# TYPE {metric}_errors_total counter",
+        ]
+        lines += [f'{metric}_errors_total{{stage="{name}"}} {stats.errors}' for name, stats in stages]
+        lines += [
+            f"# HELP {metric}_duration_seconds Время выполнения этапа.",
+            f"# TYPE {metric}_duration_seconds histogram",
+        ]
+        for name, stats in stages:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), stats.buckets):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_duration_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_duration_seconds_sum{{stage="{name}"}} {stats.seconds!r}')
+            lines.append(f'{metric}_duration_seconds_count{{stage="{name}"}} {stats.calls}')
+        lines += [
+            f"# HELP {metric}_rows_total Число строк, обработанных этапом.",
+            f"# TYPE {metric}_rows_total counter",
+        ]
+        lines += [f'{metric}_rows_total{{stage="{name}"}} {stats.rows}' for name, stats in stages]
+        lines += [
+            f"# HELP {metric}_bytes_read_total Число байт, прочитанных этапом.",
+            f"# TYPE {metric}_bytes_read_total counter",
+        ]
+        lines += [f'{metric}_bytes_read_total{{stage="{name}"}} {stats.bytes_read}' for name, stats in stages]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry(enabled=os.getenv("METRICS_ENABLED", "1") != "0")
+
+
+def _sized(value: Any) -> int:
+    """Возвращает число строк значения: длину коллекции, иначе 0."""
+    if isinstance(value, (str, bytes, dict)):
+        return 0
+    try:
+        return len(value)
+    except TypeError:
+        return 0
+
+
+def timed(
+    func: Optional[Callable] = None,
+    *,
+    name: Optional[str] = None,
+    rows: Optional[str] = ROWS_FROM_INPUT,
+    registry: Optional[MetricsRegistry] = None,
+) -> Callable:
+    """
+    Декоратор, записывающий метрики каждого вызова функции.
+
+    Применяется как @timed или @timed(name=..., rows=...).
+
+    Args:
+        func: Декорируемая функция
+        name: Имя этапа (по умолчанию "модуль.функция", например "utils.analyze_expenses")
+        rows: Откуда брать число строк: "input" - длина первого аргумента,
+            "output" - длина результата, None - только add_rows
+        registry: Реестр метрик (по умолчанию общий REGISTRY)
+
+    Returns:
+        Обернутая функция
+    """
+
+    def decorate(func: Callable) -> Callable:
+        stage_name = name or f"{func.__module__.rpartition('.')[2]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            target = registry or REGISTRY
+            if not target.enabled:
+                return func(*args, **kwargs)
+            first = args[0] if args else next(iter(kwargs.values()), None)
+            measure = StageMeasure(_sized(first) if rows == ROWS_FROM_INPUT else 0)
+            token = _current.set(measure)
+            failed = True
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                if rows == ROWS_FROM_OUTPUT:
+                    measure.rows += _sized(result)
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                _current.reset(token)
+                target.observe(stage_name, elapsed, measure.rows, measure.bytes_read, failed)
+
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+@contextmanager
+def stage(name: str, rows: int = 0, registry: Optional[MetricsRegistry] = None) -> Iterator[StageMeasure]:
+    """
+    Контекстный менеджер, записывающий метрики блока кода.
+
+    Args:
+        name: Имя этапа
+        rows: Начальное число обработанных строк
+        registry: Реестр метрик (по умолчанию общий REGISTRY)
+
+    Returns:
+        Счетчики выполнения, в которые блок может добавить rows и bytes_read
+    """
+    target = registry or REGISTRY
+    measure = StageMeasure(rows)
+    if not target.enabled:
+        yield measure
+        return
+    token = _current.set(measure)
+    failed = True
+    start = time.perf_counter()
+    try:
+        yield measure
+        failed = False
+    finally:
+        elapsed = time.perf_counter() - start
+        _current.reset(token)
+        target.observe(name, elapsed, measure.rows, measure.bytes_read, failed)
+
+
+def add_rows(count: int) -> None:
+    """Добавляет обработанные строки к выполняющемуся этапу."""
+    measure = _current.get()
+    if measure is not None:
+        measure.rows += count
+
+
+def add_bytes(count: int) -> None:
+    """Добавляет прочитанные байты к выполняющемуся этапу."""
+    measure = _current.get()
+    if measure is not None:
+        measure.bytes_read += count
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Возвращает метрики общего реестра для выгрузки в JSON."""
+    return REGISTRY.snapshot()
+
+
+def render_prometheus() -> str:
+    """Возвращает метрики общего реестра в текстовом формате Prometheus."""
+    return REGISTRY.render_prometheus()
+
+
+def reset_metrics() -> None:
+    """Удаляет метрики общего реестра."""
+    REGISTRY.reset()
@@ -0,0 +1,161 @@
+"""
+Модуль форматов сохранения отчетов.
+
+Поддерживаемые форматы:
+    json - JSON с отступами (формат по умолчанию)
+    json-compact - компактный JSON, через orjson, если он установлен
+    ndjson.gz - NDJSON со сжатием gzip
+    ndjson.zst - NDJSON со сжатием zstd (нужен пакет zstandard)
+    parquet - таблица строк отчета (нужен pyarrow или fastparquet)
+
+Отчет пишется по частям, без построения всего JSON одной строкой, во
+временный файл рядом с целевым, который затем атомарно переименовывается.
+"""
+import gzip
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import List, Dict, Any, Callable, IO, Iterator, Tuple
+
+import pandas as pd
+
+from src.serialization import dumps, json_default, write_json
+
+
+def report_records(report: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Разворачивает отчет в поток записей для построчных форматов.
+
+    Первая запись содержит поля отчета, не являющиеся списками словарей
+    (section="meta"), далее идут строки списков с именем списка в section.
+
+    Args:
+        report: Данные отчета
+
+    Returns:
+        Итератор записей
+    """
+    meta = {"section": "meta"}
+    sections = []
+    for key, value in report.items():
+        if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+            sections.append((key, value))
+        else:
+            meta[key] = value
+    yield meta
+    for key, rows in sections:
+        for row in rows:
+            yield {"section": key, **row}
+
+
+def _read_umask() -> int:
+    """Возвращает маску прав процесса (os.umask умеет только заменять ее)."""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# Читается один раз при импорте: смена маски на время чтения небезопасна в потоках
+_UMASK = _read_umask()
+
+
+@contextmanager
+def atomic_write(path: str) -> Iterator[IO[bytes]]:
+    """
+    Открывает временный файл, который по завершении заменяет path.
+
+    При ошибке записи временный файл удаляется, а path не меняется.
+    mkstemp создает файл с правами 0600, поэтому перед заменой ему
+    выставляются обычные права нового файла (0666 с учетом umask).
+
+    Args:
+        path: Путь к итоговому файлу
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_json(report: Dict[str, Any], f: IO[bytes]) -> None:
+    """Пишет JSON с отступами."""
+    for chunk in json.JSONEncoder(ensure_ascii=False, indent=2, default=json_default).iterencode(report):
+        f.write(chunk.encode("utf-8"))
+
+
+def _write_compact_json(report: Dict[str, Any], f: IO[bytes]) -> None:
+    """Пишет компактный JSON."""
+    write_json(report, f)
+
+
+def _write_ndjson(report: Dict[str, Any], f: IO[bytes]) -> None:
+    """Пишет записи отчета по одной на строку."""
+    for record in report_records(report):
+        f.write(dumps(record) + b"\n")
+
+
+def _write_ndjson_gzip(report: Dict[str, Any], f: IO[bytes]) -> None:
+    """Пишет NDJSON со сжатием gzip."""
+    with gzip.GzipFile(fileobj=f, mode="wb") as stream:
+        _write_ndjson(report, stream)
+
+
+def _write_ndjson_zstd(report: Dict[str, Any], f: IO[bytes]) -> None:
+    """Пишет NDJSON со сжатием zstd."""
+    import zstandard
+
+    with zstandard.ZstdCompressor().stream_writer(f, closefd=False) as stream:
+        _write_ndjson(report, stream)
+
+
+def _write_parquet(report: Dict[str, Any], f: IO[bytes]) -> None:
+    """Пишет строки отчета таблицей Parquet."""
+    rows: List[Dict[str, Any]] = [
+        record for record in report_records(report) if record["section"] != "meta"
+    ]
+    if not rows:
+        raise ValueError("Отчет не содержит табличных данных для Parquet")
+    pd.DataFrame(rows).to_parquet(f, index=False)
+
+
+# Формат -> (функция записи, расширение файла)
+REPORT_FORMATS: Dict[str, Tuple[Callable[[Dict[str, Any], IO[bytes]], None], str]] = {
+    "json": (_write_json, ".json"),
+    "json-compact": (_write_compact_json, ".json"),
+    "ndjson.gz": (_write_ndjson_gzip, ".ndjson.gz"),
+    "ndjson.zst": (_write_ndjson_zstd, ".ndjson.zst"),
+    "parquet": (_write_parquet, ".parquet"),
+}
+
+
+def report_extension(fmt: str) -> str:
+    """Возвращает расширение файла для формата отчета."""
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат отчета: {fmt}")
+    return REPORT_FORMATS[fmt][1]
+
+
+def write_report(report: Dict[str, Any], path: str, fmt: str = "json") -> None:
+    """
+    Атомарно записывает отчет в файл в указанном формате.
+
+    Args:
+        report: Данные отчета
+        path: Путь к файлу
+        fmt: Формат из REPORT_FORMATS
+    """
+    report_extension(fmt)
+    writer = REPORT_FORMATS[fmt][0]
+    with atomic_write(path) as f:
+        writer(report, f)
@@ -0,0 +1,212 @@
+"""
+Модуль хранилища отчетов в SQLite.
+
+Отчеты только добавляются в таблицу reports с индексами по типу отчета,
+параметрам и времени генерации. Последний отчет и история выбираются по
+индексу, а устаревшие отчеты удаляются политикой хранения с последующим
+сжатием файла базы.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
+
+from src.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+REPORT_STORE_PATH = os.path.join("data", "reports.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    report_type TEXT NOT NULL,
+    params TEXT NOT NULL,
+    generated_at TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reports_lookup ON reports (report_type, params, generated_at);
+CREATE INDEX IF NOT EXISTS idx_reports_time ON reports (generated_at);
+"""
+
+
+def canonical_params(params: Optional[Dict[str, Any]]) -> str:
+    """Возвращает параметры отчета в каноническом JSON для индекса."""
+    return json.dumps(params or {}, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class ReportStore:
+    """
+    Хранилище отчетов с добавлением записей в конец.
+
+    Attributes:
+        path: Путь к файлу базы SQLite
+    """
+
+    def __init__(self, path: str = REPORT_STORE_PATH) -> None:
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def append(
+        self, report_type: str, report: Dict[str, Any], params: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Добавляет отчет в хранилище.
+
+        Args:
+            report_type: Тип отчета
+            report: Данные отчета
+            params: Параметры, с которыми построен отчет
+
+        Returns:
+            Идентификатор записи
+        """
+        generated_at = report.get("generated_at") or datetime.now().isoformat()
+        body = dumps(report).decode("utf-8")
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO reports (report_type, params, generated_at, body) VALUES (?, ?, ?, ?)",
+                (report_type, canonical_params(params), generated_at, body),
+            )
+        logger.info(f"Отчет '{report_type}' добавлен в хранилище {self.path}")
+        return int(cursor.lastrowid)
+
+    def _select(
+        self,
+        report_type: str,
+        params: Optional[Dict[str, Any]],
+        start: Optional[str],
+        end: Optional[str],
+        order: str,
+        limit: Optional[int],
+    ) -> List[Dict[str, Any]]:
+        """Выбирает отчеты по индексу типа, параметров и времени."""
+        query = "SELECT body FROM reports WHERE report_type = ?"
+        args: List[Any] = [report_type]
+        if params is not None:
+            query += " AND params = ?"
+            args.append(canonical_params(params))
+        if start is not None:
+            query += " AND generated_at >= ?"
+            args.append(start)
+        if end is not None:
+            query += " AND generated_at < ?"
+            args.append(end)
+        query += f" ORDER BY generated_at {order}, id {order}"
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return [json.loads(body) for (body,) in rows]
+
+    def latest(
+        self, report_type: str, params: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает последний отчет указанного типа.
+
+        Args:
+            report_type: Тип отчета
+            params: Параметры отчета (None - любые)
+
+        Returns:
+            Данные отчета или None
+        """
+        rows = self._select(report_type, params, None, None, "DESC", 1)
+        return rows[0] if rows else None
+
+    def history(
+        self,
+        report_type: str,
+        params: Optional[Dict[str, Any]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Возвращает отчеты за период в порядке генерации.
+
+        Args:
+            report_type: Тип отчета
+            params: Параметры отчета (None - любые)
+            start: Начало периода в ISO-формате (включительно)
+            end: Конец периода в ISO-формате (не включительно)
+            limit: Максимальное количество отчетов
+
+        Returns:
+            Список отчетов
+        """
+        return self._select(report_type, params, start, end, "ASC", limit)
+
+    def apply_retention(
+        self, max_age_days: Optional[int] = None, keep_last: Optional[int] = None
+    ) -> int:
+        """
+        Удаляет устаревшие отчеты и сжимает базу.
+
+        Args:
+            max_age_days: Удалять отчеты старше указанного числа дней
+            keep_last: Оставлять не более N последних отчетов каждого типа и параметров
+
+        Returns:
+            Количество удаленных отчетов
+        """
+        deleted = 0
+        with self._lock:
+            with self._conn:
+                if max_age_days is not None:
+                    cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+                    deleted += self._conn.execute(
+                        "DELETE FROM reports WHERE generated_at < ?", (cutoff,)
+                    ).rowcount
+                if keep_last is not None:
+                    deleted += self._conn.execute(
+                        """
+                        DELETE FROM reports WHERE id IN (
+                            SELECT id FROM (
+                                SELECT id, ROW_NUMBER() OVER (
+                                    PARTITION BY report_type, params
+                                    ORDER BY generated_at DESC, id DESC
+                                ) AS position
+                                FROM reports
+                            ) WHERE position > ?
+                        )
+                        """,
+                        (keep_last,),
+                    ).rowcount
+            if deleted:
+                self._conn.execute("VACUUM")
+        logger.info(f"Удалено отчетов из хранилища: {deleted}")
+        return deleted
+
+    def count(self, report_type: Optional[str] = None) -> int:
+        """Возвращает количество отчетов (всех или указанного типа)."""
+        with self._lock:
+            if report_type is None:
+                row = self._conn.execute("SELECT COUNT(*) FROM reports").fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT COUNT(*) FROM reports WHERE report_type = ?", (report_type,)
+                ).fetchone()
+        return int(row[0])
+
+    def close(self) -> None:
+        """Закрывает соединение с базой."""
+        self._conn.close()
+
+
+@lru_cache(maxsize=None)
+def get_report_store(path: str = REPORT_STORE_PATH) -> ReportStore:
+    """Возвращает хранилище для пути, открывая его один раз."""
+    return ReportStore(path)
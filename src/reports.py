@@ -1,49 +1,653 @@
 ﻿"""
 Модуль для генерации отчетов.
+
+Каждый отчет строится функцией _build_*_report по кубу агрегатов.
+Публичные generate_* готовят куб и сохраняют один отчет, а
+run_report_batch строит куб один раз на весь набор отчетов.
+
+Готовые отчеты кешируются в памяти по отпечатку данных, имени отчета и
+параметрам: при повторном запросе отчет не пересчитывается и не
+записывается повторно. Если задана переменная окружения REPORT_STORE,
+отчеты добавляются в хранилище SQLite по этому пути вместо файлов.
+Куб агрегатов хранится в памяти, а на диске - только в каталоге из
+переменной окружения CUBE_CACHE, если она задана.
 """
+import copy
+import hashlib
+import inspect
 import logging
+import os
 import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from src.cube import SpendingCube, get_cube, dataset_fingerprint, CUBE_CACHE_DIR, WORKDAY, WEEKEND
+from src.chunks import DEFAULT_MEMORY_BUDGET_MB, build_cube_from_chunks, iter_cached_chunks
+from src.metrics import timed
+from src.report_store import canonical_params, get_report_store
 from src.utils import save_report
 
 logger = logging.getLogger(__name__)
 
+REPORT_CACHE_LIMIT = 64
 
-def generate_spending_by_category_report(
-    transactions: List[Dict[str, Any]], category: str
+ReportKey = Tuple[str, str, str]
+
+_report_cache: "OrderedDict[ReportKey, Dict[str, Any]]" = OrderedDict()
+
+
+def _money(value: Any) -> float:
+    """Округляет сумму до копеек, чтобы результат не зависел от порядка сложения."""
+    return round(float(value), 2)
+
+
+def _category_months(
+    cube: SpendingCube, categories: Optional[List[str]] = None
+) -> Dict[Any, Dict[str, Any]]:
+    """
+    Строит помесячную разбивку для категорий одной сверткой куба.
+
+    Args:
+        cube: Куб агрегатов
+        categories: Категории (None - все категории)
+
+    Returns:
+        Словарь категория -> {"months": [...], "total": сумма}
+    """
+    table = cube.rollup(["category", "month"]).sort_values(["month"], kind="stable")
+    if categories is not None:
+        table = table[table["category"].isin(categories)]
+
+    result: Dict[Any, Dict[str, Any]] = {}
+    for category, month, month_total, count in zip(
+        table["category"], table["month"], table["amount"], table["count"]
+    ):
+        entry = result.setdefault(category, {"months": [], "total": 0.0})
+        entry["months"].append({
+            "month": str(month),
+            "amount": _money(month_total),
+            "count": int(count)
+        })
+        entry["total"] += float(month_total)
+    for entry in result.values():
+        entry["total"] = _money(entry["total"])
+    return result
+
+
+def _build_categories_report(
+    cube: Optional[SpendingCube], categories: Optional[List[str]] = None
 ) -> Dict[str, Any]:
-    """Генерирует отчет по категории."""
+    """Строит помесячный отчет по всем категориям (cube=None - нет данных)."""
+    if cube is None:
+        return {"categories": [], "total": 0}
+
+    breakdown = _category_months(cube, categories)
+    names = categories if categories is not None else sorted(breakdown, key=str)
+
+    categories_data = []
+    total = 0.0
+    for category in names:
+        entry = breakdown.get(category, {"months": [], "total": 0.0})
+        categories_data.append({"category": category, **entry})
+        total += entry["total"]
+
+    return {
+        "categories": categories_data,
+        "total": _money(total),
+        "generated_at": datetime.now().isoformat()
+    }
+
+
+def _build_category_report(cube: Optional[SpendingCube], category: str) -> Dict[str, Any]:
+    """Строит отчет по одной категории (cube=None - нет данных)."""
+    if cube is None:
+        return {"category": category, "months": [], "total": 0}
+
+    entry = _category_months(cube, [category]).get(category, {"months": [], "total": 0.0})
+    return {
+        "category": category,
+        "months": entry["months"],
+        "total": _money(entry["total"]),
+        "generated_at": datetime.now().isoformat()
+    }
+
+
+WEEKDAYS_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday",
+                  "Friday", "Saturday", "Sunday"]
+
+
+def _weekday_matrix(
+    cube: SpendingCube, column: str, labels: List[Any], labels_key: str
+) -> Dict[str, Any]:
+    """Сворачивает куб в матрицу день недели × column."""
+    cells = cube.rollup(["weekday", column])
+    amounts = cells.pivot_table(index="weekday", columns=column, values="amount", aggfunc="sum")
+    counts = cells.pivot_table(index="weekday", columns=column, values="count", aggfunc="sum")
+    amounts = amounts.reindex(index=range(7), columns=labels).fillna(0)
+    counts = counts.reindex(index=range(7), columns=labels).fillna(0)
+    return {
+        "days": WEEKDAYS_ORDER,
+        labels_key: labels,
+        "amounts": amounts.to_numpy(dtype=float).round(2).tolist(),
+        "counts": counts.to_numpy(dtype=int).tolist(),
+    }
+
+
+def _build_weekday_report(
+    cube: Optional[SpendingCube],
+    include_hours: bool = False,
+    include_categories: bool = False,
+) -> Dict[str, Any]:
+    """Строит отчет по дням недели (cube=None - нет данных)."""
+    if cube is None:
+        return {"days": [], "total": 0}
+
+    weekdays = cube.rollup(["weekday"]).set_index("weekday")
+
+    daily_data = []
+    total = 0
+
+    for code, day in enumerate(WEEKDAYS_ORDER):
+        day_total = weekdays["amount"].get(code, 0)
+        daily_data.append({
+            "day": day,
+            "amount": _money(day_total),
+            "count": int(weekdays["count"].get(code, 0))
+        })
+        total += day_total
+
+    report = {
+        "days": daily_data,
+        "total": _money(total),
+        "generated_at": datetime.now().isoformat()
+    }
+
+    if include_hours:
+        report["hours"] = _weekday_matrix(cube, "hour", list(range(24)), "hours")
+    if include_categories:
+        categories = sorted(cube.rollup(["category"])["category"].astype(str))
+        report["categories"] = _weekday_matrix(cube, "category", categories, "categories")
+    return report
+
+
+def _build_workday_report(cube: Optional[SpendingCube]) -> Dict[str, Any]:
+    """Строит отчет по рабочим/выходным дням (cube=None - нет данных)."""
+    if cube is None:
+        return {"categories": [], "total": 0}
+
+    day_types = cube.rollup(["day_type"]).set_index("day_type")
+
+    categories_data = []
+    total = 0
+
+    for day_type in [WORKDAY, WEEKEND]:
+        type_total = day_types["amount"].get(day_type, 0)
+        categories_data.append({
+            "category": day_type,
+            "amount": _money(type_total),
+            "count": int(day_types["count"].get(day_type, 0))
+        })
+        total += type_total
+
+    return {
+        "categories": categories_data,
+        "total": _money(total),
+        "generated_at": datetime.now().isoformat()
+    }
+
+
+# Имя отчета -> (функция построения по кубу, префикс файла)
+REPORTS: Dict[str, Tuple[Callable[..., Dict[str, Any]], str]] = {
+    "category": (_build_category_report, "report_spending_by_category"),
+    "categories": (_build_categories_report, "report_spending_by_categories"),
+    "weekday": (_build_weekday_report, "report_spending_by_weekday"),
+    "workday": (_build_workday_report, "report_spending_by_workday"),
+}
+
+# Стандартный ежемесячный набор отчетов
+MONTHLY_REPORT_PACK: List[Dict[str, Any]] = [
+    {"name": "category", "params": {"category": "Супермаркеты"}},
+    {"name": "weekday"},
+    {"name": "workday"},
+]
+
+
+def _report_arguments(name: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Дополняет параметры отчета значениями по умолчанию.
+
+    Явные и пропущенные значения по умолчанию дают одни и те же
+    параметры для кеша и хранилища. Для неверных параметров возвращает None.
+    """
+    try:
+        bound = inspect.signature(REPORTS[name][0]).bind(None, **params)
+    except TypeError:
+        return None
+    bound.apply_defaults()
+    return dict(list(bound.arguments.items())[1:])
+
+
+def _report_key(fingerprint: Optional[str], name: str, params: Dict[str, Any]) -> Optional[ReportKey]:
+    """Возвращает ключ кеша отчетов (None, если отпечаток не вычислен)."""
+    arguments = _report_arguments(name, params)
+    if fingerprint is None or arguments is None:
+        # Неверные параметры не кешируются, ошибку вернет построение
+        return None
+    return fingerprint, name, canonical_params(arguments)
+
+
+def _persist_report(name: str, params: Dict[str, Any], report: Dict[str, Any]) -> None:
+    """Сохраняет отчет в хранилище REPORT_STORE, если оно задано, иначе в файл."""
+    store_path = os.getenv("REPORT_STORE")
+    if store_path:
+        get_report_store(store_path).append(name, report, _report_arguments(name, params))
+    else:
+        save_report(report, REPORTS[name][1])
+
+
+def _cached_report(key: Optional[ReportKey]) -> Optional[Dict[str, Any]]:
+    """Возвращает копию отчета из кеша или None."""
+    if key is None or key not in _report_cache:
+        return None
+    _report_cache.move_to_end(key)
+    return copy.deepcopy(_report_cache[key])
+
+
+def _store_report(key: Optional[ReportKey], report: Dict[str, Any]) -> None:
+    """Сохраняет копию отчета в кеш, вытесняя самые старые записи."""
+    if key is None:
+        return
+    _report_cache[key] = copy.deepcopy(report)
+    while len(_report_cache) > REPORT_CACHE_LIMIT:
+        _report_cache.popitem(last=False)
+
+
+@timed
+def invalidate_report_cache(name: Optional[str] = None, fingerprint: Optional[str] = None) -> int:
+    """
+    Удаляет отчеты из кеша.
+
+    Args:
+        name: Имя отчета (None - все отчеты)
+        fingerprint: Отпечаток данных (None - любые данные)
+
+    Returns:
+        Количество удаленных записей
+    """
+    keys = [
+        key for key in _report_cache
+        if (name is None or key[1] == name) and (fingerprint is None or key[0] == fingerprint)
+    ]
+    for key in keys:
+        del _report_cache[key]
+    logger.info(f"Удалено отчетов из кеша: {len(keys)}")
+    return len(keys)
+
+
+def _build_report(cube: Optional[SpendingCube], spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Строит отчет по описанию {"name": ..., "params": {...}}."""
+    builder, _ = REPORTS[spec["name"]]
+    return builder(cube, **spec.get("params", {}))
+
+
+def _generate_report(
+    transactions: List[Dict[str, Any]], name: str, params: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Строит и сохраняет один отчет, используя кеш отчетов."""
+    df = pd.DataFrame(transactions)
+    if df.empty:
+        return _build_report(None, {"name": name, "params": params})
+
+    fingerprint = dataset_fingerprint(df)
+    key = _report_key(fingerprint, name, params)
+    report = _cached_report(key)
+    if report is not None:
+        logger.info(f"Отчет '{name}' взят из кеша")
+        return report
+
+    cube = get_cube(df, os.getenv("CUBE_CACHE"), fingerprint)
+    report = _build_report(cube, {"name": name, "params": params})
+    _persist_report(name, params, report)
+    _store_report(key, report)
+    return report
+
+
+@timed
+def run_report_batch(
+    transactions: List[Dict[str, Any]],
+    specs: List[Dict[str, Any]],
+    workers: int = 1,
+    min_rows_for_pool: int = 100_000,
+    save: bool = True,
+    frame: Optional[pd.DataFrame] = None,
+    fingerprint: Optional[str] = None,
+    cube: Optional[SpendingCube] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Строит набор отчетов по одному кубу агрегатов.
+
+    DataFrame и куб строятся один раз на весь набор, куб не строится,
+    если все отчеты найдены в кеше. Файлы записываются только для
+    пересчитанных отчетов и после того, как построены все отчеты.
+
+    Args:
+        transactions: Список транзакций
+        specs: Описания отчетов вида {"name": "weekday", "params": {...}}
+        workers: Количество процессов для построения отчетов
+        min_rows_for_pool: Минимальное число транзакций для пула процессов
+        save: Сохранять ли отчеты в файлы
+        frame: Уже построенный DataFrame транзакций (None - построить)
+        fingerprint: Уже вычисленный отпечаток данных (None - вычислить)
+        cube: Уже построенный куб по transactions, например из
+            IncrementalReportState (None - взять из get_cube)
+
+    Returns:
+        Список отчетов в порядке specs
+    """
+    for spec in specs:
+        if spec.get("name") not in REPORTS:
+            raise ValueError(f"Неизвестный отчет: {spec.get('name')}")
+
+    try:
+        df = frame if frame is not None else pd.DataFrame(transactions)
+        if fingerprint is None and not df.empty:
+            fingerprint = dataset_fingerprint(df)
+    except Exception as e:
+        logger.error(f"Ошибка подготовки данных для отчетов: {e}")
+        return [{"error": str(e)} for _ in specs]
+
+    keys = [_report_key(fingerprint, spec["name"], spec.get("params", {})) for spec in specs]
+    outcomes: List[Any] = [_cached_report(key) for key in keys]
+    pending = [i for i, outcome in enumerate(outcomes) if outcome is None]
+
+    if pending and not df.empty and cube is None:
+        try:
+            cube = get_cube(df, os.getenv("CUBE_CACHE"), fingerprint)
+        except Exception as e:
+            logger.error(f"Ошибка подготовки данных для отчетов: {e}")
+            return [{"error": str(e)} for _ in specs]
+
+    if workers > 1 and len(pending) > 1 and len(transactions) >= min_rows_for_pool:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            futures = {i: executor.submit(_build_report, cube, specs[i]) for i in pending}
+            for i, future in futures.items():
+                try:
+                    outcomes[i] = future.result()
+                except Exception as e:
+                    outcomes[i] = e
+    else:
+        for i in pending:
+            try:
+                outcomes[i] = _build_report(cube, specs[i])
+            except Exception as e:
+                outcomes[i] = e
+
+    reports = []
+    for spec, outcome in zip(specs, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Ошибка генерации отчета '{spec['name']}': {outcome}")
+            reports.append({"error": str(outcome)})
+        else:
+            reports.append(outcome)
+
+    # В кеш попадают только записанные отчеты: попадание в кеш пропускает запись
+    if save and cube is not None:
+        for i in pending:
+            if "error" not in reports[i]:
+                _persist_report(specs[i]["name"], specs[i].get("params", {}), reports[i])
+                _store_report(keys[i], reports[i])
+
+    logger.info(f"Сгенерировано отчетов: {len(reports)}")
+    return reports
+
+
+@timed
+def run_report_batch_from_file(
+    file_path: str,
+    specs: List[Dict[str, Any]],
+    memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+    cache_dir: Optional[str] = CUBE_CACHE_DIR,
+    save: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Строит набор отчетов по файлу, читая историю частями.
+
+    История не загружается в память целиком: части из колоночного кеша
+    сворачиваются в частичные кубы, которые объединяются в один. Отчеты
+    совпадают с отчетами run_report_batch по тем же транзакциям.
+
+    Args:
+        file_path: Путь к Excel файлу
+        specs: Описания отчетов вида {"name": "weekday", "params": {...}}
+        memory_budget_mb: Бюджет памяти на одну часть в мегабайтах
+        cache_dir: Каталог колоночного кеша (None - читать Excel без кеша)
+        save: Сохранять ли отчеты
+
+    Returns:
+        Список отчетов в порядке specs
+    """
+    for spec in specs:
+        if spec.get("name") not in REPORTS:
+            raise ValueError(f"Неизвестный отчет: {spec.get('name')}")
+
     try:
+        cube = build_cube_from_chunks(iter_cached_chunks(file_path, memory_budget_mb, cache_dir))
+    except Exception as e:
+        logger.error(f"Ошибка чтения истории из {file_path}: {e}")
+        return [{"error": str(e)} for _ in specs]
+
+    reports = []
+    for spec in specs:
+        try:
+            report = _build_report(cube, spec)
+        except Exception as e:
+            logger.error(f"Ошибка генерации отчета '{spec['name']}': {e}")
+            report = {"error": str(e)}
+        reports.append(report)
+
+    if save and cube is not None:
+        for spec, report in zip(specs, reports):
+            if "error" not in report:
+                _persist_report(spec["name"], spec.get("params", {}), report)
+
+    logger.info(f"Сгенерировано отчетов по файлу {file_path}: {len(reports)}")
+    return reports
+
+
+# Файл состояния хранится в каталоге кеша данных источника (см. report_state_path)
+REPORT_STATE_FILE = "report_state.pkl"
+
+# Сколько последних учтенных транзакций сверяется перед применением дельты
+STATE_TAIL_SIZE = 8
+
+
+def report_state_path(cache_dir: Optional[str]) -> Optional[str]:
+    """
+    Возвращает путь к файлу инкрементального состояния отчетов.
+
+    Args:
+        cache_dir: Каталог кеша данных (None - состояние не сохраняется)
+
+    Returns:
+        Путь к файлу состояния или None
+    """
+    return os.path.join(cache_dir, REPORT_STATE_FILE) if cache_dir else None
+
+
+def _rows_digest(rows: List[Dict[str, Any]]) -> str:
+    """Вычисляет отпечаток транзакций независимо от типов столбцов DataFrame."""
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(repr(sorted(row.items(), key=lambda item: str(item[0]))).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class IncrementalReportState:
+    """
+    Инкрементальное состояние отчетов.
+
+    Хранит куб агрегатов по уже учтенным транзакциям. Новые транзакции
+    сворачиваются в куб дельты и добавляются к нему, поэтому обновление
+    стоит пропорционально объему новых данных. Если история изменилась
+    не только дописыванием, состояние перестраивается полностью.
+
+    Attributes:
+        path: Файл, в котором сохраняется состояние (None - не сохранять)
+        cube: Куб агрегатов по учтенным транзакциям
+        row_count: Количество учтенных транзакций
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self.cube: Optional[SpendingCube] = None
+        self.row_count = 0
+        self._tail_digest = _rows_digest([])
+        if path and os.path.exists(path):
+            try:
+                state = pd.read_pickle(path)
+                self.cube = SpendingCube(state["cells"], state["columns"], state["amount_column"])
+                self.row_count = state["row_count"]
+                self._tail_digest = state["tail_digest"]
+                logger.info(f"Состояние отчетов загружено из {path}: {self.row_count} транзакций")
+            except Exception as e:
+                logger.warning(f"Не удалось загрузить состояние отчетов из {path}: {e}")
+
+    def save(self) -> None:
+        """Атомарно сохраняет состояние в файл."""
+        if not self.path or self.cube is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        pd.to_pickle({
+            "cells": self.cube.cells,
+            "columns": self.cube.columns,
+            "amount_column": self.cube.amount_column,
+            "row_count": self.row_count,
+            "tail_digest": self._tail_digest,
+        }, tmp_path)
+        os.replace(tmp_path, self.path)
+
+    def _set_tail(self, transactions: List[Dict[str, Any]]) -> None:
+        """Запоминает отпечаток последних учтенных транзакций."""
+        self._tail_digest = _rows_digest(transactions[max(0, self.row_count - STATE_TAIL_SIZE):self.row_count])
+
+    def rebuild(self, transactions: List[Dict[str, Any]]) -> None:
+        """Полностью перестраивает состояние по всей истории."""
         df = pd.DataFrame(transactions)
-        if df.empty:
-            return {"category": category, "months": [], "total": 0}
-        
-        df["Дата операции"] = pd.to_datetime(df["Дата операции"], errors="coerce")
-        df["month"] = df["Дата операции"].dt.to_period("M")
-        
-        category_df = df[df["Категория"] == category]
-        
-        monthly_data = []
-        total = 0
-        
-        for month, group in category_df.groupby("month"):
-            month_total = group["Сумма операции"].sum()
-            monthly_data.append({
-                "month": str(month),
-                "amount": float(month_total),
-                "count": len(group)
-            })
-            total += month_total
+        self.cube = SpendingCube.from_dataframe(df) if not df.empty else None
+        self.row_count = len(transactions)
+        self._set_tail(transactions)
+        self.save()
+        logger.info(f"Состояние отчетов перестроено: {self.row_count} транзакций")
+
+    def apply(self, new_transactions: List[Dict[str, Any]], history: List[Dict[str, Any]]) -> None:
+        """
+        Добавляет в состояние только новые транзакции.
+
+        Args:
+            new_transactions: Новые транзакции
+            history: Вся история, включая новые транзакции (для отпечатка хвоста)
+        """
+        if new_transactions:
+            delta = SpendingCube.from_dataframe(pd.DataFrame(new_transactions))
+            self.cube = delta if self.cube is None else self.cube.merge(delta)
+        self.row_count += len(new_transactions)
+        self._set_tail(history)
+        self.save()
+        logger.info(f"В состояние отчетов добавлено {len(new_transactions)} транзакций")
+
+    def refresh(self, transactions: List[Dict[str, Any]]) -> int:
+        """
+        Приводит состояние к истории transactions.
+
+        Если история получена дописыванием к уже учтенной, применяется
+        только дельта, иначе состояние перестраивается полностью.
+
+        Args:
+            transactions: Вся история транзакций
+
+        Returns:
+            Количество обработанных транзакций
+        """
+        known = transactions[max(0, self.row_count - STATE_TAIL_SIZE):self.row_count]
+        appended = len(transactions) >= self.row_count and _rows_digest(known) == self._tail_digest
+        if not appended:
+            self.rebuild(transactions)
+            return len(transactions)
+
+        new_transactions = transactions[self.row_count:]
+        try:
+            self.apply(new_transactions, transactions)
+        except ValueError as e:
+            logger.warning(f"Дельта не применена, полная перестройка: {e}")
+            self.rebuild(transactions)
+            return len(transactions)
+        return len(new_transactions)
+
+    def verify(self, transactions: List[Dict[str, Any]]) -> bool:
+        """
+        Сверяет состояние с полной перестройкой и исправляет расхождения.
+
+        Args:
+            transactions: Вся история транзакций
+
+        Returns:
+            True, если состояние совпало с полной перестройкой
+        """
+        df = pd.DataFrame(transactions)
+        rebuilt = SpendingCube.from_dataframe(df) if not df.empty else None
+        matches = (
+            self.row_count == len(transactions)
+            and (rebuilt is None) == (self.cube is None)
+            and (rebuilt is None or rebuilt.equals(self.cube))
+        )
+        if not matches:
+            logger.warning("Состояние отчетов расходится с полной перестройкой, заменяется")
+            self.cube = rebuilt
+            self.row_count = len(transactions)
+            self._set_tail(transactions)
+            self.save()
+        return matches
+
+    def report(self, name: str, **params: Any) -> Dict[str, Any]:
+        """Строит отчет по текущему состоянию без сохранения."""
+        if name not in REPORTS:
+            raise ValueError(f"Неизвестный отчет: {name}")
+        return _build_report(self.cube, {"name": name, "params": params})
+
+
+@timed
+def generate_spending_by_categories_report(
+    transactions: List[Dict[str, Any]], categories: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Генерирует помесячный отчет сразу по всем категориям.
+    
+    Args:
+        transactions: Список транзакций
+        categories: Категории для отчета (None - все категории)
         
-        report = {
-            "category": category,
-            "months": monthly_data,
-            "total": float(total),
-            "generated_at": datetime.now().isoformat()
-        }
+    Returns:
+        Отчет с помесячной разбивкой по каждой категории
+    """
+    try:
+        report = _generate_report(transactions, "categories", {"categories": categories})
+        logger.info(f"Сгенерирован отчет по {len(report['categories'])} категориям")
+        return report
         
-        save_report(report, "report_spending_by_category")
+    except Exception as e:
+        logger.error(f"Ошибка генерации отчета по категориям: {e}")
+        return {"error": str(e)}
+
+
+@timed
+def generate_spending_by_category_report(
+    transactions: List[Dict[str, Any]], category: str
+) -> Dict[str, Any]:
+    """Генерирует отчет по категории."""
+    try:
+        report = _generate_report(transactions, "category", {"category": category})
         logger.info(f"Сгенерирован отчет по категории '{category}'")
         return report
         
@@ -52,41 +656,30 @@ def generate_spending_by_category_report(
         return {"category": category, "error": str(e)}
 
 
+@timed
 def generate_spending_by_weekday_report(
-    transactions: List[Dict[str, Any]]
+    transactions: List[Dict[str, Any]],
+    include_hours: bool = False,
+    include_categories: bool = False,
 ) -> Dict[str, Any]:
-    """Генерирует отчет по дням недели."""
-    try:
-        df = pd.DataFrame(transactions)
-        if df.empty:
-            return {"days": [], "total": 0}
-        
-        df["Дата операции"] = pd.to_datetime(df["Дата операции"], errors="coerce")
-        df["weekday"] = df["Дата операции"].dt.day_name()
-        
-        weekdays_order = ["Monday", "Tuesday", "Wednesday", "Thursday", 
-                         "Friday", "Saturday", "Sunday"]
-        
-        daily_data = []
-        total = 0
-        
-        for day in weekdays_order:
-            day_df = df[df["weekday"] == day]
-            day_total = day_df["Сумма операции"].sum()
-            daily_data.append({
-                "day": day,
-                "amount": float(day_total),
-                "count": len(day_df)
-            })
-            total += day_total
-        
-        report = {
-            "days": daily_data,
-            "total": float(total),
-            "generated_at": datetime.now().isoformat()
-        }
+    """
+    Генерирует отчет по дням недели.
+    
+    Все разрезы сворачиваются из одного куба агрегатов.
+    
+    Args:
+        transactions: Список транзакций
+        include_hours: Добавить тепловую карту день недели × час
+        include_categories: Добавить матрицу день недели × категория
         
-        save_report(report, "report_spending_by_weekday")
+    Returns:
+        Отчет по дням недели
+    """
+    try:
+        report = _generate_report(
+            transactions, "weekday",
+            {"include_hours": include_hours, "include_categories": include_categories}
+        )
         logger.info("Сгенерирован отчет по дням недели")
         return report
         
@@ -95,41 +688,13 @@ def generate_spending_by_weekday_report(
         return {"error": str(e)}
 
 
+@timed
 def generate_spending_by_workday_report(
     transactions: List[Dict[str, Any]]
 ) -> Dict[str, Any]:
     """Генерирует отчет по рабочим/выходным дням."""
     try:
-        df = pd.DataFrame(transactions)
-        if df.empty:
-            return {"categories": [], "total": 0}
-        
-        df["Дата операции"] = pd.to_datetime(df["Дата операции"], errors="coerce")
-        df["weekday"] = df["Дата операции"].dt.dayofweek
-        df["day_type"] = df["weekday"].apply(
-            lambda x: "Рабочий день" if x < 5 else "Выходной"
-        )
-        
-        categories_data = []
-        total = 0
-        
-        for day_type in ["Рабочий день", "Выходной"]:
-            type_df = df[df["day_type"] == day_type]
-            type_total = type_df["Сумма операции"].sum()
-            categories_data.append({
-                "category": day_type,
-                "amount": float(type_total),
-                "count": len(type_df)
-            })
-            total += type_total
-        
-        report = {
-            "categories": categories_data,
-            "total": float(total),
-            "generated_at": datetime.now().isoformat()
-        }
-        
-        save_report(report, "report_spending_by_workday")
+        report = _generate_report(transactions, "workday", {})
         logger.info("Сгенерирован отчет по рабочим/выходным дням")
         return report
         
@@ -0,0 +1,735 @@
+"""
+Модуль поисковых индексов по описаниям транзакций.
+
+pandas загружается только функциями, работающими со столбцами
+(match_series, extract_phones, PhoneIndex), поэтому полнотекстовый и
+нечеткий поиск не платят за его импорт.
+
+Метрики: get_*_index записывают время построения или дополнения индекса
+и число проиндексированных строк, запросы - время и число найденных строк.
+"""
+import bisect
+import logging
+import math
+import re
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Set, Tuple, TYPE_CHECKING
+
+from src.index_cache import get_cached_index
+from src.metrics import ROWS_FROM_OUTPUT, add_rows, timed
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+SUBSTRING_CACHE_SIZE = 1024
+PHONE_PATTERN = re.compile(
+    r'(\b(?:\+7|8|7)?[\s\-()]*\d{3}[\s\-()]*\d{3}[\s\-()]*\d{2}[\s\-()]*\d{2}\b)'
+)
+
+# Транслитерация кириллицы, чтобы "Пятёрочка" и "Pyaterochka" совпадали
+TRANSLITERATION = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e",
+    "ж": "zh", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "h", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "",
+    "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбивает текст на слова в нижнем регистре."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def normalize_text(text: str) -> str:
+    """
+    Нормализует текст для нечеткого поиска.
+
+    Приводит к нижнему регистру, заменяет ё на е, переводит кириллицу
+    в латиницу и оставляет только слова, разделенные пробелом.
+    """
+    return " ".join(TOKEN_PATTERN.findall(text.lower().translate(TRANSLITERATION)))
+
+
+def trigrams(text: str) -> Set[str]:
+    """Возвращает множество триграмм нормализованного текста."""
+    result = set()
+    for word in text.split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            result.add(padded[i:i + 3])
+    return result
+
+
+class InvertedIndex:
+    """
+    Инвертированный индекс слов из описаний транзакций.
+
+    Хранит для каждого слова множество номеров строк и отсортированный
+    словарь слов для поиска по префиксу. Новые транзакции добавляются
+    методом add без перестроения индекса.
+    """
+
+    def __init__(
+        self,
+        transactions: Optional[List[Dict[str, Any]]] = None,
+        field: str = "Описание",
+    ) -> None:
+        self.field = field
+        self.transactions: List[Dict[str, Any]] = []
+        self.descriptions: List[str] = []
+        self.postings: Dict[str, Set[int]] = {}
+        self.vocabulary: List[str] = []
+        self._substring_cache: Dict[str, Set[int]] = {}
+
+        if transactions:
+            self.add(transactions)
+
+    def __len__(self) -> int:
+        return len(self.transactions)
+
+    def add(self, transactions: Iterable[Dict[str, Any]]) -> None:
+        """
+        Добавляет транзакции в индекс.
+
+        Args:
+            transactions: Новые транзакции
+        """
+        added = 0
+        for transaction in transactions:
+            row = len(self.transactions)
+            description = str(transaction.get(self.field, "")).lower()
+            self.transactions.append(transaction)
+            self.descriptions.append(description)
+
+            for token in set(TOKEN_PATTERN.findall(description)):
+                rows = self.postings.get(token)
+                if rows is None:
+                    self.postings[token] = rows = set()
+                    bisect.insort(self.vocabulary, token)
+                rows.add(row)
+            added += 1
+
+        add_rows(added)
+        if added:
+            self._substring_cache.clear()
+            logger.info(f"В поисковый индекс добавлено {added} транзакций")
+
+    def prefix_rows(self, prefix: str) -> Set[int]:
+        """Возвращает строки, в которых есть слово с данным префиксом."""
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        rows: Set[int] = set()
+        for token in self.vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            rows |= self.postings[token]
+        return rows
+
+    def _token_substring_rows(self, piece: str) -> Set[int]:
+        """Возвращает строки, в которых есть слово, содержащее piece."""
+        rows = self._substring_cache.get(piece)
+        if rows is None:
+            rows = set()
+            for token in self.vocabulary:
+                if piece in token:
+                    rows |= self.postings[token]
+            if len(self._substring_cache) >= SUBSTRING_CACHE_SIZE:
+                self._substring_cache.clear()
+            self._substring_cache[piece] = rows
+        return rows
+
+    @timed(rows=ROWS_FROM_OUTPUT)
+    def substring_rows(self, term: str) -> List[int]:
+        """
+        Возвращает строки, описание которых содержит term как подстроку.
+
+        Кандидаты берутся по самому длинному слову запроса через словарь
+        индекса, а затем проверяются по полному описанию.
+
+        Args:
+            term: Искомая подстрока
+
+        Returns:
+            Отсортированный список номеров строк
+        """
+        term = term.lower()
+        pieces = TOKEN_PATTERN.findall(term)
+        if not pieces:
+            candidates: Iterable[int] = range(len(self.descriptions))
+        else:
+            piece = max(pieces, key=len)
+            candidates = self._token_substring_rows(piece)
+            if piece == term:
+                return sorted(candidates)
+        return sorted(row for row in candidates if term in self.descriptions[row])
+
+    @timed(rows=ROWS_FROM_OUTPUT)
+    def query(self, terms: Iterable[str], mode: str = "and") -> List[int]:
+        """
+        Ищет строки по префиксам слов.
+
+        Args:
+            terms: Слова запроса (каждое сопоставляется как префикс слова)
+            mode: "and" - все слова, "or" - хотя бы одно
+
+        Returns:
+            Отсортированный список номеров строк
+        """
+        result: Optional[Set[int]] = None
+        for term in terms:
+            for token in tokenize(term):
+                rows = self.prefix_rows(token)
+                if result is None:
+                    result = set(rows)
+                elif mode == "or":
+                    result |= rows
+                else:
+                    result &= rows
+        return sorted(result) if result else []
+
+    def project(self, rows: Iterable[int]) -> Iterator[Dict[str, Any]]:
+        """Лениво возвращает транзакции по номерам строк."""
+        return (self.transactions[row] for row in rows)
+
+
+class TrigramIndex:
+    """
+    Триграммный индекс для нечеткого поиска по описаниям транзакций.
+
+    Одинаковые после нормализации описания индексируются один раз,
+    поэтому размер индекса зависит от числа различных описаний, а не
+    от числа транзакций.
+    """
+
+    def __init__(
+        self,
+        transactions: Optional[List[Dict[str, Any]]] = None,
+        field: str = "Описание",
+    ) -> None:
+        self.field = field
+        self.transactions: List[Dict[str, Any]] = []
+        self.texts: List[str] = []
+        self.text_rows: List[List[int]] = []
+        self.text_trigram_counts: List[int] = []
+        self.postings: Dict[str, List[int]] = {}
+        self._text_ids: Dict[str, int] = {}
+
+        if transactions:
+            self.add(transactions)
+
+    def __len__(self) -> int:
+        return len(self.transactions)
+
+    def add(self, transactions: Iterable[Dict[str, Any]]) -> None:
+        """
+        Добавляет транзакции в индекс.
+
+        Args:
+            transactions: Новые транзакции
+        """
+        start = len(self.transactions)
+        for transaction in transactions:
+            row = len(self.transactions)
+            self.transactions.append(transaction)
+            text = normalize_text(str(transaction.get(self.field, "")))
+
+            text_id = self._text_ids.get(text)
+            if text_id is None:
+                text_id = self._text_ids[text] = len(self.texts)
+                grams = trigrams(text)
+                self.texts.append(text)
+                self.text_rows.append([])
+                self.text_trigram_counts.append(len(grams))
+                for gram in grams:
+                    self.postings.setdefault(gram, []).append(text_id)
+            self.text_rows[text_id].append(row)
+        add_rows(len(self.transactions) - start)
+
+    @timed(name="search.trigram_search", rows=ROWS_FROM_OUTPUT)
+    def search(
+        self, query: str, limit: int = 10, threshold: float = 0.5
+    ) -> List[Tuple[int, float]]:
+        """
+        Ищет транзакции, описания которых похожи на запрос.
+
+        Оценка - доля триграмм запроса, найденных в описании; при равной
+        оценке выше стоят описания, ближе совпадающие с запросом целиком.
+
+        Args:
+            query: Поисковый запрос
+            limit: Максимальное количество транзакций в ответе
+            threshold: Минимальная оценка от 0 до 1
+
+        Returns:
+            Список пар (номер строки, оценка) по убыванию оценки
+        """
+        query_grams = trigrams(normalize_text(query))
+        if not query_grams:
+            return []
+
+        shared: Counter = Counter()
+        for gram in query_grams:
+            shared.update(self.postings.get(gram, ()))
+
+        size = len(query_grams)
+        ranked = []
+        for text_id, common in shared.items():
+            score = common / size
+            if score >= threshold:
+                jaccard = common / (size + self.text_trigram_counts[text_id] - common)
+                ranked.append((score, jaccard, text_id))
+        ranked.sort(key=lambda item: (-item[0], -item[1], item[2]))
+
+        result: List[Tuple[int, float]] = []
+        for score, _, text_id in ranked:
+            for row in self.text_rows[text_id]:
+                if len(result) >= limit:
+                    return result
+                result.append((row, round(score, 4)))
+        return result
+
+    def project(self, rows: Iterable[int]) -> Iterator[Dict[str, Any]]:
+        """Лениво возвращает транзакции по номерам строк."""
+        return (self.transactions[row] for row in rows)
+
+
+class KeywordMatcher:
+    """
+    Автомат Ахо-Корасик для поиска набора ключевых слов за один проход.
+
+    Строится один раз по списку слов; время поиска зависит от длины текста
+    и числа совпадений, но не от количества ключевых слов. Поиск ведется
+    без учета регистра.
+    """
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for keyword in dict.fromkeys(k.lower() for k in keywords if k):
+            self._insert(keyword)
+        self._build_links()
+
+    def _insert(self, keyword: str) -> None:
+        """Добавляет слово в бор."""
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(len(self.keywords))
+        self.keywords.append(keyword)
+
+    def _build_links(self) -> None:
+        """Строит суффиксные ссылки обходом бора в ширину."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> List[str]:
+        """
+        Возвращает ключевые слова, найденные в тексте.
+
+        Args:
+            text: Текст для поиска
+
+        Returns:
+            Найденные слова в порядке первого вхождения, без повторов
+        """
+        found: Dict[int, None] = {}
+        state = 0
+        for char in text.lower():
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for keyword_id in self._output[state]:
+                found.setdefault(keyword_id)
+        return [self.keywords[keyword_id] for keyword_id in found]
+
+    def first(self, text: str) -> Optional[str]:
+        """Возвращает первое ключевое слово, найденное в тексте, или None."""
+        state = 0
+        for char in text.lower():
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._output[state]:
+                return self.keywords[self._output[state][0]]
+        return None
+
+    def match_series(self, descriptions: "pd.Series") -> "pd.Series":
+        """
+        Векторизованный поиск по столбцу описаний.
+
+        Автомат прогоняется только по различным значениям столбца,
+        результат раскладывается обратно по строкам.
+
+        Args:
+            descriptions: Series с описаниями
+
+        Returns:
+            Series со списками найденных слов для каждой строки
+        """
+        texts = descriptions.fillna("").astype(str)
+        unique = texts.unique()
+        matches = {text: self.find(text) for text in unique}
+        return texts.map(matches)
+
+
+@lru_cache(maxsize=32)
+def _cached_keyword_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def get_keyword_matcher(keywords: Iterable[str]) -> KeywordMatcher:
+    """Возвращает автомат для списка слов, строя его один раз на набор слов."""
+    return _cached_keyword_matcher(tuple(keywords))
+
+
+def normalize_phone(phone: str) -> Optional[str]:
+    """
+    Приводит российский номер телефона к формату E.164.
+
+    Args:
+        phone: Номер в произвольной записи
+
+    Returns:
+        Номер вида +79161234567 или None, если номер не распознан
+    """
+    digits = re.sub(r"\D", "", str(phone))
+    if len(digits) == 11 and digits[0] in "78":
+        return "+7" + digits[1:]
+    if len(digits) == 10:
+        return "+7" + digits
+    return None
+
+
+def extract_phones(descriptions: "pd.Series") -> "pd.Series":
+    """
+    Извлекает все номера телефонов из столбца описаний за один векторизованный проход.
+
+    Args:
+        descriptions: Series с описаниями
+
+    Returns:
+        Series со списками различных номеров в формате E.164 в порядке
+        появления (пустой список, если номеров нет)
+    """
+    import pandas as pd
+
+    texts = descriptions.fillna("").astype(str).reset_index(drop=True)
+    result: List[List[str]] = [[] for _ in range(len(texts))]
+    if len(texts):
+        found = texts.str.extractall(PHONE_PATTERN)[0]
+        for row, match in zip(found.index.get_level_values(0), found):
+            phone = normalize_phone(match)
+            if phone and phone not in result[row]:
+                result[row].append(phone)
+    return pd.Series(result, index=descriptions.index, dtype=object)
+
+
+class PhoneIndex:
+    """
+    Индекс транзакций по номерам телефонов из описаний.
+
+    Номера извлекаются один раз при добавлении транзакций, после чего
+    поиск по номеру и рейтинг получателей не требуют регулярных выражений.
+    Индексируются все номера описания, а не только первый.
+    """
+
+    def __init__(
+        self,
+        transactions: Optional[List[Dict[str, Any]]] = None,
+        field: str = "Описание",
+    ) -> None:
+        self.field = field
+        self.transactions: List[Dict[str, Any]] = []
+        self.phones: List[List[str]] = []
+        self.rows: Dict[str, List[int]] = {}
+
+        if transactions:
+            self.add(transactions)
+
+    def __len__(self) -> int:
+        return len(self.transactions)
+
+    def add(self, transactions: Iterable[Dict[str, Any]]) -> None:
+        """
+        Добавляет транзакции в индекс.
+
+        Args:
+            transactions: Новые транзакции
+        """
+        import pandas as pd
+
+        transactions = list(transactions)
+        offset = len(self.transactions)
+        descriptions = pd.Series([t.get(self.field, "") for t in transactions], dtype=object)
+        phones = extract_phones(descriptions).tolist() if transactions else []
+
+        add_rows(len(transactions))
+        self.transactions.extend(transactions)
+        self.phones.extend(phones)
+        for row, row_phones in enumerate(phones, offset):
+            for phone in row_phones:
+                self.rows.setdefault(phone, []).append(row)
+
+    def phone_rows(self) -> List[int]:
+        """Возвращает номера строк, в описании которых есть телефон."""
+        return [row for row, row_phones in enumerate(self.phones) if row_phones]
+
+    @timed(rows=ROWS_FROM_OUTPUT)
+    def transactions_for(self, phone: str) -> List[Dict[str, Any]]:
+        """
+        Возвращает все транзакции с указанным номером телефона.
+
+        Args:
+            phone: Номер в произвольной записи
+
+        Returns:
+            Список транзакций
+        """
+        normalized = normalize_phone(phone)
+        return [self.transactions[row] for row in self.rows.get(normalized, [])]
+
+    @timed(rows=None)
+    def top_recipients(self, limit: int = 10, amount_column: str = "Сумма операции") -> List[Dict[str, Any]]:
+        """
+        Возвращает номера телефонов с наибольшим числом операций.
+
+        Args:
+            limit: Количество номеров
+            amount_column: Столбец с суммой операции
+
+        Returns:
+            Список словарей phone, count, amount
+        """
+        summary = []
+        for phone, rows in self.rows.items():
+            amount = 0.0
+            for row in rows:
+                value = self.transactions[row].get(amount_column, 0)
+                if isinstance(value, (int, float)) and not math.isnan(value):
+                    amount += value
+            summary.append({"phone": phone, "count": len(rows), "amount": round(amount, 2)})
+
+        summary.sort(key=lambda item: (-item["count"], -abs(item["amount"]), item["phone"]))
+        return summary[:limit]
+
+
+Predicate = Tuple[str, Any]
+PREDICATE_KINDS = ("substring", "regex", "keywords", "phone")
+
+
+def _evaluate_predicates(
+    descriptions: List[str], predicates: List[Predicate], offset: int = 0
+) -> Dict[Predicate, List[int]]:
+    """
+    Проверяет все предикаты по части описаний за один проход.
+
+    Подстроки и наборы ключевых слов объединяются в один автомат
+    Ахо-Корасик, регулярные выражения компилируются один раз.
+
+    Args:
+        descriptions: Описания транзакций
+        predicates: Список предикатов (вид, значение)
+        offset: Номер первой строки части
+
+    Returns:
+        Словарь предикат -> номера подходящих строк
+    """
+    result: Dict[Predicate, List[int]] = {predicate: [] for predicate in predicates}
+
+    terms = []
+    match_all = []
+    substrings = []
+    keyword_sets = []
+    regexes = []
+    phones = []
+    for predicate in predicates:
+        kind, value = predicate
+        if kind == "substring":
+            term = str(value).lower()
+            if term:
+                substrings.append((predicate, term))
+                terms.append(term)
+            else:
+                match_all.append(predicate)
+        elif kind == "keywords":
+            words = {str(word).lower() for word in value if word}
+            keyword_sets.append((predicate, words))
+            terms.extend(words)
+        elif kind == "regex":
+            regexes.append((predicate, re.compile(value)))
+        elif kind == "phone":
+            phones.append((predicate, normalize_phone(value) if value else None))
+        else:
+            raise ValueError(f"Неизвестный вид предиката: {kind}")
+
+    matcher = KeywordMatcher(terms) if terms else None
+
+    for row, text in enumerate(descriptions, offset):
+        for predicate in match_all:
+            result[predicate].append(row)
+
+        if matcher is not None:
+            found = set(matcher.find(text))
+            if found:
+                for predicate, term in substrings:
+                    if term in found:
+                        result[predicate].append(row)
+                for predicate, words in keyword_sets:
+                    if not found.isdisjoint(words):
+                        result[predicate].append(row)
+
+        for predicate, pattern in regexes:
+            if pattern.search(text):
+                result[predicate].append(row)
+
+        if phones:
+            row_phones = {normalize_phone(match) for match in PHONE_PATTERN.findall(text)}
+            # Как и в PhoneIndex, учитываются только распознанные номера
+            row_phones.discard(None)
+            if row_phones:
+                for predicate, phone in phones:
+                    if phone is None or phone in row_phones:
+                        result[predicate].append(row)
+
+    return result
+
+
+def _normalize_predicate(predicate: Sequence[Any]) -> Predicate:
+    """Приводит предикат к хешируемому виду: списки и множества слов - к кортежу."""
+    kind, value = predicate
+    if isinstance(value, (list, set, frozenset)):
+        value = tuple(sorted(value)) if isinstance(value, (set, frozenset)) else tuple(value)
+    return kind, value
+
+
+@timed
+def run_batch_queries(
+    transactions: List[Dict[str, Any]],
+    predicates: List[Predicate],
+    field: str = "Описание",
+    workers: int = 1,
+    min_rows_per_worker: int = 10_000,
+) -> Dict[Predicate, List[int]]:
+    """
+    Выполняет набор поисковых запросов за один проход по транзакциям.
+
+    Поддерживаемые предикаты:
+        ("substring", "магазин") - подстрока без учета регистра
+        ("regex", r"KFC|Суши") - регулярное выражение
+        ("keywords", ("перевод", "иванов")) - любое слово из набора
+        ("phone", "+79161234567") - номер телефона, None - любой номер
+
+    Набор слов можно передать списком или множеством: в ключах результата
+    он будет кортежем.
+
+    Args:
+        transactions: Список транзакций
+        predicates: Список предикатов
+        field: Поле с текстом
+        workers: Количество процессов для обработки частей списка
+        min_rows_per_worker: Минимальный размер части для отдельного процесса
+
+    Returns:
+        Словарь предикат -> отсортированные номера строк
+    """
+    predicates = list(dict.fromkeys(_normalize_predicate(predicate) for predicate in predicates))
+    descriptions = [str(t.get(field, "")) for t in transactions]
+
+    workers = min(workers, len(descriptions) // max(min_rows_per_worker, 1))
+    if workers <= 1:
+        return _evaluate_predicates(descriptions, predicates)
+
+    chunk_size = -(-len(descriptions) // workers)
+    offsets = range(0, len(descriptions), chunk_size)
+    result: Dict[Predicate, List[int]] = {predicate: [] for predicate in predicates}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parts = executor.map(
+            _evaluate_predicates,
+            [descriptions[start:start + chunk_size] for start in offsets],
+            [predicates] * len(offsets),
+            offsets,
+        )
+        # Части возвращаются по порядку, поэтому номера строк остаются отсортированными
+        for part in parts:
+            for predicate, rows in part.items():
+                result[predicate].extend(rows)
+
+    return result
+
+
+@timed(rows=None)
+def get_inverted_index(transactions: List[Dict[str, Any]], field: str = "Описание") -> InvertedIndex:
+    """
+    Возвращает индекс для списка транзакций, строя его при первом обращении.
+
+    Индекс привязан к объекту списка: если в список дописаны новые
+    транзакции, в индекс добавляются только они. Изменение уже
+    проиндексированных транзакций на месте не отслеживается.
+
+    Args:
+        transactions: Список транзакций
+        field: Поле с текстом для индексации
+
+    Returns:
+        Инвертированный индекс
+    """
+    return get_cached_index(InvertedIndex, transactions, field)
+
+
+@timed(rows=None)
+def get_trigram_index(transactions: List[Dict[str, Any]], field: str = "Описание") -> TrigramIndex:
+    """
+    Возвращает триграммный индекс для списка транзакций.
+
+    Кеширование устроено так же, как в get_inverted_index.
+
+    Args:
+        transactions: Список транзакций
+        field: Поле с текстом для индексации
+
+    Returns:
+        Триграммный индекс
+    """
+    return get_cached_index(TrigramIndex, transactions, field)
+
+
+@timed(rows=None)
+def get_phone_index(transactions: List[Dict[str, Any]], field: str = "Описание") -> PhoneIndex:
+    """
+    Возвращает индекс телефонов для списка транзакций.
+
+    Кеширование устроено так же, как в get_inverted_index.
+
+    Args:
+        transactions: Список транзакций
+        field: Поле с текстом для извлечения номеров
+
+    Returns:
+        Индекс телефонов
+    """
+    return get_cached_index(PhoneIndex, transactions, field)
@@ -0,0 +1,140 @@
+"""
+Модуль сериализации результатов в JSON.
+
+Страницы и отчеты содержат скаляры numpy и pandas, Timestamp, Decimal и
+datetime; json_default приводит их к типам JSON, поэтому приведение через
+float() на местах не требуется. Если установлен orjson, кодирование идет
+через него (скаляры и массивы numpy он кодирует сам), иначе через
+стандартный json с тем же преобразованием.
+
+Большие списки (топ транзакций, помесячные ряды) iter_encode выдает
+частями по STREAM_BATCH_SIZE элементов, не собирая весь JSON в памяти.
+"""
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, IO, Iterator
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson необязателен
+    orjson = None
+
+# Списки длиннее этого числа элементов кодируются частями
+STREAM_BATCH_SIZE = 256
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def json_default(value: Any) -> Any:
+    """
+    Приводит значение, которое JSON не кодирует сам, к типу JSON.
+
+    Args:
+        value: Значение (Timestamp, NaT, pd.NA, Decimal, скаляр или массив numpy и т.п.)
+
+    Returns:
+        Значение из стандартных типов: строка даты, число, список или None
+
+    Raises:
+        TypeError: Если тип значения не поддерживается
+    """
+    if isinstance(value, datetime):
+        # NaT - тоже datetime, но не равен сам себе
+        return None if value != value else value.isoformat()
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    dtype = getattr(value, "dtype", None)
+    if dtype is not None and dtype.kind == "M" and getattr(value, "ndim", 1) == 0:
+        # numpy.datetime64: tolist() вернул бы наносекунды числом
+        return json_default(value.astype("datetime64[us]").item())
+    if hasattr(value, "to_dict") and hasattr(value, "columns"):
+        return value.to_dict(orient="records")
+    if hasattr(value, "tolist"):
+        # скаляры и массивы numpy, Series и Index pandas
+        return value.tolist()
+    if type(value).__name__ == "NAType":
+        return None
+    if type(value).__module__.startswith("pandas"):
+        # Period и другие скаляры pandas
+        return str(value)
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+
+def dumps(value: Any, indent: bool = False) -> bytes:
+    """
+    Сериализует значение в JSON в UTF-8.
+
+    Args:
+        value: Значение
+        indent: Форматировать с отступом в два пробела
+
+    Returns:
+        JSON в байтах
+    """
+    if orjson is not None:
+        options = _ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else _ORJSON_OPTIONS
+        return orjson.dumps(value, default=json_default, option=options)
+    if indent:
+        text = json.dumps(value, ensure_ascii=False, indent=2, default=json_default)
+    else:
+        text = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=json_default)
+    return text.encode("utf-8")
+
+
+def _key(key: Any) -> bytes:
+    """Кодирует ключ словаря как строку JSON."""
+    if isinstance(key, str):
+        return dumps(key)
+    encoded = dumps(key)
+    return encoded if encoded.startswith(b'"') else dumps(encoded.decode("utf-8"))
+
+
+def iter_encode(value: Any, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Выдает компактный JSON значения частями.
+
+    Словари обходятся по ключам, списки длиннее batch_size кодируются
+    пачками по batch_size элементов, остальное - одним вызовом dumps.
+
+    Args:
+        value: Значение
+        batch_size: Размер пачки элементов списка
+
+    Returns:
+        Итератор частей JSON в байтах
+    """
+    if isinstance(value, dict):
+        yield b"{"
+        for i, (key, item) in enumerate(value.items()):
+            yield (b"," if i else b"") + _key(key) + b":"
+            yield from iter_encode(item, batch_size)
+        yield b"}"
+    elif isinstance(value, (list, tuple)) and len(value) > batch_size:
+        yield b"["
+        for start in range(0, len(value), batch_size):
+            # Пачка кодируется списком, от которого отрезаются скобки
+            yield (b"," if start else b"") + dumps(list(value[start:start + batch_size]))[1:-1]
+        yield b"]"
+    else:
+        yield dumps(value)
+
+
+def write_json(value: Any, stream: IO[bytes], batch_size: int = STREAM_BATCH_SIZE) -> None:
+    """
+    Пишет компактный JSON значения в поток частями.
+
+    Args:
+        value: Значение
+        stream: Бинарный поток
+        batch_size: Размер пачки элементов списка
+    """
+    for chunk in iter_encode(value, batch_size):
+        stream.write(chunk)
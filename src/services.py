@@ -2,47 +2,76 @@
 Модуль сервисов для анализа транзакций.
 """
 import logging
-import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
+import numpy as np
+import pandas as pd
+from src.cashback import build_spend_cells, evaluate_programs
+from src.indexes import MonthlyCashbackIndex, get_cached_index, parse_dates, spend_mask
+from src.metrics import timed
+from src.search import (
+    Predicate,
+    get_inverted_index,
+    get_keyword_matcher,
+    get_phone_index,
+    get_trigram_index,
+    run_batch_queries,
+)
+from src.utils import parse_period
 
 logger = logging.getLogger(__name__)
 
+PIGGYBANK_POLICIES = [
+    {"name": "round_10", "type": "round", "step": 10},
+    {"name": "round_50", "type": "round", "step": 50},
+    {"name": "round_100", "type": "round", "step": 100},
+    {"name": "percent_5", "type": "percent", "percent": 5},
+]
 
+TRANSFER_KEYWORDS = ["перевод", "перевел", "перевод физ", "перевод част", "иванов", "петров"]
+
+
+@timed
 def analyze_cashback_categories(
     transactions: List[Dict[str, Any]], period: str
 ) -> List[Dict[str, Any]]:
     """
-    Анализирует категории с наилучшим кешбэком.
+    Анализирует категории с наилучшим кешбэком за период.
+    
+    Для ограниченного периода к каждой категории добавляется кешбэк
+    за предыдущий период той же длины и разница с ним.
     
     Args:
         transactions: Список транзакций
-        period: Период анализа
+        period: Период анализа ("1/2024", "1/2024 - 3/2024", "last 3", "all")
         
     Returns:
         Список категорий с кешбэком
     """
     try:
-        cashback_by_category = {}
+        index = get_cached_index(MonthlyCashbackIndex, transactions, "Кешбэк")
+        start, end = parse_period(period, index.latest_month)
+        cashback_by_category = index.totals(start, end)
         
-        for transaction in transactions:
-            category = transaction.get("Категория", "Без категории")
-            cashback = transaction.get("Кешбэк", 0)
-            
-            if isinstance(cashback, (int, float)) and cashback > 0:
-                cashback_by_category[category] = (
-                    cashback_by_category.get(category, 0) + cashback
-                )
+        previous_by_category = None
+        if start is not None and end is not None:
+            length = end.ordinal - start.ordinal + 1
+            previous_by_category = index.totals(start - length, start - 1)
+        
+        result = []
+        for category, cashback in cashback_by_category.items():
+            cashback = round(cashback, 2)
+            if cashback <= 0:
+                continue
+            item = {"category": category, "cashback": cashback}
+            if previous_by_category is not None:
+                previous = round(previous_by_category.get(category, 0.0), 2)
+                item["previous_cashback"] = previous
+                item["delta"] = round(cashback - previous, 2)
+            result.append(item)
         
         # Сортируем по убыванию кешбэка
-        result = [
-            {"category": category, "cashback": cashback}
-            for category, cashback in sorted(
-                cashback_by_category.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )
-        ]
+        result.sort(key=lambda x: x["cashback"], reverse=True)
         
         logger.info(f"Проанализированы категории кешбэка за {period}")
         return result
@@ -52,6 +81,7 @@ def analyze_cashback_categories(
         return []
 
 
+@timed
 def calculate_investment_piggybank(
     transactions: List[Dict[str, Any]]
 ) -> float:
@@ -80,6 +110,119 @@ def calculate_investment_piggybank(
         return 0.0
 
 
+def _spend_operations(transactions: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Выбирает расходы из транзакций.
+
+    Расходы отбираются spend_mask: операции с положительной суммой, как в analyze_expenses.
+
+    Args:
+        transactions: Список транзакций
+
+    Returns:
+        DataFrame со столбцами amount (сумма расхода), month, category, mcc
+    """
+    df = pd.DataFrame(transactions)
+
+    def column(name: str, default: Any) -> pd.Series:
+        return df[name] if name in df.columns else pd.Series(default, index=df.index, dtype=object)
+
+    amounts = pd.to_numeric(column("Сумма операции", 0), errors="coerce").fillna(0)
+    mask = pd.Series(spend_mask(amounts.to_numpy()), index=df.index)
+
+    dates = parse_dates(column("Дата операции", None))
+    dates.index = df.index
+    return pd.DataFrame({
+        "amount": amounts[mask],
+        "month": dates.dt.to_period("M").astype(str).where(dates.notna())[mask],
+        "category": column("Категория", "Без категории")[mask],
+        "mcc": pd.to_numeric(column("MCC", None), errors="coerce")[mask],
+    })
+
+
+def _piggybank_savings(spend: np.ndarray, policies: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Считает отчисления в копилку по каждой политике для массива расходов.
+
+    Args:
+        spend: Суммы расходов в рублях (положительные)
+        policies: Политики отчислений
+
+    Returns:
+        Матрица отчислений размером (операции, политики)
+    """
+    kopecks = np.round(spend * 100).astype(np.int64)
+    savings = np.zeros((len(spend), len(policies)))
+
+    rounding = [i for i, policy in enumerate(policies) if policy["type"] == "round"]
+    percent = [i for i, policy in enumerate(policies) if policy["type"] == "percent"]
+    unknown = set(range(len(policies))) - set(rounding) - set(percent)
+    if unknown:
+        raise ValueError(f"Неизвестный тип политики: {policies[min(unknown)]['type']}")
+
+    if rounding:
+        steps = np.array([int(round(policies[i]["step"] * 100)) for i in rounding], dtype=np.int64)
+        # Округление вверх до шага: недостающая до кратной шагу суммы часть
+        savings[:, rounding] = ((-kopecks[:, None]) % steps) / 100
+    if percent:
+        rates = np.array([policies[i]["percent"] / 100 for i in percent])
+        savings[:, percent] = np.round(kopecks[:, None] * rates) / 100
+
+    return savings
+
+
+@timed
+def simulate_investment_piggybank(
+    transactions: List[Dict[str, Any]],
+    policies: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Рассчитывает, сколько накопилось бы в Инвесткопилке при разных правилах.
+    
+    Все политики считаются одним векторизованным проходом по массиву сумм
+    расходов (см. _spend_operations).
+    
+    Args:
+        transactions: Список транзакций
+        policies: Политики вида {"name": ..., "type": "round", "step": 10}
+            или {"name": ..., "type": "percent", "percent": 5}
+            (по умолчанию PIGGYBANK_POLICIES)
+        
+    Returns:
+        Словарь имя политики -> {"total": сумма, "months": {месяц: сумма}}
+    """
+    try:
+        policies = policies if policies is not None else PIGGYBANK_POLICIES
+        if not transactions or not policies:
+            return {policy["name"]: {"total": 0.0, "months": {}} for policy in policies}
+        
+        spend = _spend_operations(transactions)
+        savings = _piggybank_savings(spend["amount"].to_numpy(), policies)
+        months = spend["month"]
+        codes, labels = pd.factorize(months, sort=True)
+        
+        # Суммы по месяцам для всех политик сразу; операции без даты входят только в итог
+        by_month = np.zeros((len(labels), len(policies)))
+        dated = codes >= 0
+        np.add.at(by_month, codes[dated], savings[dated])
+        totals = savings.sum(axis=0)
+        
+        result = {}
+        for i, policy in enumerate(policies):
+            result[policy["name"]] = {
+                "total": round(float(totals[i]), 2),
+                "months": {str(month): round(float(by_month[m, i]), 2) for m, month in enumerate(labels)},
+            }
+        
+        logger.info(f"Рассчитана Инвесткопилка для {len(policies)} политик")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Ошибка моделирования инвесткопилки: {e}")
+        return {}
+
+
+@timed
 def search_transactions(
     transactions: List[Dict[str, Any]], search_term: str
 ) -> List[Dict[str, Any]]:
@@ -97,13 +240,8 @@ def search_transactions(
         if not search_term:
             return transactions
         
-        search_term_lower = search_term.lower()
-        result = []
-        
-        for transaction in transactions:
-            description = str(transaction.get("Описание", "")).lower()
-            if search_term_lower in description:
-                result.append(transaction)
+        index = get_inverted_index(transactions)
+        result = list(index.project(index.substring_rows(search_term)))
         
         logger.info(f"Найдено {len(result)} транзакций по запросу '{search_term}'")
         return result
@@ -113,6 +251,42 @@ def search_transactions(
         return []
 
 
+@timed
+def fuzzy_search_transactions(
+    transactions: List[Dict[str, Any]],
+    search_term: str,
+    limit: int = 10,
+    threshold: float = 0.5,
+) -> List[Dict[str, Any]]:
+    """
+    Ищет транзакции по похожему описанию с учетом опечаток.
+    
+    Args:
+        transactions: Список транзакций
+        search_term: Поисковый запрос
+        limit: Максимальное количество результатов
+        threshold: Минимальная степень сходства от 0 до 1
+        
+    Returns:
+        Найденные транзакции по убыванию сходства
+    """
+    try:
+        if not search_term:
+            return []
+        
+        index = get_trigram_index(transactions)
+        matches = index.search(search_term, limit, threshold)
+        result = list(index.project(row for row, _ in matches))
+        
+        logger.info(f"Нечеткий поиск: найдено {len(result)} транзакций по запросу '{search_term}'")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Ошибка нечеткого поиска транзакций: {e}")
+        return []
+
+
+@timed
 def find_phone_transactions(
     transactions: List[Dict[str, Any]]
 ) -> List[Dict[str, Any]]:
@@ -126,13 +300,8 @@ def find_phone_transactions(
         Транзакции с телефонными номерами
     """
     try:
-        phone_pattern = r'\b(?:\+7|8|7)?[\s\-()]*\d{3}[\s\-()]*\d{3}[\s\-()]*\d{2}[\s\-()]*\d{2}\b'
-        result = []
-        
-        for transaction in transactions:
-            description = str(transaction.get("Описание", ""))
-            if re.search(phone_pattern, description):
-                result.append(transaction)
+        index = get_phone_index(transactions)
+        result = [transactions[row] for row in index.phone_rows()]
         
         logger.info(f"Найдено {len(result)} транзакций с телефонными номерами")
         return result
@@ -142,26 +311,97 @@ def find_phone_transactions(
         return []
 
 
+@timed
+def find_transactions_by_phone(
+    transactions: List[Dict[str, Any]], phone: str
+) -> List[Dict[str, Any]]:
+    """
+    Находит все транзакции с указанным номером телефона.
+    
+    Args:
+        transactions: Список транзакций
+        phone: Номер телефона в произвольной записи
+        
+    Returns:
+        Транзакции с этим номером
+    """
+    try:
+        result = get_phone_index(transactions).transactions_for(phone)
+        logger.info(f"Найдено {len(result)} транзакций с номером {phone}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Ошибка поиска по номеру телефона: {e}")
+        return []
+
+
+@timed
+def get_top_phone_recipients(
+    transactions: List[Dict[str, Any]], limit: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    Возвращает номера телефонов с наибольшим числом операций.
+    
+    Args:
+        transactions: Список транзакций
+        limit: Количество номеров
+        
+    Returns:
+        Список словарей с номером, количеством операций и суммой
+    """
+    try:
+        return get_phone_index(transactions).top_recipients(limit)
+        
+    except Exception as e:
+        logger.error(f"Ошибка расчета получателей по телефонам: {e}")
+        return []
+
+
+@timed
+def find_personal_transfer_keywords(
+    transactions: List[Dict[str, Any]],
+    keywords: Optional[List[str]] = None,
+) -> Dict[int, List[str]]:
+    """
+    Определяет, какие ключевые слова переводов нашлись в транзакциях.
+    
+    Args:
+        transactions: Список транзакций
+        keywords: Ключевые слова (по умолчанию TRANSFER_KEYWORDS)
+        
+    Returns:
+        Словарь номер транзакции -> найденные ключевые слова
+    """
+    try:
+        matcher = get_keyword_matcher(keywords if keywords is not None else TRANSFER_KEYWORDS)
+        descriptions = pd.Series([transaction.get("Описание", "") for transaction in transactions], dtype=object)
+        matches = matcher.match_series(descriptions)
+        
+        return {row: found for row, found in enumerate(matches) if found}
+        
+    except Exception as e:
+        logger.error(f"Ошибка поиска ключевых слов переводов: {e}")
+        return {}
+
+
+@timed
 def find_personal_transfers(
-    transactions: List[Dict[str, Any]]
+    transactions: List[Dict[str, Any]],
+    keywords: Optional[List[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Находит переводы физлицам.
     
     Args:
         transactions: Список транзакций
+        keywords: Ключевые слова (по умолчанию TRANSFER_KEYWORDS)
         
     Returns:
         Переводы физлицам
     """
     try:
-        transfer_keywords = ["перевод", "перевел", "перевод физ", "перевод част", "иванов", "петров"]
-        result = []
-        
-        for transaction in transactions:
-            description = str(transaction.get("Описание", "")).lower()
-            if any(keyword in description for keyword in transfer_keywords):
-                result.append(transaction)
+        matches = find_personal_transfer_keywords(transactions, keywords)
+        result = [transactions[row] for row in matches]
         
         logger.info(f"Найдено {len(result)} переводов физлицам")
         return result
@@ -169,3 +409,67 @@ def find_personal_transfers(
     except Exception as e:
         logger.error(f"Ошибка поиска переводов физлицам: {e}")
         return []
+
+
+@timed
+def batch_search_transactions(
+    transactions: List[Dict[str, Any]],
+    predicates: List[Predicate],
+    workers: int = 1,
+) -> Dict[Predicate, List[int]]:
+    """
+    Выполняет много поисковых запросов за один проход по транзакциям.
+    
+    Args:
+        transactions: Список транзакций
+        predicates: Предикаты вида ("substring", "такси"), ("regex", r"..."),
+            ("keywords", ("перевод", "иванов")), ("phone", None); набор слов
+            можно передать и списком - в ключах результата он будет кортежем
+        workers: Количество процессов для больших списков
+        
+    Returns:
+        Словарь предикат -> номера подходящих транзакций
+    """
+    try:
+        result = run_batch_queries(transactions, predicates, workers=workers)
+        
+        logger.info(f"Выполнено {len(result)} поисковых запросов за один проход")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Ошибка пакетного поиска транзакций: {e}")
+        return {}
+
+
+@timed
+def compare_cashback_programs(
+    transactions: List[Dict[str, Any]],
+    programs: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Сравнивает программы кешбэка по выплатам на истории расходов.
+    
+    Расходы один раз сворачиваются в ячейки месяц × категория × MCC,
+    после чего все программы считаются матричными операциями над ячейками.
+    Формат программ описан в модуле src.cashback.
+    
+    Args:
+        transactions: Список транзакций
+        programs: Список программ кешбэка
+        
+    Returns:
+        Программы по убыванию выплат с суммой, выплатами по месяцам и местом
+    """
+    try:
+        if not transactions or not programs:
+            return []
+        
+        cells = build_spend_cells(_spend_operations(transactions))
+        result = evaluate_programs(cells, programs)
+        
+        logger.info(f"Сравнено {len(programs)} программ кешбэка")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Ошибка сравнения программ кешбэка: {e}")
+        return []
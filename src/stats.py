@@ -0,0 +1,198 @@
+"""
+Модуль потоковой статистики по суммам операций.
+
+Статистика считается за один проход: среднее и дисперсия по алгоритму
+Уэлфорда, минимум и максимум, квантили через скетч KLL. Частичные
+накопители, посчитанные по разным частям данных, можно объединять.
+"""
+import math
+import random
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+DEFAULT_SKETCH_SIZE = 200
+
+
+class KLLSketch:
+    """
+    Объединяемый скетч квантилей KLL.
+
+    Пока элементов меньше размера скетча, квантили считаются точно,
+    дальше погрешность ранга составляет порядка 1/k.
+    """
+
+    def __init__(self, k: int = DEFAULT_SKETCH_SIZE, seed: Optional[int] = None) -> None:
+        self.k = k
+        self.compactors: List[List[float]] = []
+        self.size = 0
+        self.max_size = 0
+        self._random = random.Random(seed)
+        self._grow()
+
+    def _grow(self) -> None:
+        """Добавляет новый уровень компакторов."""
+        self.compactors.append([])
+        self.max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _capacity(self, height: int) -> int:
+        """Возвращает вместимость уровня height."""
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def _compress(self) -> None:
+        """Сжимает первый переполненный уровень в следующий."""
+        for height, items in enumerate(self.compactors):
+            if len(items) >= self._capacity(height):
+                if height + 1 >= len(self.compactors):
+                    self._grow()
+                items.sort()
+                offset = self._random.randint(0, 1)
+                # Нечетный остаток остается на текущем уровне
+                keep = items[-1:] if len(items) % 2 else []
+                paired = items[:len(items) - len(keep)]
+                self.compactors[height + 1].extend(paired[offset::2])
+                self.compactors[height] = keep
+                self.size = sum(len(c) for c in self.compactors)
+                return
+
+    def update(self, value: float) -> None:
+        """Добавляет значение в скетч."""
+        self.compactors[0].append(value)
+        self.size += 1
+        if self.size >= self.max_size:
+            self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        """Объединяет скетч с другим скетчем."""
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for height, items in enumerate(other.compactors):
+            self.compactors[height].extend(items)
+        self.size = sum(len(c) for c in self.compactors)
+        while self.size >= self.max_size:
+            self._compress()
+
+    def _weighted_items(self) -> List[Tuple[float, int]]:
+        """Возвращает отсортированные пары (значение, вес)."""
+        items = [
+            (value, 2 ** height)
+            for height, values in enumerate(self.compactors)
+            for value in values
+        ]
+        items.sort()
+        return items
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        """
+        Возвращает квантили методом ближайшего ранга.
+
+        Args:
+            qs: Уровни квантилей от 0 до 1
+
+        Returns:
+            Список значений квантилей (None для пустого скетча)
+        """
+        items = self._weighted_items()
+        total = sum(weight for _, weight in items)
+        if not total:
+            return [None for _ in qs]
+
+        result = []
+        for q in qs:
+            target = max(1, math.ceil(q * total))
+            cumulative = 0
+            value = items[-1][0]
+            for item, weight in items:
+                cumulative += weight
+                if cumulative >= target:
+                    value = item
+                    break
+            result.append(value)
+        return result
+
+
+class StreamingStats:
+    """
+    Накопитель описательной статистики за один проход.
+
+    Attributes:
+        count: Количество значений
+        total: Сумма значений
+        mean: Среднее значение
+        min: Минимальное значение
+        max: Максимальное значение
+        sketch: Скетч квантилей
+    """
+
+    def __init__(self, sketch_size: int = DEFAULT_SKETCH_SIZE) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.sketch = KLLSketch(sketch_size)
+
+    def update(self, value: float) -> None:
+        """Добавляет значение в накопитель."""
+        value = float(value)
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+        self.sketch.update(value)
+
+    def update_many(self, values: Iterable[float]) -> "StreamingStats":
+        """Добавляет последовательность значений и возвращает накопитель."""
+        for value in values:
+            self.update(value)
+        return self
+
+    def merge(self, other: "StreamingStats") -> "StreamingStats":
+        """
+        Объединяет накопитель с накопителем по другой части данных.
+
+        Args:
+            other: Другой накопитель
+
+        Returns:
+            Этот же накопитель после объединения
+        """
+        if not other.count:
+            return self
+        if not self.count:
+            self.mean = other.mean
+            self._m2 = other._m2
+        else:
+            count = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / count
+            self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None or other.min < self.min else self.min
+        self.max = other.max if self.max is None or other.max > self.max else self.max
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def variance(self) -> float:
+        """Выборочная дисперсия."""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Возвращает статистику в формате calculate_statistics."""
+        p50, p90, p99 = self.sketch.quantiles([0.5, 0.9, 0.99])
+        return {
+            "total_count": self.count,
+            "total_amount": self.total,
+            "avg_amount": self.mean if self.count else 0,
+            "min_amount": self.min if self.count else 0,
+            "max_amount": self.max if self.count else 0,
+            "std_amount": math.sqrt(self.variance),
+            "median_amount": p50 if self.count else 0,
+            "p90_amount": p90 if self.count else 0,
+            "p99_amount": p99 if self.count else 0,
+        }
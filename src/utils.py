@@ -1,18 +1,26 @@
-﻿import pandas as pd
+﻿import numpy as np
+import pandas as pd
 import logging
-import json
 import os
+import re
 import requests
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 
+from src.cube import INCOME_CATEGORIES, get_cube
+from src.indexes import DateIndex, get_cached_index, parse_dates, spend_mask
+from src.metrics import add_bytes, timed
+from src.report_formats import report_extension, write_report
+from src.stats import StreamingStats
+
 # Загрузка переменных окружения
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 
+@timed
 def get_exchange_rates() -> Dict[str, float]:
     """
     Получает курсы валют от Центробанка России.
@@ -45,6 +53,7 @@ def get_exchange_rates() -> Dict[str, float]:
         }
 
 
+@timed
 def get_stock_prices() -> Dict[str, float]:
     """
     Получает цены акций из S&P500 через Yahoo Finance API.
@@ -96,6 +105,66 @@ def get_stock_prices() -> Dict[str, float]:
         }
 
 
+@timed
+def summarize_expenses(category_totals: pd.Series) -> Dict[str, Any]:
+    """
+    Формирует анализ расходов по суммам категорий.
+
+    Args:
+        category_totals: Series категория -> сумма расходов
+
+    Returns:
+        Словарь с анализом расходов
+    """
+    total_expenses = category_totals.sum()
+
+    # Сортируем по убыванию
+    sorted_categories = category_totals.sort_values(ascending=False)
+
+    # Берем топ-7 категорий
+    top_categories = []
+    for i, (category, amount) in enumerate(sorted_categories.head(7).items()):
+        top_categories.append({
+            "category": str(category),
+            "amount": float(amount),
+            "percentage": round((amount / total_expenses * 100), 2) if total_expenses > 0 else 0,
+        })
+
+    # Суммируем остальные категории
+    other_amount = sorted_categories.iloc[7:].sum() if len(sorted_categories) > 7 else 0
+
+    # Категории "Переводы" и "Наличные"
+    transfers_cash = []
+    for category in ["Переводы", "Наличные"]:
+        if category in sorted_categories.index:
+            transfers_cash.append({
+                "category": category,
+                "amount": float(sorted_categories[category]),
+            })
+
+    # Сортируем переводы и наличные по убыванию
+    transfers_cash.sort(key=lambda x: x["amount"], reverse=True)
+
+    result = {
+        "total": float(total_expenses),
+        "main_categories": top_categories,
+        "transfers_cash": transfers_cash,
+    }
+
+    # Добавляем other_categories только если есть остальные категории
+    if other_amount > 0:
+        result["other_categories"] = {
+            "category": "Остальное",
+            "amount": float(other_amount),
+            "percentage": round((other_amount / total_expenses * 100), 2) if total_expenses > 0 else 0,
+        }
+    else:
+        result["other_categories"] = None
+
+    return result
+
+
+@timed
 def analyze_expenses(df: pd.DataFrame) -> dict:
     """
     Анализирует расходы из DataFrame.
@@ -130,8 +199,8 @@ def analyze_expenses(df: pd.DataFrame) -> dict:
                 "transfers_cash": [],
             }
 
-        # Фильтруем расходы (положительные суммы)
-        expenses_df = df[df[amount_column] > 0].copy()
+        # Фильтруем расходы по общему правилу spend_mask (положительные суммы)
+        expenses_df = df[spend_mask(df[amount_column])].copy()
 
         if expenses_df.empty:
             return {
@@ -146,52 +215,7 @@ def analyze_expenses(df: pd.DataFrame) -> dict:
             expenses_df['Категория'] = 'Без категории'
 
         category_totals = expenses_df.groupby('Категория')[amount_column].sum()
-        total_expenses = category_totals.sum()
-
-        # Сортируем по убыванию
-        sorted_categories = category_totals.sort_values(ascending=False)
-
-        # Берем топ-7 категорий
-        top_categories = []
-        for i, (category, amount) in enumerate(sorted_categories.head(7).items()):
-            top_categories.append({
-                "category": str(category),
-                "amount": float(amount),
-                "percentage": round((amount / total_expenses * 100), 2) if total_expenses > 0 else 0,
-            })
-
-        # Суммируем остальные категории
-        other_amount = sorted_categories.iloc[7:].sum() if len(sorted_categories) > 7 else 0
-
-        # Категории "Переводы" и "Наличные"
-        transfers_cash = []
-        for category in ["Переводы", "Наличные"]:
-            if category in sorted_categories.index:
-                transfers_cash.append({
-                    "category": category,
-                    "amount": float(sorted_categories[category]),
-                })
-
-        # Сортируем переводы и наличные по убыванию
-        transfers_cash.sort(key=lambda x: x["amount"], reverse=True)
-
-        result = {
-            "total": float(total_expenses),
-            "main_categories": top_categories,
-            "transfers_cash": transfers_cash,
-        }
-
-        # Добавляем other_categories только если есть остальные категории
-        if other_amount > 0:
-            result["other_categories"] = {
-                "category": "Остальное",
-                "amount": float(other_amount),
-                "percentage": round((other_amount / total_expenses * 100), 2) if total_expenses > 0 else 0,
-            }
-        else:
-            result["other_categories"] = None
-
-        return result
+        return summarize_expenses(category_totals)
 
     except Exception as e:
         logger.error(f"Ошибка анализа расходов: {e}")
@@ -203,6 +227,37 @@ def analyze_expenses(df: pd.DataFrame) -> dict:
         }
 
 
+@timed
+def summarize_incomes(category_totals: pd.Series) -> Dict[str, Any]:
+    """
+    Формирует анализ поступлений по суммам категорий.
+
+    Args:
+        category_totals: Series категория -> сумма поступлений
+
+    Returns:
+        Словарь с анализом поступлений
+    """
+    total_income = category_totals.sum()
+
+    # Сортируем по убыванию
+    sorted_categories = category_totals.sort_values(ascending=False)
+
+    main_categories = []
+    for category, amount in sorted_categories.items():
+        main_categories.append({
+            "category": str(category),
+            "amount": float(amount),
+            "percentage": round((amount / total_income * 100), 2) if total_income > 0 else 0,
+        })
+
+    return {
+        "total": float(total_income),
+        "main_categories": main_categories,
+    }
+
+
+@timed
 def analyze_incomes(df: pd.DataFrame) -> Dict[str, Any]:
     """
     Анализирует поступления по категориям.
@@ -234,8 +289,7 @@ def analyze_incomes(df: pd.DataFrame) -> Dict[str, Any]:
 
         # Если нет отрицательных, ищем определенные категории
         if incomes_df.empty and 'Категория' in df.columns:
-            income_categories = ['Пополнение', 'Зачисление', 'Возврат', 'Начисление', 'Доход', 'Зарплата']
-            mask = df['Категория'].astype(str).str.contains('|'.join(income_categories), case=False, na=False)
+            mask = df['Категория'].astype(str).str.contains('|'.join(INCOME_CATEGORIES), case=False, na=False)
             incomes_df = df[mask & (df[amount_column] > 0)].copy()
 
         if incomes_df.empty:
@@ -252,35 +306,51 @@ def analyze_incomes(df: pd.DataFrame) -> Dict[str, Any]:
             incomes_df['income_amount'] = incomes_df[amount_column]
 
         category_totals = incomes_df.groupby('Категория')['income_amount'].sum()
-        total_income = category_totals.sum()
-
-        # Сортируем по убыванию
-        sorted_categories = category_totals.sort_values(ascending=False)
-
-        main_categories = []
-        for category, amount in sorted_categories.items():
-            main_categories.append({
-                "category": str(category),
-                "amount": float(amount),
-                "percentage": round((amount / total_income * 100), 2) if total_income > 0 else 0,
-            })
-
-        return {
-            "total": float(total_income),
-            "main_categories": main_categories,
-        }
+        return summarize_incomes(category_totals)
 
     except Exception as e:
         logger.error(f"Ошибка анализа поступлений: {e}")
         return {"total": 0, "main_categories": []}
 
 
-def analyze_cards(df: pd.DataFrame) -> List[Dict[str, Any]]:
+@timed
+def summarize_cards(card_totals: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Формирует данные по картам из сумм расходов и кешбэка.
+
+    Args:
+        card_totals: DataFrame со столбцами card, amount, cashback
+
+    Returns:
+        Список с данными по картам
+    """
+    result = []
+    for card, amount, cashback in zip(card_totals["card"], card_totals["amount"], card_totals["cashback"]):
+        if not isinstance(card, str) or not card:
+            continue
+
+        total_spent = float(amount)
+        # Рассчитываем дополнительный кешбэк: 1 рубль на каждые 100 рублей
+        calculated_cashback = total_spent / 100
+        result.append({
+            "card_last_four": card,
+            "total_spent": total_spent,
+            "cashback_amount": float(cashback),
+            "calculated_cashback": calculated_cashback,
+            "total_cashback": float(cashback) + calculated_cashback,
+        })
+
+    return result
+
+
+@timed
+def analyze_cards(df: pd.DataFrame, fingerprint: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Анализирует данные по картам.
 
     Args:
         df: DataFrame с транзакциями
+        fingerprint: Отпечаток df, вычисленный при загрузке (None - вычислить)
 
     Returns:
         Список с данными по картам
@@ -291,49 +361,14 @@ def analyze_cards(df: pd.DataFrame) -> List[Dict[str, Any]]:
         if not all(col in df.columns for col in required_columns):
             return []
 
-        # Группируем по картам
-        cards_summary = {}
-
-        for _, row in df.iterrows():
-            card_number = str(row.get('Номер карты', '')).strip()
-            if not card_number:
-                continue
-
-            # Берем последние 4 цифры
-            last_four = card_number[-4:] if len(card_number) >= 4 else card_number
-
-            amount = float(row.get('Сумма операции', 0))
-            # Расходы - положительные суммы
-            if amount <= 0:
-                continue
-
-            cashback = float(row.get('Кешбэк', 0))
-
-            if last_four not in cards_summary:
-                cards_summary[last_four] = {
-                    "card_last_four": last_four,
-                    "total_spent": 0.0,
-                    "cashback_amount": 0.0,
-                }
-
-            cards_summary[last_four]["total_spent"] += amount
-            cards_summary[last_four]["cashback_amount"] += cashback
-
-        # Рассчитываем дополнительный кешбэк: 1 рубль на каждые 100 рублей
-        result = []
-        for card_data in cards_summary.values():
-            calculated_cashback = card_data["total_spent"] / 100
-            card_data["calculated_cashback"] = calculated_cashback
-            card_data["total_cashback"] = card_data["cashback_amount"] + calculated_cashback
-            result.append(card_data)
-
-        return result
+        return summarize_cards(get_cube(df, fingerprint=fingerprint).card_totals())
 
     except Exception as e:
         logger.error(f"Ошибка анализа карт: {e}")
         return []
 
 
+@timed
 def get_top_transactions(df: pd.DataFrame, limit: int = 5) -> List[Dict[str, Any]]:
     """
     Возвращает топ транзакций по сумме платежа.
@@ -376,6 +411,7 @@ def get_top_transactions(df: pd.DataFrame, limit: int = 5) -> List[Dict[str, Any
         return []
 
 
+@timed
 def get_time_based_greeting() -> str:
     """
     Возвращает приветствие в зависимости от времени суток.
@@ -395,6 +431,7 @@ def get_time_based_greeting() -> str:
         return "Доброй ночи"
 
 
+@timed(rows="output")
 def read_excel_file(file_path: str = "data/operations.xlsx") -> pd.DataFrame:
     """
     Читает Excel файл и возвращает DataFrame.
@@ -409,6 +446,7 @@ def read_excel_file(file_path: str = "data/operations.xlsx") -> pd.DataFrame:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Файл {file_path} не найден")
 
+        add_bytes(os.path.getsize(file_path))
         df = pd.read_excel(file_path)
         logger.info(f"Прочитан файл {file_path}. Строк: {len(df)}, Колонок: {len(df.columns)}")
         return df
@@ -418,6 +456,7 @@ def read_excel_file(file_path: str = "data/operations.xlsx") -> pd.DataFrame:
         raise
 
 
+@timed(rows="output")
 def load_transactions(filepath: str = "data/operations.xlsx") -> List[Dict[str, Any]]:
     """
     Загружает транзакции из Excel файла.
@@ -436,23 +475,36 @@ def load_transactions(filepath: str = "data/operations.xlsx") -> List[Dict[str,
         logger.error(f"Ошибка загрузки транзакций: {e}")
         return []
 
-def save_report(report_data: Dict[str, Any], filename_prefix: str) -> str:
+@timed
+def save_report(
+    report_data: Dict[str, Any],
+    filename_prefix: str,
+    fmt: Optional[str] = None,
+    output_dir: Optional[str] = None,
+) -> str:
     """
-    Сохраняет отчет в JSON файл.
+    Сохраняет отчет в файл.
+
+    Файл пишется атомарно: сначала во временный файл, затем переименовывается.
 
     Args:
         report_data: Данные отчета
         filename_prefix: Префикс имени файла
+        fmt: Формат из REPORT_FORMATS (по умолчанию REPORT_FORMAT из окружения или json)
+        output_dir: Каталог для отчетов (по умолчанию REPORTS_DIR из окружения или текущий)
 
     Returns:
         Путь к сохраненному файлу
     """
     try:
+        fmt = fmt or os.getenv("REPORT_FORMAT", "json")
+        output_dir = output_dir or os.getenv("REPORTS_DIR", ".")
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{filename_prefix}_{timestamp}.json"
+        filename = os.path.join(output_dir, f"{filename_prefix}_{timestamp}{report_extension(fmt)}")
+        if output_dir == ".":
+            filename = os.path.basename(filename)
 
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, ensure_ascii=False, indent=2)
+        write_report(report_data, filename, fmt)
 
         logger.info(f"Отчет сохранен в файл: {filename}")
         return filename
@@ -462,9 +514,13 @@ def save_report(report_data: Dict[str, Any], filename_prefix: str) -> str:
         return ""
 
 
+@timed
 def calculate_statistics(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
-    Рассчитывает базовую статистику по транзакциям.
+    Рассчитывает статистику по транзакциям за один проход.
+
+    Помимо общей статистики возвращает ту же статистику по категориям
+    и по месяцам в ключах by_category и by_month.
 
     Args:
         transactions: Список транзакций
@@ -482,21 +538,33 @@ def calculate_statistics(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
                 "max_amount": 0,
             }
 
-        amounts = [t.get("Сумма операции", 0) for t in transactions]
+        months = parse_dates(t.get("Дата операции") for t in transactions).dt.to_period("M")
 
-        return {
-            "total_count": len(transactions),
-            "total_amount": sum(amounts),
-            "avg_amount": sum(amounts) / len(amounts) if amounts else 0,
-            "min_amount": min(amounts) if amounts else 0,
-            "max_amount": max(amounts) if amounts else 0,
-        }
+        overall = StreamingStats()
+        by_category: Dict[str, StreamingStats] = {}
+        by_month: Dict[str, StreamingStats] = {}
+
+        for transaction, month in zip(transactions, months):
+            amount = transaction.get("Сумма операции", 0)
+            overall.update(amount)
+
+            category = str(transaction.get("Категория", "Без категории"))
+            by_category.setdefault(category, StreamingStats()).update(amount)
+
+            if not pd.isna(month):
+                by_month.setdefault(str(month), StreamingStats()).update(amount)
+
+        result = overall.to_dict()
+        result["by_category"] = {key: stats.to_dict() for key, stats in by_category.items()}
+        result["by_month"] = {key: stats.to_dict() for key, stats in sorted(by_month.items())}
+        return result
 
     except Exception as e:
         logger.error(f"Ошибка расчета статистики: {e}")
         return {}
 
 
+@timed
 def filter_by_date_range(
         transactions: List[Dict[str, Any]],
         start_date: Optional[str] = None,
@@ -519,15 +587,13 @@ def filter_by_date_range(
         if not transactions:
             return []
 
-        filtered = transactions.copy()
+        if not start_date and not end_date:
+            return transactions.copy()
 
-        if start_date:
-            start = pd.to_datetime(start_date)
-            filtered = [t for t in filtered if pd.to_datetime(t.get(date_column, '')) >= start]
-
-        if end_date:
-            end = pd.to_datetime(end_date)
-            filtered = [t for t in filtered if pd.to_datetime(t.get(date_column, '')) <= end]
+        index = get_cached_index(DateIndex, transactions, date_column)
+        # Сохраняем исходный порядок транзакций
+        positions = np.sort(index.range_positions(start_date, end_date))
+        filtered = [transactions[i] for i in positions]
 
         logger.info(f"Отфильтровано {len(filtered)} из {len(transactions)} транзакций")
         return filtered
@@ -537,6 +603,97 @@ def filter_by_date_range(
         return transactions
 
 
+@timed
+def filter_by_date_ranges(
+        transactions: List[Dict[str, Any]],
+        ranges: List[Tuple[Optional[str], Optional[str]]],
+        date_column: str = "Дата операции"
+) -> List[List[Dict[str, Any]]]:
+    """
+    Фильтрует транзакции сразу по нескольким диапазонам дат.
+
+    Args:
+        transactions: Список транзакций
+        ranges: Список пар (начальная дата, конечная дата)
+        date_column: Название колонки с датой
+
+    Returns:
+        Список отфильтрованных списков, по одному на каждый диапазон
+    """
+    try:
+        if not transactions:
+            return [[] for _ in ranges]
+
+        index = get_cached_index(DateIndex, transactions, date_column)
+        result = []
+        for (start, end), positions in zip(ranges, index.batch_range_positions(ranges)):
+            if not start and not end:
+                result.append(transactions.copy())
+            else:
+                result.append([transactions[i] for i in np.sort(positions)])
+
+        logger.info(f"Выполнена фильтрация по {len(ranges)} диапазонам дат")
+        return result
+
+    except Exception as e:
+        logger.error(f"Ошибка пакетной фильтрации по дате: {e}")
+        return [transactions for _ in ranges]
+
+
+@timed
+def parse_period(
+        period: Optional[str],
+        latest_month: Optional[pd.Period] = None
+) -> Tuple[Optional[pd.Period], Optional[pd.Period]]:
+    """
+    Разбирает описание периода в диапазон месяцев.
+
+    Поддерживаемые форматы:
+        "1/2024" или "2024-01" - один месяц
+        "1/2024 - 3/2024" или "2024-01..2024-03" - диапазон месяцев
+        "last 3" - последние N месяцев до latest_month включительно
+        "", "all" - вся история
+
+    Args:
+        period: Описание периода
+        latest_month: Последний месяц данных (для скользящего периода)
+
+    Returns:
+        Пара (первый месяц, последний месяц), None - без границы
+    """
+    text = (period or "").strip().lower()
+    if text in ("", "all"):
+        return None, None
+
+    rolling = re.fullmatch(r"last\s*(\d+)", text)
+    if rolling:
+        if latest_month is None:
+            raise ValueError("Нет данных для скользящего периода")
+        months = int(rolling.group(1))
+        if months < 1:
+            raise ValueError(f"Некорректный период: {period}")
+        return latest_month - (months - 1), latest_month
+
+    month_pattern = r"(\d{1,2})/(\d{4})|(\d{4})-(\d{1,2})"
+    tokens = list(re.finditer(month_pattern, text))
+    rest = re.sub(month_pattern, "", text).strip()
+    if len(tokens) not in (1, 2) or rest not in ("", "-", "..", "–"):
+        raise ValueError(f"Некорректный период: {period}")
+
+    bounds = []
+    for token in tokens:
+        month, year = (token.group(1), token.group(2)) if token.group(1) else (token.group(4), token.group(3))
+        if not 1 <= int(month) <= 12:
+            raise ValueError(f"Некорректный период: {period}")
+        bounds.append(pd.Period(year=int(year), month=int(month), freq="M"))
+
+    start, end = bounds[0], bounds[-1]
+    if start > end:
+        raise ValueError(f"Некорректный период: {period}")
+    return start, end
+
+
+@timed
 def format_amount(amount: float, currency: str = "RUB") -> str:
     """
     Форматирует сумму для вывода.
@@ -551,6 +708,7 @@ def format_amount(amount: float, currency: str = "RUB") -> str:
     return f"{amount:,.2f} {currency}".replace(",", " ").replace(".", ",")
 
 
+@timed(rows="output")
 def read_excel_file(file_path: str = "data/operations.xlsx") -> pd.DataFrame:
     """
     Читает Excel файл и возвращает DataFrame.
@@ -565,6 +723,7 @@ def read_excel_file(file_path: str = "data/operations.xlsx") -> pd.DataFrame:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Файл {file_path} не найден")
 
+        add_bytes(os.path.getsize(file_path))
         df = pd.read_excel(file_path)
         logger.info(f"Прочитан файл {file_path}. Строк: {len(df)}, Колонок: {len(df.columns)}")
         return df
@@ -574,6 +733,7 @@ def read_excel_file(file_path: str = "data/operations.xlsx") -> pd.DataFrame:
         raise
 
 
+@timed(rows="output")
 def load_transactions(filepath: str = "data/operations.xlsx") -> List[Dict[str, Any]]:
     """
     Загружает транзакции из Excel файла.
@@ -4,14 +4,16 @@
 """
 import logging
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import pandas as pd
+from src.cube import get_cube
+from src.metrics import timed
 from src.utils import (
     get_exchange_rates,
     get_stock_prices,
-    analyze_expenses,
-    analyze_incomes,
-    analyze_cards,
+    summarize_expenses,
+    summarize_incomes,
+    summarize_cards,
     get_top_transactions,
     get_time_based_greeting,
 )
@@ -19,12 +21,21 @@ from src.utils import (
 logger = logging.getLogger(__name__)
 
 
-def home_page(df: pd.DataFrame) -> Dict[str, Any]:
+@timed
+def home_page(
+    df: pd.DataFrame,
+    exchange_rates: Optional[Dict[str, float]] = None,
+    stock_prices: Optional[Dict[str, float]] = None,
+    fingerprint: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Генерирует данные для главной страницы.
 
     Args:
         df: DataFrame с транзакциями
+        exchange_rates: Уже полученные курсы валют (None - запросить)
+        stock_prices: Уже полученные цены акций (None - запросить)
+        fingerprint: Отпечаток df, вычисленный при загрузке (None - вычислить)
 
     Returns:
         JSON-ответ для главной страницы
@@ -34,16 +45,18 @@ def home_page(df: pd.DataFrame) -> Dict[str, Any]:
         greeting = get_time_based_greeting()
 
         # 2. Данные по картам
-        cards_data = analyze_cards(df)
+        cards_data = summarize_cards(get_cube(df, fingerprint=fingerprint).card_totals())
 
         # 3. Топ-5 транзакций по сумме платежа
         top_transactions = get_top_transactions(df, 5)
 
         # 4. Курс валют
-        exchange_rates = get_exchange_rates()
+        if exchange_rates is None:
+            exchange_rates = get_exchange_rates()
 
         # 5. Стоимость акций из S&P500
-        stock_prices = get_stock_prices()
+        if stock_prices is None:
+            stock_prices = get_stock_prices()
 
         result = {
             "page": "home",
@@ -69,13 +82,23 @@ def home_page(df: pd.DataFrame) -> Dict[str, Any]:
         }
 
 
-def events_page(df: pd.DataFrame, period: str = "M") -> Dict[str, Any]:
+@timed
+def events_page(
+    df: pd.DataFrame,
+    period: str = "M",
+    exchange_rates: Optional[Dict[str, float]] = None,
+    stock_prices: Optional[Dict[str, float]] = None,
+    fingerprint: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Генерирует данные для страницы событий.
 
     Args:
         df: DataFrame с транзакциями
         period: Период (D - день, W - неделя, M - месяц)
+        exchange_rates: Уже полученные курсы валют (None - запросить)
+        stock_prices: Уже полученные цены акций (None - запросить)
+        fingerprint: Отпечаток df, вычисленный при загрузке (None - вычислить)
 
     Returns:
         JSON-ответ для страницы событий
@@ -85,17 +108,21 @@ def events_page(df: pd.DataFrame, period: str = "M") -> Dict[str, Any]:
         period_names = {"D": "день", "W": "неделя", "M": "месяц"}
         period_name = period_names.get(period, "месяц")
 
+        cube = get_cube(df, fingerprint=fingerprint)
+
         # 1. Анализ расходов
-        expenses_analysis = analyze_expenses(df)
+        expenses_analysis = summarize_expenses(cube.expense_totals())
 
         # 2. Анализ поступлений
-        incomes_analysis = analyze_incomes(df)
+        incomes_analysis = summarize_incomes(cube.income_totals())
 
         # 3. Курс валют
-        exchange_rates = get_exchange_rates()
+        if exchange_rates is None:
+            exchange_rates = get_exchange_rates()
 
         # 4. Стоимость акций из S&P500
-        stock_prices = get_stock_prices()
+        if stock_prices is None:
+            stock_prices = get_stock_prices()
 
         # Для совместимости с тестами
         other_categories = expenses_analysis.get("other_categories")
@@ -0,0 +1,142 @@
+"""
+Тесты для модуля api.
+"""
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.api import DashboardAPI, MarketDataCache
+from src.daemon import DaemonSource
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Фикстура с источником данных по небольшому Excel файлу."""
+    path = tmp_path / "operations.xlsx"
+    pd.DataFrame([
+        {"Дата операции": pd.Timestamp("2024-01-05"), "Сумма операции": 100.0,
+         "Сумма платежа": 100.0, "Категория": "Супермаркеты", "Описание": "Магнит"},
+    ]).to_excel(path, index=False)
+    return DaemonSource(str(path), str(tmp_path / "cache"))
+
+
+async def _get(port, target):
+    """Отправляет GET-запрос и возвращает код ответа и JSON."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, body = raw.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def _run(api, scenario):
+    """Запускает сервер на свободном порту и выполняет сценарий."""
+    async def main():
+        server = await api.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(port)
+        finally:
+            server.close()
+            await server.wait_closed()
+            api.close()
+    return asyncio.run(main())
+
+
+@patch("src.utils.get_stock_prices", return_value={"AAPL": 185.2})
+@patch("src.utils.get_exchange_rates", return_value={"USD": 90.0})
+def test_pages_and_errors(mock_rates, mock_stocks, source):
+    """Тест страниц, ошибок маршрутизации и одного запроса рыночных данных."""
+    api = DashboardAPI(source, workers=2)
+
+    async def scenario(port):
+        pages = await asyncio.gather(*[_get(port, "/home") for _ in range(20)])
+        events = await _get(port, "/events?period=W")
+        missing = await _get(port, "/unknown")
+        bad_period = await _get(port, "/events?period=X")
+        return pages, events, missing, bad_period
+
+    pages, events, missing, bad_period = _run(api, scenario)
+
+    assert all(status == 200 for status, _ in pages)
+    assert pages[0][1]["exchange_rates"] == {"USD": 90.0}
+    assert events[0] == 200 and events[1]["period"] == "неделя"
+    assert missing[0] == 404
+    assert bad_period[0] == 400
+    assert api.market_data.fetches == 1
+    mock_rates.assert_called_once()
+
+
+def test_slow_upstream_does_not_block(source):
+    """Тест: медленный внешний сервис не задерживает ответы дольше срока."""
+    release = threading.Event()
+
+    def slow_rates():
+        release.wait(5)
+        return {"USD": 1.0}
+
+    api = DashboardAPI(source, market_data=MarketDataCache(deadline=0.2))
+
+    async def scenario(port):
+        started = time.monotonic()
+        status, body = await _get(port, "/home")
+        elapsed = time.monotonic() - started
+        release.set()
+        return status, body, elapsed
+
+    with patch("src.utils.get_exchange_rates", side_effect=slow_rates), \
+            patch("src.utils.get_stock_prices", return_value={}):
+        status, body, elapsed = _run(api, scenario)
+
+    assert status == 200
+    assert body["exchange_rates"] == {}
+    assert elapsed < 2
+
+
+def test_request_deadline(source):
+    """Тест ответа 504 при превышении срока выполнения запроса."""
+    api = DashboardAPI(source, request_deadline=0.2, market_data=MarketDataCache())
+    api.market_data._fetched_at = time.monotonic()
+
+    def slow_render(*args):
+        time.sleep(1)
+        return {}
+
+    async def scenario(port):
+        return await _get(port, "/events")
+
+    with patch.object(api, "_render", side_effect=slow_render):
+        status, body = _run(api, scenario)
+    assert status == 504
+    assert body["status"] == "error"
+
+
+@patch("src.utils.get_stock_prices", return_value={})
+@patch("src.utils.get_exchange_rates", return_value={})
+def test_metrics_endpoint(mock_rates, mock_stocks, source):
+    """Тест выгрузки метрик этапов в формате Prometheus и в JSON."""
+    api = DashboardAPI(source)
+
+    async def scenario(port):
+        await _get(port, "/home")
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\n\r\n")
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+        return raw, await _get(port, "/metrics?format=json")
+
+    raw, (status, snapshot) = _run(api, scenario)
+    head, _, text = raw.partition(b"\r\n\r\n")
+
+    assert b"200 OK" in head and b"text/plain; version=0.0.4" in head
+    assert b'bank_stage_calls_total{stage="views.home_page"}' in text
+    assert status == 200
+    assert snapshot["views.home_page"]["calls"] >= 1
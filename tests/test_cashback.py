@@ -0,0 +1,58 @@
+"""
+Тесты для модуля cashback.
+"""
+import pandas as pd
+import pytest
+from src.cashback import build_spend_cells, evaluate_programs
+
+
+@pytest.fixture
+def spend_cells():
+    """Фикстура с ячейками расходов за два месяца."""
+    spend = pd.DataFrame({
+        "amount": [1000.0, 2000.0, 500.0, 4000.0, 300.0],
+        "month": ["2024-01", "2024-01", "2024-01", "2024-02", None],
+        "category": ["Супермаркеты", "Рестораны", "Супермаркеты", "Рестораны", "Транспорт"],
+        "mcc": [5411, 5812, 5411, 5812, 4121],
+    })
+    return build_spend_cells(spend)
+
+
+def test_build_spend_cells(spend_cells):
+    """Тест свертки расходов без операций без даты."""
+    assert len(spend_cells) == 3
+    assert spend_cells["amount"].sum() == 7500.0
+
+
+def test_evaluate_programs_rates_and_multipliers(spend_cells):
+    """Тест базовой ставки, множителей категорий и MCC."""
+    programs = [
+        {"name": "base", "base_rate": 1},
+        {"name": "supermarkets", "base_rate": 1, "category_multipliers": {"Супермаркеты": 5}},
+        {"name": "restaurants", "base_rate": 1, "category_multipliers": {"Рестораны": 2}, "mcc_multipliers": {5812: 3}},
+    ]
+    result = {item["name"]: item for item in evaluate_programs(spend_cells, programs)}
+
+    assert result["base"]["payout"] == 75.0
+    assert result["supermarkets"]["months"] == {"2024-01": 95.0, "2024-02": 40.0}
+    assert result["restaurants"]["payout"] == 195.0
+    assert result["restaurants"]["rank"] == 1
+
+
+def test_evaluate_programs_tiers_and_caps(spend_cells):
+    """Тест уровней ставок по расходам месяца и месячного лимита."""
+    programs = [
+        {"name": "tiered", "base_rate": 1, "tiers": [{"min_monthly_spend": 4000, "rate": 2}]},
+        {"name": "capped", "base_rate": 10, "monthly_cap": 300},
+    ]
+    result = {item["name"]: item for item in evaluate_programs(spend_cells, programs)}
+
+    assert result["tiered"]["months"] == {"2024-01": 35.0, "2024-02": 80.0}
+    assert result["capped"]["months"] == {"2024-01": 300.0, "2024-02": 300.0}
+    assert result["capped"]["capped_months"] == 2
+
+
+def test_evaluate_programs_requires_name(spend_cells):
+    """Тест ошибки для программы без имени."""
+    with pytest.raises(ValueError):
+        evaluate_programs(spend_cells, [{"base_rate": 1}])
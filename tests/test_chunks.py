@@ -0,0 +1,120 @@
+"""
+Тесты для модуля chunks.
+"""
+import glob
+import os
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.chunks import (
+    build_cube_from_chunks,
+    chunk_rows_for_budget,
+    frame_from_rows,
+    iter_cached_chunks,
+    iter_excel_chunks,
+    prune_segment_cache,
+)
+from src.cube import SpendingCube
+from src.reports import run_report_batch, run_report_batch_from_file
+
+
+@pytest.fixture
+def excel_file(tmp_path):
+    """Фикстура с Excel файлом, где номер карты пропущен в одной из частей."""
+    rows = []
+    for i in range(30):
+        rows.append({
+            "Дата операции": pd.Timestamp("2024-01-01") + pd.Timedelta(hours=13 * i),
+            "Номер карты": None if i == 25 else 1000 + i % 3,
+            "Сумма операции": round(10.1 * (i + 1), 2),
+            "Кешбэк": 1.5,
+            "Категория": ["Супермаркеты", "Такси", "Рестораны"][i % 3],
+        })
+    path = tmp_path / "operations.xlsx"
+    pd.DataFrame(rows).to_excel(path, index=False)
+    return str(path)
+
+
+def _without_timestamp(reports):
+    """Убирает время генерации для сравнения отчетов."""
+    return [{k: v for k, v in r.items() if k != "generated_at"} for r in reports]
+
+
+@patch("src.chunks.PROBE_ROWS", 4)
+def test_chunked_cube_matches_full_build(excel_file, tmp_path):
+    """Тест: куб по частям совпадает с кубом по всему файлу, кеш переиспользуется."""
+    chunks = list(iter_cached_chunks(excel_file, memory_budget_mb=0.001, cache_dir=str(tmp_path / "cache")))
+    assert len(chunks) > 2
+    assert sum(len(chunk) for chunk in chunks) == 30
+
+    full = SpendingCube.from_dataframe(pd.read_excel(excel_file))
+    assert build_cube_from_chunks(iter(chunks)).equals(full)
+
+    segments = glob.glob(str(tmp_path / "cache" / "*" / "part-*.pkl"))
+    assert len(segments) == len(chunks)
+    with patch("src.chunks.iter_excel_chunks") as mock_excel:
+        cached = list(iter_cached_chunks(excel_file, memory_budget_mb=0.001, cache_dir=str(tmp_path / "cache")))
+    mock_excel.assert_not_called()
+    assert pd.concat(cached).equals(pd.concat(chunks))
+
+
+@patch("src.chunks.PROBE_ROWS", 4)
+def test_reports_from_file_match_in_memory(excel_file, tmp_path):
+    """Тест: отчеты по частям совпадают с отчетами по списку транзакций."""
+    specs = [
+        {"name": "categories"},
+        {"name": "weekday", "params": {"include_hours": True, "include_categories": True}},
+        {"name": "workday"},
+    ]
+    transactions = pd.read_excel(excel_file).to_dict("records")
+    expected = run_report_batch(transactions, specs, save=False)
+    reports = run_report_batch_from_file(
+        excel_file, specs, memory_budget_mb=0.001, cache_dir=str(tmp_path / "cache"), save=False
+    )
+    assert _without_timestamp(reports) == _without_timestamp(expected)
+
+
+def test_segments_follow_memory_budget(excel_file, tmp_path):
+    """Тест: кеш другого бюджета не переиспользуется, пробная часть не больше бюджета."""
+    cache_dir = str(tmp_path / "cache")
+    large = [len(chunk) for chunk in iter_cached_chunks(excel_file, 256, cache_dir)]
+    with patch("src.chunks.chunk_rows_for_budget", return_value=7):
+        small = [len(chunk) for chunk in iter_cached_chunks(excel_file, 0.5, cache_dir)]
+        uncached = [len(chunk) for chunk in iter_cached_chunks(excel_file, 0.5, None)]
+
+    assert large == [30]
+    assert small == uncached == [7, 7, 7, 7, 2]
+    assert len(glob.glob(str(tmp_path / "cache" / "segments_*"))) == 2
+
+
+def test_chunk_rows_for_budget():
+    """Тест размера части по бюджету памяти."""
+    sample = pd.DataFrame({"value": range(1000)})
+    assert chunk_rows_for_budget(sample, 1) > chunk_rows_for_budget(sample, 0.1) >= 1
+
+
+def test_prune_segment_cache(excel_file, tmp_path):
+    """Тест: на диске остаются только последние использованные колоночные кеши."""
+    cache_dir = str(tmp_path / "cache")
+    for budget in (1, 2, 3):
+        list(iter_cached_chunks(excel_file, budget, cache_dir))
+    assert len(glob.glob(os.path.join(cache_dir, "segments_*"))) == 2
+
+    os.makedirs(os.path.join(cache_dir, "segments_partial"))
+    assert prune_segment_cache(cache_dir, keep=1) == 1
+    assert len(glob.glob(os.path.join(cache_dir, "segments_*", "complete"))) == 1
+    assert os.path.isdir(os.path.join(cache_dir, "segments_partial"))
+
+
+def test_frame_from_rows_matches_read_excel(excel_file):
+    """Тест: части листа имеют те же значения и типы, что и pandas.read_excel."""
+    expected = pd.read_excel(excel_file)
+    chunk = next(iter_excel_chunks(excel_file))
+
+    pd.testing.assert_frame_equal(chunk, expected)
+    frame = frame_from_rows([["1", "a", None], ["2", None, 3]], ["x", "y", "z"])
+    assert frame["x"].tolist() == [1, 2]
+    assert frame["y"].isna().tolist() == [False, True]
+    assert frame["z"].isna().tolist() == [True, False]
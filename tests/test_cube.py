@@ -0,0 +1,106 @@
+"""
+Тесты для модуля cube.
+"""
+import os
+import pandas as pd
+import pytest
+from src.cube import CUBE_VERSION, SpendingCube, card_suffixes, dataset_fingerprint, get_cube, prune_cube_cache
+
+
+@pytest.fixture
+def sample_dataframe():
+    """Фикстура с транзакциями за два месяца."""
+    return pd.DataFrame({
+        "Дата операции": ["2024-01-01", "2024-01-06", "2024-02-05", "2024-02-06"],
+        "Номер карты": ["1111222233334444", "5555", "5555", "1111222233334444"],
+        "Сумма операции": [100.0, 200.0, -1000.0, 300.0],
+        "Кешбэк": [1.0, 2.0, 0.0, 3.0],
+        "Категория": ["Супермаркеты", "Рестораны", "Зарплата", "Супермаркеты"],
+    })
+
+
+def test_cube_rollup_by_month(sample_dataframe):
+    """Тест свертки по месяцам с фильтром по категории."""
+    cube = SpendingCube.from_dataframe(sample_dataframe)
+    months = cube.rollup(["month"], category="Супермаркеты").set_index("month")
+    assert months["amount"].to_dict() == {"2024-01": 100.0, "2024-02": 300.0}
+    assert months["count"].to_dict() == {"2024-01": 1, "2024-02": 1}
+
+
+def test_cube_rollup_by_day_type(sample_dataframe):
+    """Тест свертки по типу дня."""
+    cube = SpendingCube.from_dataframe(sample_dataframe)
+    day_types = cube.rollup(["day_type"]).set_index("day_type")
+    assert day_types.loc["Выходной", "amount"] == 200.0
+    assert day_types.loc["Рабочий день", "count"] == 3
+
+
+def test_cube_category_and_card_totals(sample_dataframe):
+    """Тест сумм расходов, поступлений и данных по картам."""
+    cube = SpendingCube.from_dataframe(sample_dataframe)
+    assert cube.expense_totals().to_dict() == {"Супермаркеты": 400.0, "Рестораны": 200.0}
+    assert cube.income_totals().to_dict() == {"Зарплата": 1000.0}
+    cards = cube.card_totals().set_index("card")
+    assert cards.loc["4444", "amount"] == 400.0
+    assert cards.loc["4444", "cashback"] == 4.0
+
+
+def test_cube_without_dates():
+    """Тест построения куба без столбцов даты и категории."""
+    cube = SpendingCube.from_dataframe(pd.DataFrame({"Сумма операции": [10.0, -5.0]}))
+    assert cube.expense_totals().to_dict() == {"Без категории": 10.0}
+    assert cube.income_totals().to_dict() == {"Поступления": 5.0}
+
+
+def test_get_cube_persists_by_fingerprint(sample_dataframe, tmp_path):
+    """Тест сохранения куба в каталог кеша по отпечатку данных."""
+    cube = get_cube(sample_dataframe, cache_dir=str(tmp_path))
+    fingerprint = dataset_fingerprint(sample_dataframe)
+
+    assert (tmp_path / f"cube_v{CUBE_VERSION}_{fingerprint}.pkl").exists()
+    assert get_cube(sample_dataframe.copy(), cache_dir=str(tmp_path)) is cube
+    loaded = SpendingCube.load(str(tmp_path / f"cube_v{CUBE_VERSION}_{fingerprint}.pkl"))
+    assert loaded.cells["amount"].sum() == cube.cells["amount"].sum()
+
+
+def test_prune_cube_cache(tmp_path):
+    """Тест удаления кубов старых версий и сверх лимита."""
+    for i in range(5):
+        path = tmp_path / f"cube_v{CUBE_VERSION}_{i}.pkl"
+        path.write_bytes(b"")
+        os.utime(path, (i, i))
+    (tmp_path / "cube_old.pkl").write_bytes(b"")
+    (tmp_path / "transactions_1.pkl").write_bytes(b"")
+
+    assert prune_cube_cache(str(tmp_path), keep=2) == 4
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        f"cube_v{CUBE_VERSION}_3.pkl", f"cube_v{CUBE_VERSION}_4.pkl", "transactions_1.pkl",
+    ]
+
+
+def test_get_cube_memory_only_by_default(sample_dataframe, tmp_path, monkeypatch):
+    """Тест: без каталога кеша куб не пишется на диск."""
+    monkeypatch.chdir(tmp_path)
+    get_cube(sample_dataframe.assign(extra=1))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cube_merge_equals_full_build(sample_dataframe):
+    """Тест: объединение кубов по частям совпадает с кубом по всем данным."""
+    full = SpendingCube.from_dataframe(sample_dataframe)
+    head = SpendingCube.from_dataframe(sample_dataframe.iloc[:2])
+    tail = SpendingCube.from_dataframe(sample_dataframe.iloc[2:])
+
+    merged = head.merge(tail)
+    assert merged.equals(full)
+    assert not head.equals(full)
+
+    with pytest.raises(ValueError):
+        head.merge(SpendingCube.from_dataframe(pd.DataFrame({"amount": [1.0]})))
+
+
+def test_card_suffixes_ignore_float_dtype():
+    """Тест: номера карт с пропусками дают те же суффиксы, что и без пропусков."""
+    assert card_suffixes(pd.Series([11234, 5678])).tolist() == ["1234", "5678"]
+    assert card_suffixes(pd.Series([11234, None])).tolist() == ["1234", "nan"]
+    assert card_suffixes(pd.Series(["*7197", " 1234 "])).tolist() == ["7197", "1234"]
@@ -0,0 +1,196 @@
+"""
+Тесты для модуля daemon.
+"""
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.daemon import DaemonSource, ReportDaemon, request
+
+
+def _write_data(path, description):
+    """Записывает Excel файл с одной транзакцией."""
+    pd.DataFrame([{
+        "Дата операции": pd.Timestamp("2024-01-05"),
+        "Сумма операции": 100.0,
+        "Категория": "Супермаркеты",
+        "Описание": description,
+    }]).to_excel(path, index=False)
+
+
+@pytest.fixture
+def running_daemon(tmp_path):
+    """Фикстура с демоном, запущенным в отдельном потоке."""
+    data_file = str(tmp_path / "operations.xlsx")
+    _write_data(data_file, "Магнит")
+    source = DaemonSource(data_file, str(tmp_path / "cache"))
+    source._market_data = {"exchange_rates": {"USD": 90.0}, "stock_prices": {"AAPL": 185.2}}
+    source._market_data_at = time.monotonic()
+
+    daemon = ReportDaemon(source, str(tmp_path / "daemon.sock"))
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if os.path.exists(daemon.socket_path):
+            break
+        time.sleep(0.01)
+    yield daemon, data_file
+    daemon.shutdown()
+    thread.join(timeout=5)
+
+
+def test_daemon_answers_queries(running_daemon):
+    """Тест запросов к демону."""
+    daemon, _ = running_daemon
+    assert request("ping", socket_path=daemon.socket_path) == "pong"
+
+    found = request("search", {"query": "магнит"}, daemon.socket_path)
+    assert [t["Описание"] for t in found] == ["Магнит"]
+
+    home = request("home", socket_path=daemon.socket_path)
+    assert home["exchange_rates"] == {"USD": 90.0}
+
+    # Единственная транзакция - поступление, расходов нет
+    assert request("spend", {"start": "2024-01-01", "end": "2024-01-31"}, daemon.socket_path)["total"] == 100.0
+    assert daemon.source.spend_index() is not None
+
+    report = request("report", {"name": "workday", "save": False}, daemon.socket_path)
+    assert report["total"] == 100.0
+
+    with pytest.raises(ValueError):
+        request("report", {"name": "unknown"}, daemon.socket_path)
+
+
+def test_daemon_reloads_changed_file(running_daemon):
+    """Тест перечитывания файла данных после его изменения."""
+    daemon, data_file = running_daemon
+    assert request("search", {"query": "пятерочка"}, daemon.socket_path) == []
+
+    _write_data(data_file, "Пятерочка")
+    os.utime(data_file, ns=(time.time_ns(), time.time_ns() + 10**9))
+    found = request("search", {"query": "пятерочка"}, daemon.socket_path)
+
+    assert [t["Описание"] for t in found] == ["Пятерочка"]
+    assert daemon.source.reloads == 2
+
+
+def test_slow_market_data_does_not_block_other_commands(running_daemon):
+    """Тест: запрос рыночных данных для главной не задерживает поиск."""
+    daemon, _ = running_daemon
+    daemon.source._market_data = {}
+    release = threading.Event()
+
+    def slow_rates():
+        release.wait(5)
+        return {"USD": 1.0}
+
+    with patch("src.utils.get_exchange_rates", side_effect=slow_rates), \
+            patch("src.utils.get_stock_prices", return_value={}):
+        home = threading.Thread(target=request, args=("home", None, daemon.socket_path))
+        home.start()
+        time.sleep(0.1)
+        started = time.monotonic()
+        found = request("search", {"query": "магнит"}, daemon.socket_path)
+        elapsed = time.monotonic() - started
+        release.set()
+        home.join(timeout=5)
+
+    assert [t["Описание"] for t in found] == ["Магнит"]
+    assert elapsed < 1
+    assert daemon.source.market_data()["exchange_rates"] == {"USD": 1.0}
+
+
+def test_report_uses_loaded_frame_and_fingerprint(running_daemon):
+    """Тест: отчет в демоне не строит DataFrame и не хеширует данные заново."""
+    daemon, _ = running_daemon
+    assert daemon.source.fingerprint() is not None
+
+    with patch("src.reports.dataset_fingerprint") as mock_fingerprint, \
+            patch("src.reports.pd.DataFrame") as mock_frame:
+        report = request("report", {"name": "weekday", "save": False}, daemon.socket_path)
+
+    mock_fingerprint.assert_not_called()
+    mock_frame.assert_not_called()
+    assert "error" not in report
+
+
+def test_pages_use_loaded_fingerprint(running_daemon):
+    """Тест: страницы в демоне берут куб по отпечатку, вычисленному при загрузке."""
+    daemon, _ = running_daemon
+
+    with patch("src.utils.get_exchange_rates", return_value={}), \
+            patch("src.utils.get_stock_prices", return_value={}), \
+            patch("src.cube.dataset_fingerprint") as mock_fingerprint:
+        home = request("home", {}, daemon.socket_path)
+        events = request("events", {"period": "M"}, daemon.socket_path)
+
+    mock_fingerprint.assert_not_called()
+    assert home["status"] == "success"
+    assert events["expenses"]["total"] == 100.0
+
+
+def test_reload_applies_appended_rows_to_report_state(tmp_path):
+    """Тест: при дописывании файла состояние отчетов дополняется дельтой."""
+    data_file = str(tmp_path / "operations.xlsx")
+    cache_dir = str(tmp_path / "cache")
+    _write_data(data_file, "Магнит")
+    source = DaemonSource(data_file, cache_dir)
+    assert os.path.exists(os.path.join(cache_dir, "report_state.pkl"))
+
+    pd.DataFrame([
+        {"Дата операции": pd.Timestamp("2024-01-05"), "Сумма операции": 100.0,
+         "Категория": "Супермаркеты", "Описание": "Магнит"},
+        {"Дата операции": pd.Timestamp("2024-01-06"), "Сумма операции": 50.0,
+         "Категория": "Такси", "Описание": "Такси"},
+    ]).to_excel(data_file, index=False)
+    os.utime(data_file, ns=(time.time_ns(), time.time_ns() + 10**9))
+
+    with patch("src.reports.IncrementalReportState.rebuild") as mock_rebuild:
+        assert source.refresh()
+    mock_rebuild.assert_not_called()
+    assert source.report_state().row_count == 2
+    assert source.report_state().report("workday")["total"] == 150.0
+
+
+def test_pages_get_market_data_outside_lock(running_daemon):
+    """Тест: рыночные данные запрашиваются один раз и не под блокировкой команд."""
+    daemon, _ = running_daemon
+    calls = []
+
+    def market_data():
+        calls.append(daemon._lock.locked())
+        return {"exchange_rates": {"USD": 1.0}, "stock_prices": {}}
+
+    with patch.object(daemon.source, "market_data", side_effect=market_data):
+        home = request("home", {"_market_data": {"exchange_rates": {"USD": -1.0}}}, daemon.socket_path)
+
+    assert calls == [False]
+    assert home["exchange_rates"] == {"USD": 1.0}
+
+
+def test_second_daemon_refuses_running_socket(running_daemon, tmp_path):
+    """Тест: второй демон не занимает сокет работающего, а устаревший сокет заменяется."""
+    daemon, _ = running_daemon
+    with pytest.raises(RuntimeError):
+        ReportDaemon(daemon.source, daemon.socket_path).serve_forever()
+    assert request("ping", None, daemon.socket_path) == "pong"
+
+    stale_path = str(tmp_path / "stale.sock")
+    with open(stale_path, "w", encoding="utf-8"):
+        pass
+    stale = ReportDaemon(daemon.source, stale_path)
+    thread = threading.Thread(target=stale.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(100):
+        try:
+            if request("ping", None, stale_path) == "pong":
+                break
+        except OSError:
+            time.sleep(0.01)
+    stale.shutdown()
+    thread.join(timeout=5)
+    assert not os.path.exists(stale_path)
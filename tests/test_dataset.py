@@ -0,0 +1,47 @@
+"""
+Тесты для модуля dataset.
+"""
+from datetime import datetime
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.dataset import load_cached_transactions
+
+
+@pytest.fixture
+def excel_file(tmp_path):
+    """Фикстура с небольшим Excel файлом."""
+    path = tmp_path / "operations.xlsx"
+    pd.DataFrame([
+        {"Дата операции": pd.Timestamp("2024-01-05 10:00"), "Сумма операции": -100.5, "Описание": "Магнит"},
+        {"Дата операции": None, "Сумма операции": -20.0, "Описание": "Перевод"},
+    ]).to_excel(path, index=False)
+    return str(path)
+
+
+def test_cache_holds_plain_python_values(excel_file, tmp_path):
+    """Тест: кеш содержит только стандартные типы Python и читается без Excel."""
+    cache_dir = str(tmp_path / "cache")
+    transactions = load_cached_transactions(excel_file, cache_dir)
+
+    assert transactions[0]["Дата операции"] == datetime(2024, 1, 5, 10, 0)
+    assert type(transactions[0]["Дата операции"]) is datetime
+    assert transactions[1]["Дата операции"] is None
+    assert type(transactions[0]["Сумма операции"]) is float
+
+    with patch("src.utils.load_transactions") as mock_load:
+        cached = load_cached_transactions(excel_file, cache_dir)
+    mock_load.assert_not_called()
+    assert cached == transactions
+
+
+def test_cache_follows_file_version(excel_file, tmp_path):
+    """Тест: изменение файла приводит к повторному чтению."""
+    cache_dir = str(tmp_path / "cache")
+    load_cached_transactions(excel_file, cache_dir)
+
+    pd.DataFrame([{"Описание": "Новая"}]).to_excel(excel_file, index=False)
+    assert load_cached_transactions(excel_file, cache_dir) == [{"Описание": "Новая"}]
+    assert len(list((tmp_path / "cache").iterdir())) == 2
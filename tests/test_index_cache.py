@@ -0,0 +1,64 @@
+"""
+Тесты для модуля index_cache.
+"""
+from src import index_cache
+from src.index_cache import get_cached_index
+
+
+class CountingIndex:
+    """Индекс, считающий построения и дополнения."""
+
+    builds = 0
+
+    def __init__(self, transactions, field):
+        CountingIndex.builds += 1
+        self.field = field
+        self.rows = list(transactions)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, transactions):
+        self.rows.extend(transactions)
+
+
+class TransactionList(list):
+    """Список, поддерживающий слабые ссылки."""
+
+
+def test_alternating_lists_reuse_indexes():
+    """Тест: чередование списков не перестраивает индексы."""
+    CountingIndex.builds = 0
+    first = [{"Описание": "a"}]
+    second = [{"Описание": "b"}, {"Описание": "c"}]
+
+    for _ in range(3):
+        assert get_cached_index(CountingIndex, first, "Описание").rows == first
+        assert get_cached_index(CountingIndex, second, "Описание").rows == second
+    assert CountingIndex.builds == 2
+
+    first.append({"Описание": "d"})
+    assert get_cached_index(CountingIndex, first, "Описание").rows == first
+    assert CountingIndex.builds == 2
+
+
+def test_cache_is_bounded_and_checks_identity(monkeypatch):
+    """Тест ограничения размера кеша и проверки объекта списка."""
+    monkeypatch.setattr(index_cache, "INDEX_CACHE_SIZE", 2)
+    CountingIndex.builds = 0
+    lists = [[{"Описание": str(i)}] for i in range(3)]
+    for transactions in lists:
+        get_cached_index(CountingIndex, transactions, "Описание")
+    assert len(index_cache._index_cache[CountingIndex]) == 2
+
+    # Самый старый список вытеснен и строится заново
+    get_cached_index(CountingIndex, lists[0], "Описание")
+    assert CountingIndex.builds == 4
+
+    transactions = TransactionList([{"Описание": "x"}])
+    index = get_cached_index(CountingIndex, transactions, "Описание")
+    key = (id(transactions), "Описание")
+    assert index_cache._index_cache[CountingIndex][key][1] is index
+    del transactions
+    # Слабая ссылка не удерживает список, поэтому запись больше не совпадает
+    assert index_cache._index_cache[CountingIndex][key][0]() is None
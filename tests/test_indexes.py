@@ -0,0 +1,158 @@
+"""
+Тесты для модуля indexes.
+"""
+import numpy as np
+import pytest
+import pandas as pd
+from src.indexes import DateIndex, MonthlyCashbackIndex, SpendPrefixIndex, spend_mask
+
+
+@pytest.fixture
+def dated_transactions():
+    """Фикстура с транзакциями в произвольном порядке дат."""
+    return [
+        {"Дата операции": "2024-01-15", "Сумма операции": 100},
+        {"Дата операции": "2024-01-01", "Сумма операции": 200},
+        {"Дата операции": "2024-02-10", "Сумма операции": 300},
+        {"Дата операции": "", "Сумма операции": 400},
+        {"Дата операции": "2024-01-31", "Сумма операции": 500},
+    ]
+
+
+def test_date_index_skips_invalid_dates(dated_transactions):
+    """Тест пропуска транзакций без даты."""
+    index = DateIndex(dated_transactions)
+    assert len(index) == 5
+    assert len(index.range()) == 4
+    assert str(index.min_date.date()) == "2024-01-01"
+    assert str(index.max_date.date()) == "2024-02-10"
+
+
+def test_date_index_range_sorted_by_date(dated_transactions):
+    """Тест запроса по диапазону с включительными границами."""
+    index = DateIndex(dated_transactions)
+    result = index.range("2024-01-01", "2024-01-31")
+    assert [t["Сумма операции"] for t in result] == [200, 100, 500]
+
+
+def test_date_index_open_bounds(dated_transactions):
+    """Тест запросов с открытыми границами."""
+    index = DateIndex(dated_transactions)
+    assert len(index.range(start_date="2024-01-20")) == 2
+    assert len(index.range(end_date="2024-01-14")) == 1
+    assert len(index.range("2024-03-01", "2024-01-01")) == 0
+
+
+def test_date_index_batch_matches_single(dated_transactions):
+    """Тест совпадения пакетного запроса с одиночными."""
+    index = DateIndex(dated_transactions)
+    ranges = [("2024-01-01", "2024-01-15"), (None, "2024-01-31"), ("2024-02-01", None), (None, None)]
+    batch = index.batch_range_positions(ranges)
+    for (start, end), positions in zip(ranges, batch):
+        assert list(positions) == list(index.range_positions(start, end))
+
+
+def test_date_index_add_matches_full_build(dated_transactions):
+    """Тест дополнения индекса дат новыми транзакциями."""
+    index = DateIndex(dated_transactions[:2])
+    index.transactions = dated_transactions
+    index.add(dated_transactions[2:])
+    full = DateIndex(dated_transactions)
+
+    assert len(index) == len(full)
+    assert list(index.range_positions()) == list(full.range_positions())
+
+
+@pytest.fixture
+def spend_transactions():
+    """Фикстура с расходами по нескольким дням, категориям и картам."""
+    return [
+        {"Дата операции": "2024-01-01", "Сумма операции": 100, "Категория": "Супермаркеты", "Номер карты": "1111222233334444"},
+        {"Дата операции": "2024-01-02", "Сумма операции": 200, "Категория": "Транспорт", "Номер карты": "5555"},
+        {"Дата операции": "2024-01-02", "Сумма операции": -50, "Категория": "Пополнение", "Номер карты": "5555"},
+        {"Дата операции": "2024-01-03", "Сумма операции": -70, "Категория": "Возврат", "Номер карты": "5555"},
+        {"Дата операции": "2024-01-05", "Сумма операции": 300, "Категория": "Супермаркеты", "Номер карты": "5555"},
+        {"Дата операции": "2024-01-08", "Сумма операции": 400, "Категория": "Транспорт", "Номер карты": "4444"},
+    ]
+
+
+def test_spend_prefix_total(spend_transactions):
+    """Тест сумм расходов за диапазон дней."""
+    index = SpendPrefixIndex(spend_transactions)
+    assert index.total() == 1000
+    assert index.total("2024-01-02", "2024-01-05") == 500
+    assert index.total("2024-01-03", "2024-01-04") == 0
+    assert index.total("2023-12-01", "2023-12-31") == 0
+
+
+def test_spend_prefix_breakdowns(spend_transactions):
+    """Тест разбивки по категориям и картам."""
+    index = SpendPrefixIndex(spend_transactions)
+    assert index.total(category="Супермаркеты") == 400
+    assert index.total(card="4444") == 500
+    assert index.totals_by_category("2024-01-01", "2024-01-05") == {"Супермаркеты": 400, "Транспорт": 200}
+    assert index.totals_by_card(end_date="2024-01-02") == {"4444": 100, "5555": 200}
+
+
+def test_spend_prefix_append_matches_full_build(spend_transactions):
+    """Тест инкрементального дополнения индекса."""
+    full = SpendPrefixIndex(spend_transactions)
+    incremental = SpendPrefixIndex(spend_transactions[2:])
+    incremental.append(spend_transactions[:2])
+    incremental.append([{"Дата операции": "2024-01-10", "Сумма операции": 10, "Категория": "Кафе", "Номер карты": "4444"}])
+
+    assert incremental.total(end_date="2024-01-08") == full.total()
+    assert incremental.total() == 1010
+    assert incremental.total(category="Кафе") == 10
+
+
+def test_spend_mask():
+    """Тест общего правила отбора расходов."""
+    assert spend_mask(np.array([-10.0, 5.0, np.nan, 0.0])).tolist() == [False, True, False, False]
+    assert spend_mask(pd.Series([1, -1])).tolist() == [True, False]
+
+
+def test_spend_prefix_matches_analyze_expenses(spend_transactions):
+    """Тест совпадения индекса с analyze_expenses и кубом на том же диапазоне."""
+    from src.cube import SpendingCube
+    from src.utils import analyze_cards, analyze_expenses, filter_by_date_range
+
+    index = SpendPrefixIndex(spend_transactions)
+    df = pd.DataFrame(spend_transactions)
+
+    for start, end in [("2024-01-01", "2024-01-31"), ("2024-01-02", "2024-01-05"), ("2024-01-06", "2024-01-08")]:
+        expenses = analyze_expenses(pd.DataFrame(filter_by_date_range(spend_transactions, start, end)))
+        assert index.total(start, end) == expenses["total"]
+
+    cards = {card["card_last_four"]: card["total_spent"] for card in analyze_cards(df)}
+    assert index.totals_by_card() == cards
+    assert index.totals_by_category() == SpendingCube.from_dataframe(df).expense_totals().to_dict()
+
+
+def test_spend_prefix_compare(spend_transactions):
+    """Тест сравнения с предыдущим периодом той же длины."""
+    index = SpendPrefixIndex(spend_transactions)
+    result = index.compare("2024-01-05", "2024-01-08")
+    assert result["current"] == 700
+    assert result["previous"] == 300
+    assert result["delta"] == 400
+
+
+def test_monthly_cashback_index_ranges():
+    """Тест кешбэка по диапазонам месяцев и инкрементального добавления."""
+    transactions = [
+        {"Дата операции": "2024-01-10", "Категория": "Супермаркеты", "Кешбэк": 10},
+        {"Дата операции": "2024-02-10", "Категория": "Супермаркеты", "Кешбэк": 20},
+        {"Дата операции": "2024-03-10", "Категория": "Транспорт", "Кешбэк": 5},
+        {"Дата операции": "", "Категория": "Транспорт", "Кешбэк": 1},
+        {"Дата операции": "2024-03-11", "Категория": "Транспорт", "Кешбэк": -3},
+    ]
+    index = MonthlyCashbackIndex(transactions[:3])
+    index.add(transactions[3:])
+
+    january, march = pd.Period("2024-01", freq="M"), pd.Period("2024-03", freq="M")
+    assert len(index) == 5
+    assert index.latest_month == march
+    assert index.totals(january, january) == {"Супермаркеты": 10, "Транспорт": 0}
+    assert index.totals(january + 1, march) == {"Супермаркеты": 20, "Транспорт": 5}
+    assert index.totals() == {"Супермаркеты": 30, "Транспорт": 6}
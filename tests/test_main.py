@@ -0,0 +1,77 @@
+"""
+Тесты для модуля main.
+"""
+import json
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from src.main import _parse_params, main
+
+
+@pytest.fixture
+def data_args(tmp_path):
+    """Фикстура с аргументами для небольшого Excel файла."""
+    path = tmp_path / "operations.xlsx"
+    pd.DataFrame([
+        {"Дата операции": pd.Timestamp("2024-01-05"), "Сумма операции": 100.0,
+         "Категория": "Супермаркеты", "Описание": "Магнит"},
+        {"Дата операции": pd.Timestamp("2024-01-06"), "Сумма операции": 50.0,
+         "Категория": "Такси", "Описание": "Яндекс Такси"},
+    ]).to_excel(path, index=False)
+    return ["--data", str(path), "--cache-dir", str(tmp_path / "cache")]
+
+
+def test_parse_params():
+    """Тест разбора параметров отчета."""
+    assert _parse_params(["category=Такси", "include_hours=true", "categories=[\"А\"]"]) == {
+        "category": "Такси", "include_hours": True, "categories": ["А"]
+    }
+    with pytest.raises(ValueError):
+        _parse_params(["category"])
+
+
+def test_search_command(data_args, capsys):
+    """Тест подкоманды search."""
+    assert main(data_args + ["search", "такси"]) == 0
+    found = json.loads(capsys.readouterr().out)
+    assert [t["Описание"] for t in found] == ["Яндекс Такси"]
+
+    assert main(data_args + ["search", "магнт", "--fuzzy"]) == 0
+    assert json.loads(capsys.readouterr().out)[0]["Описание"] == "Магнит"
+
+
+def test_report_command(data_args, capsys):
+    """Тест подкоманды report."""
+    assert main(data_args + ["report", "category", "--param", "category=Такси", "--no-save"]) == 0
+    assert json.loads(capsys.readouterr().out)["total"] == 50.0
+    assert main(data_args + ["report", "unknown"]) == 2
+
+
+def test_spend_command(tmp_path, capsys):
+    """Тест подкоманды spend по индексу накопленных сумм."""
+    path = tmp_path / "spend.xlsx"
+    pd.DataFrame([
+        {"Дата операции": pd.Timestamp("2024-01-05"), "Сумма операции": 100.0, "Категория": "Супермаркеты"},
+        {"Дата операции": pd.Timestamp("2024-01-06"), "Сумма операции": 50.0, "Категория": "Такси"},
+        {"Дата операции": pd.Timestamp("2024-01-06"), "Сумма операции": -500.0, "Категория": "Пополнение"},
+    ]).to_excel(path, index=False)
+    data_args = ["--data", str(path), "--no-cache"]
+
+    assert main(data_args + ["spend", "--start", "2024-01-06", "--end", "2024-01-06"]) == 0
+    result = json.loads(capsys.readouterr().out)
+    assert result["total"] == 50.0
+    assert result["by_category"] == {"Супермаркеты": 0.0, "Такси": 50.0}
+    assert result["comparison"]["previous"] == 100.0
+
+
+def test_parser_does_not_import_daemon():
+    """Тест: разбор аргументов не импортирует демон и pandas."""
+    code = (
+        "import sys; from src.main import build_parser; build_parser().parse_args(['search', 'x']); "
+        "print('src.daemon' in sys.modules, 'pandas' in sys.modules)"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.split() == ["False", "False"]
@@ -0,0 +1,166 @@
+"""
+Тесты для модуля metrics.
+"""
+import json
+
+import pandas as pd
+import pytest
+
+from src import metrics
+from src.metrics import MetricsRegistry, add_bytes, add_rows, stage, timed
+
+
+@pytest.fixture
+def registry():
+    """Фикстура с отдельным реестром метрик."""
+    return MetricsRegistry(buckets=(0.01, 0.1, 1.0))
+
+
+def test_timed_counts_calls_rows_and_errors(registry):
+    """Тест вызовов, строк из первого аргумента и ошибок."""
+    @timed(name="test.sum", registry=registry)
+    def total(rows, fail=False):
+        if fail:
+            raise ValueError("ошибка")
+        return sum(rows)
+
+    assert total([1, 2, 3]) == 6
+    assert total.__name__ == "total"
+    with pytest.raises(ValueError):
+        total([1], fail=True)
+
+    stats = registry.snapshot()["test.sum"]
+    assert stats["calls"] == 2
+    assert stats["errors"] == 1
+    assert stats["rows"] == 4
+    assert stats["histogram"]["+Inf"] == 2
+    assert stats["seconds_p95"] <= stats["seconds_max"]
+
+
+def test_rows_from_output_and_strings(registry):
+    """Тест строк из результата; строки и словари строками не считаются."""
+    @timed(rows="output", registry=registry)
+    def read(path):
+        return pd.DataFrame({"a": range(5)})
+
+    @timed(registry=registry)
+    def summarize(report):
+        return report
+
+    read("data/operations.xlsx")
+    summarize({"a": 1, "b": 2})
+
+    snapshot = registry.snapshot()
+    assert snapshot["test_metrics.read"]["rows"] == 5
+    assert snapshot["test_metrics.summarize"]["rows"] == 0
+
+
+def test_nested_stages_attribute_to_innermost(registry):
+    """Тест отнесения строк и байт к самому вложенному этапу."""
+    @timed(name="inner", rows=None, registry=registry)
+    def inner():
+        add_bytes(100)
+        add_rows(10)
+
+    with stage("outer", rows=1, registry=registry) as measure:
+        inner()
+        add_bytes(5)
+        measure.rows += 2
+
+    snapshot = registry.snapshot()
+    assert snapshot["inner"]["bytes_read"] == 100
+    assert snapshot["inner"]["rows"] == 10
+    assert snapshot["outer"]["bytes_read"] == 5
+    assert snapshot["outer"]["rows"] == 3
+    # Вне этапов счетчики никуда не добавляются
+    add_rows(1)
+
+
+def test_histogram_and_prometheus(registry):
+    """Тест корзин гистограммы и текстового формата Prometheus."""
+    for seconds in (0.005, 0.05, 0.05, 5.0):
+        registry.observe("reports.weekday", seconds, rows=10)
+    registry.observe("views.home_page", 0.001, bytes_read=2048, failed=True)
+
+    snapshot = registry.snapshot()
+    assert snapshot["reports.weekday"]["histogram"] == {"0.01": 1, "0.1": 3, "1.0": 3, "+Inf": 4}
+    assert snapshot["reports.weekday"]["seconds_p50"] == 0.1
+    assert snapshot["reports.weekday"]["seconds_max"] == 5.0
+    json.dumps(snapshot)
+
+    text = registry.render_prometheus()
+    assert "# TYPE bank_stage_duration_seconds histogram" in text
+    assert 'bank_stage_duration_seconds_bucket{stage="reports.weekday",le="0.1"} 3' in text
+    assert 'bank_stage_duration_seconds_bucket{stage="reports.weekday",le="+Inf"} 4' in text
+    assert 'bank_stage_duration_seconds_count{stage="reports.weekday"} 4' in text
+    assert 'bank_stage_rows_total{stage="reports.weekday"} 40' in text
+    assert 'bank_stage_errors_total{stage="views.home_page"} 1' in text
+    assert 'bank_stage_bytes_read_total{stage="views.home_page"} 2048' in text
+    assert text.endswith("\n")
+
+    registry.reset()
+    assert registry.snapshot() == {}
+
+
+def test_disabled_registry(registry):
+    """Тест отключенных метрик."""
+    registry.enabled = False
+
+    @timed(registry=registry)
+    def noop(rows):
+        return rows
+
+    noop([1])
+    with stage("block", registry=registry):
+        pass
+
+    assert registry.snapshot() == {}
+
+
+def test_instrumented_pipeline(tmp_path):
+    """Тест метрик этапов utils на реальных функциях."""
+    from src.utils import analyze_expenses, read_excel_file
+
+    path = tmp_path / "operations.xlsx"
+    pd.DataFrame([
+        {"Дата операции": pd.Timestamp("2024-01-05"), "Сумма операции": -100.0,
+         "Сумма платежа": -100.0, "Категория": "Супермаркеты", "Описание": "Магнит"},
+        {"Дата операции": pd.Timestamp("2024-01-06"), "Сумма операции": -50.0,
+         "Сумма платежа": -50.0, "Категория": "Фастфуд", "Описание": "Кафе"},
+    ]).to_excel(path, index=False)
+    metrics.reset_metrics()
+
+    df = read_excel_file(str(path))
+    analyze_expenses(df)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["utils.read_excel_file"]["rows"] == 2
+    assert snapshot["utils.read_excel_file"]["bytes_read"] == path.stat().st_size
+    assert snapshot["utils.analyze_expenses"]["calls"] == 1
+    assert snapshot["utils.analyze_expenses"]["rows"] == 2
+    assert 'stage="utils.read_excel_file"' in metrics.render_prometheus()
+
+
+def test_instrumented_search():
+    """Тест метрик команды поиска и этапов индекса."""
+    from src.commands import run_command
+
+    class Source:
+        def __init__(self, transactions):
+            self._transactions = transactions
+
+        def transactions(self):
+            return self._transactions
+
+    transactions = [{"Описание": f"Магазин {i}"} for i in range(5)] + [{"Описание": "Кафе"}]
+    source = Source(transactions)
+    metrics.reset_metrics()
+
+    assert len(run_command(source, "search", {"query": "магазин"})) == 5
+    run_command(source, "search", {"query": "кафе"})
+
+    snapshot = metrics.snapshot()
+    assert snapshot["commands.command_search"]["calls"] == 2
+    assert snapshot["commands.command_search"]["rows"] == 6
+    assert snapshot["search.get_inverted_index"]["rows"] == 6
+    assert snapshot["search.substring_rows"]["calls"] == 2
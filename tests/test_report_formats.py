@@ -0,0 +1,107 @@
+"""
+Тесты для модуля report_formats.
+"""
+import gzip
+import json
+import os
+
+import pytest
+
+from src.report_formats import atomic_write, report_records, write_report
+from src.utils import save_report
+
+
+@pytest.fixture
+def sample_report():
+    """Фикстура с отчетом по категории."""
+    return {
+        "category": "Супермаркеты",
+        "months": [
+            {"month": "2024-01", "amount": 100.0, "count": 1},
+            {"month": "2024-02", "amount": 700.0, "count": 2},
+        ],
+        "total": 800.0,
+    }
+
+
+def test_json_formats(tmp_path, sample_report):
+    """Тест JSON с отступами и компактного JSON."""
+    pretty = tmp_path / "pretty.json"
+    compact = tmp_path / "compact.json"
+    write_report(sample_report, str(pretty), "json")
+    write_report(sample_report, str(compact), "json-compact")
+
+    assert json.loads(pretty.read_text(encoding="utf-8")) == sample_report
+    assert json.loads(compact.read_text(encoding="utf-8")) == sample_report
+    assert "\n" not in compact.read_text(encoding="utf-8")
+    assert "Супермаркеты" in pretty.read_text(encoding="utf-8")
+
+
+def test_ndjson_gzip(tmp_path, sample_report):
+    """Тест NDJSON со сжатием gzip."""
+    path = tmp_path / "report.ndjson.gz"
+    write_report(sample_report, str(path), "ndjson.gz")
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert lines == list(report_records(sample_report))
+    assert lines[0] == {"section": "meta", "category": "Супермаркеты", "total": 800.0}
+    assert lines[1] == {"section": "months", "month": "2024-01", "amount": 100.0, "count": 1}
+
+
+def test_optional_formats(tmp_path, sample_report):
+    """Тест форматов с необязательными зависимостями."""
+    zstandard = pytest.importorskip("zstandard")
+    path = tmp_path / "report.ndjson.zst"
+    write_report(sample_report, str(path), "ndjson.zst")
+    with open(path, "rb") as f:
+        data = zstandard.ZstdDecompressor().stream_reader(f).read()
+    assert len(data.decode("utf-8").splitlines()) == 3
+
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "report.parquet"
+    write_report(sample_report, str(path), "parquet")
+    assert pd.read_parquet(path)["amount"].tolist() == [100.0, 700.0]
+
+
+def test_atomic_write_keeps_old_file_on_error(tmp_path):
+    """Тест атомарной записи: при ошибке файл не меняется, временный удаляется."""
+    path = tmp_path / "report.json"
+    path.write_text("old", encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as f:
+            f.write(b"new")
+            raise RuntimeError("сбой")
+
+    assert path.read_text(encoding="utf-8") == "old"
+    assert os.listdir(tmp_path) == ["report.json"]
+
+
+def test_atomic_write_uses_umask_permissions(tmp_path, monkeypatch):
+    """Тест прав итогового файла: как у обычного нового файла, а не 0600 от mkstemp."""
+    from src import report_formats
+
+    monkeypatch.setattr(report_formats, "_UMASK", 0o022)
+    path = tmp_path / "report.json"
+    with atomic_write(str(path)) as f:
+        f.write(b"{}")
+
+    assert os.stat(path).st_mode & 0o777 == 0o644
+
+
+def test_save_report_output_dir_and_format(tmp_path, monkeypatch, sample_report):
+    """Тест каталога и формата отчетов в save_report."""
+    path = save_report(sample_report, "report_test", fmt="ndjson.gz", output_dir=str(tmp_path / "out"))
+    assert path.startswith(str(tmp_path / "out"))
+    assert path.endswith(".ndjson.gz")
+
+    monkeypatch.setenv("REPORTS_DIR", str(tmp_path))
+    monkeypatch.setenv("REPORT_FORMAT", "json-compact")
+    path = save_report(sample_report, "report_env")
+    assert os.path.dirname(path) == str(tmp_path)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == sample_report
+
+    assert save_report(sample_report, "report_bad", fmt="xml", output_dir=str(tmp_path)) == ""
@@ -0,0 +1,62 @@
+"""
+Тесты для модуля report_store.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.report_store import ReportStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Фикстура с пустым хранилищем отчетов."""
+    store = ReportStore(str(tmp_path / "reports.sqlite3"))
+    yield store
+    store.close()
+
+
+def _report(generated_at, total):
+    """Создает отчет с заданным временем генерации."""
+    return {"total": total, "generated_at": generated_at}
+
+
+def test_latest_and_history(store):
+    """Тест выбора последнего отчета и истории за период."""
+    store.append("category", _report("2024-03-01T10:00:00", 1), {"category": "Такси"})
+    store.append("category", _report("2024-03-15T10:00:00", 2), {"category": "Такси"})
+    store.append("category", _report("2024-04-01T10:00:00", 3), {"category": "Такси"})
+    store.append("category", _report("2024-03-20T10:00:00", 4), {"category": "Рестораны"})
+    store.append("weekday", _report("2024-05-01T10:00:00", 5))
+
+    assert store.latest("category")["total"] == 3
+    assert store.latest("category", {"category": "Рестораны"})["total"] == 4
+    assert store.latest("workday") is None
+
+    march = store.history("category", start="2024-03-01", end="2024-04-01")
+    assert [r["total"] for r in march] == [1, 2, 4]
+    taxi = store.history("category", {"category": "Такси"}, limit=2)
+    assert [r["total"] for r in taxi] == [1, 2]
+    assert store.count() == 5
+    assert store.count("weekday") == 1
+
+
+def test_params_are_canonical(store):
+    """Тест: порядок ключей параметров не влияет на поиск."""
+    store.append("weekday", _report("2024-01-01", 1), {"include_hours": True, "include_categories": False})
+    assert store.latest("weekday", {"include_categories": False, "include_hours": True})["total"] == 1
+
+
+def test_retention(store):
+    """Тест удаления устаревших отчетов."""
+    old = (datetime.now() - timedelta(days=40)).isoformat()
+    store.append("weekday", _report(old, 0))
+    for total in range(1, 5):
+        store.append("weekday", _report(datetime.now().isoformat(), total))
+    store.append("workday", _report(datetime.now().isoformat(), 9))
+
+    assert store.apply_retention(max_age_days=30) == 1
+    assert store.apply_retention(keep_last=2) == 2
+    assert [r["total"] for r in store.history("weekday")] == [3, 4]
+    assert store.count("workday") == 1
+    assert store.apply_retention(keep_last=2) == 0
@@ -0,0 +1,266 @@
+"""
+Тесты для модуля reports.
+"""
+import pytest
+from unittest.mock import patch
+from src.reports import (
+    generate_spending_by_category_report,
+    generate_spending_by_categories_report,
+    generate_spending_by_weekday_report,
+    generate_spending_by_workday_report,
+    run_report_batch,
+    invalidate_report_cache,
+    IncrementalReportState,
+    MONTHLY_REPORT_PACK,
+)
+from src.cube import get_cube
+from src.report_store import get_report_store
+
+
+@pytest.fixture(autouse=True)
+def clear_report_cache():
+    """Очищает кеш отчетов между тестами."""
+    invalidate_report_cache()
+    yield
+    invalidate_report_cache()
+
+
+@pytest.fixture
+def sample_transactions():
+    """Фикстура с транзакциями за несколько дней."""
+    return [
+        {"Дата операции": "2024-01-01", "Сумма операции": 100.0, "Категория": "Супермаркеты"},
+        {"Дата операции": "2024-01-06", "Сумма операции": 200.0, "Категория": "Рестораны"},
+        {"Дата операции": "2024-02-05", "Сумма операции": 300.0, "Категория": "Супермаркеты"},
+        {"Дата операции": "2024-02-07", "Сумма операции": 400.0, "Категория": "Супермаркеты"},
+    ]
+
+
+@patch("src.reports.save_report")
+def test_category_report(mock_save, sample_transactions):
+    """Тест отчета по категории."""
+    report = generate_spending_by_category_report(sample_transactions, "Супермаркеты")
+
+    assert report["months"] == [
+        {"month": "2024-01", "amount": 100.0, "count": 1},
+        {"month": "2024-02", "amount": 700.0, "count": 2},
+    ]
+    assert report["total"] == 800.0
+    mock_save.assert_called_once()
+
+
+@patch("src.reports.save_report")
+def test_categories_report(mock_save, sample_transactions):
+    """Тест отчета сразу по всем категориям и по подмножеству."""
+    report = generate_spending_by_categories_report(sample_transactions)
+
+    assert [item["category"] for item in report["categories"]] == ["Рестораны", "Супермаркеты"]
+    assert report["categories"][1]["months"] == [
+        {"month": "2024-01", "amount": 100.0, "count": 1},
+        {"month": "2024-02", "amount": 700.0, "count": 2},
+    ]
+    assert report["total"] == 1000.0
+
+    subset = generate_spending_by_categories_report(sample_transactions, ["Рестораны", "Такси"])
+    assert subset["categories"] == [
+        {"category": "Рестораны", "months": [{"month": "2024-01", "amount": 200.0, "count": 1}], "total": 200.0},
+        {"category": "Такси", "months": [], "total": 0.0},
+    ]
+
+
+@patch("src.reports.save_report")
+def test_weekday_report(mock_save, sample_transactions):
+    """Тест отчета по дням недели."""
+    report = generate_spending_by_weekday_report(sample_transactions)
+    days = {day["day"]: day for day in report["days"]}
+
+    assert len(report["days"]) == 7
+    assert days["Monday"] == {"day": "Monday", "amount": 400.0, "count": 2}
+    assert days["Sunday"]["count"] == 0
+    assert report["total"] == 1000.0
+
+
+@patch("src.reports.save_report")
+def test_weekday_report_matrices(mock_save):
+    """Тест тепловой карты по часам и матрицы по категориям."""
+    transactions = [
+        {"Дата операции": "2024-01-01 09:15:00", "Сумма операции": 100.0, "Категория": "Кафе"},
+        {"Дата операции": "2024-01-01 09:45:00", "Сумма операции": 50.0, "Категория": "Кафе"},
+        {"Дата операции": "2024-01-07 20:00:00", "Сумма операции": 300.0, "Категория": "Такси"},
+    ]
+    report = generate_spending_by_weekday_report(
+        transactions, include_hours=True, include_categories=True
+    )
+
+    hours = report["hours"]
+    assert len(hours["amounts"]) == 7 and len(hours["amounts"][0]) == 24
+    assert hours["amounts"][0][9] == 150.0
+    assert hours["counts"][6][20] == 1
+
+    categories = report["categories"]
+    assert categories["categories"] == ["Кафе", "Такси"]
+    assert categories["amounts"][0] == [150.0, 0.0]
+    assert categories["amounts"][6] == [0.0, 300.0]
+
+
+@patch("src.reports.save_report")
+def test_workday_report(mock_save, sample_transactions):
+    """Тест отчета по рабочим и выходным дням."""
+    report = generate_spending_by_workday_report(sample_transactions)
+
+    assert report["categories"] == [
+        {"category": "Рабочий день", "amount": 800.0, "count": 3},
+        {"category": "Выходной", "amount": 200.0, "count": 1},
+    ]
+
+
+def test_reports_empty():
+    """Тест отчетов по пустому списку транзакций."""
+    assert generate_spending_by_category_report([], "Супермаркеты")["months"] == []
+    assert generate_spending_by_categories_report([])["categories"] == []
+    assert generate_spending_by_weekday_report([])["days"] == []
+    assert generate_spending_by_workday_report([])["categories"] == []
+
+
+def _without_timestamp(report):
+    """Убирает время генерации для сравнения отчетов."""
+    return {key: value for key, value in report.items() if key != "generated_at"}
+
+
+@patch("src.reports.save_report")
+def test_report_batch_builds_cube_once(mock_save, sample_transactions):
+    """Тест набора отчетов: один куб на все отчеты, результаты как у отдельных вызовов."""
+    with patch("src.reports.get_cube", wraps=get_cube) as mock_cube:
+        reports = run_report_batch(sample_transactions, MONTHLY_REPORT_PACK)
+    assert mock_cube.call_count == 1
+    assert mock_save.call_count == 3
+
+    expected = [
+        generate_spending_by_category_report(sample_transactions, "Супермаркеты"),
+        generate_spending_by_weekday_report(sample_transactions),
+        generate_spending_by_workday_report(sample_transactions),
+    ]
+    assert [_without_timestamp(r) for r in reports] == [_without_timestamp(r) for r in expected]
+
+
+@patch("src.reports.save_report")
+def test_report_batch_process_pool(mock_save, sample_transactions):
+    """Тест построения отчетов в пуле процессов."""
+    specs = [{"name": "workday"}, {"name": "categories", "params": {"categories": ["Рестораны"]}}]
+    parallel = run_report_batch(sample_transactions, specs, workers=2, min_rows_for_pool=0)
+    serial = run_report_batch(sample_transactions, specs, save=False)
+
+    assert [_without_timestamp(r) for r in parallel] == [_without_timestamp(r) for r in serial]
+    assert mock_save.call_count == 2
+
+
+@patch("src.reports.save_report")
+def test_report_batch_errors(mock_save, sample_transactions):
+    """Тест ошибок в наборе отчетов."""
+    with pytest.raises(ValueError):
+        run_report_batch(sample_transactions, [{"name": "unknown"}])
+
+    reports = run_report_batch(sample_transactions, [{"name": "workday"}, {"name": "weekday", "params": {"bad": 1}}])
+    assert "error" not in reports[0]
+    assert "error" in reports[1]
+    mock_save.assert_called_once()
+
+    assert run_report_batch([], [{"name": "workday"}]) == [{"categories": [], "total": 0}]
+
+
+@patch("src.reports.save_report")
+def test_report_cache_hit_skips_build_and_write(mock_save, sample_transactions):
+    """Тест кеша отчетов: повторный запрос не пересчитывает и не записывает отчет."""
+    first = generate_spending_by_weekday_report(sample_transactions)
+    with patch("src.reports.get_cube") as mock_cube:
+        second = generate_spending_by_weekday_report(list(sample_transactions))
+        batch = run_report_batch(sample_transactions, [{"name": "weekday"}])
+    mock_cube.assert_not_called()
+    mock_save.assert_called_once()
+    assert second == first
+    assert batch == [first]
+
+    # Другие параметры или данные - другой ключ
+    generate_spending_by_weekday_report(sample_transactions, include_hours=True)
+    generate_spending_by_weekday_report(sample_transactions[:2])
+    assert mock_save.call_count == 3
+
+
+@patch("src.reports.save_report")
+def test_report_cache_invalidation_and_eviction(mock_save, sample_transactions):
+    """Тест явной инвалидации и вытеснения из кеша отчетов."""
+    generate_spending_by_workday_report(sample_transactions)
+    generate_spending_by_category_report(sample_transactions, "Рестораны")
+
+    assert invalidate_report_cache(name="workday") == 1
+    generate_spending_by_workday_report(sample_transactions)
+    generate_spending_by_category_report(sample_transactions, "Рестораны")
+    assert mock_save.call_count == 3
+
+    with patch("src.reports.REPORT_CACHE_LIMIT", 2):
+        # Кеш: [workday, Рестораны] -> [Рестораны, Такси], workday вытеснен
+        generate_spending_by_category_report(sample_transactions, "Такси")
+        generate_spending_by_category_report(sample_transactions, "Рестораны")
+        assert mock_save.call_count == 4
+        generate_spending_by_workday_report(sample_transactions)
+        assert mock_save.call_count == 5
+
+
+@patch("src.reports.save_report")
+def test_report_cache_returns_copies(mock_save, sample_transactions):
+    """Тест: изменение возвращенного отчета не портит кеш."""
+    report = generate_spending_by_category_report(sample_transactions, "Супермаркеты")
+    report["months"].clear()
+    again = generate_spending_by_category_report(sample_transactions, "Супермаркеты")
+    assert len(again["months"]) == 2
+
+
+@patch("src.reports.save_report")
+def test_reports_go_to_store(mock_save, sample_transactions, tmp_path, monkeypatch):
+    """Тест сохранения отчетов в хранилище вместо файлов."""
+    path = str(tmp_path / "reports.sqlite3")
+    monkeypatch.setenv("REPORT_STORE", path)
+
+    report = generate_spending_by_weekday_report(sample_transactions)
+    run_report_batch(sample_transactions, [{"name": "category", "params": {"category": "Рестораны"}}])
+
+    mock_save.assert_not_called()
+    store = get_report_store(path)
+    assert store.latest("weekday", {"include_hours": False, "include_categories": False}) == report
+    assert store.latest("category", {"category": "Рестораны"})["total"] == 200.0
+
+
+@patch("src.reports.save_report")
+def test_incremental_state_applies_only_delta(mock_save, sample_transactions, tmp_path):
+    """Тест инкрементального состояния: обрабатываются только новые транзакции."""
+    path = str(tmp_path / "state.pkl")
+    state = IncrementalReportState(path)
+    assert state.refresh(sample_transactions[:2]) == 2
+
+    # Состояние переживает перезапуск и применяет только дельту
+    state = IncrementalReportState(path)
+    assert state.row_count == 2
+    assert state.refresh(sample_transactions) == 2
+    assert state.refresh(sample_transactions) == 0
+    assert state.verify(sample_transactions)
+
+    expected = generate_spending_by_category_report(sample_transactions, "Супермаркеты")
+    report = state.report("category", category="Супермаркеты")
+    assert _without_timestamp(report) == _without_timestamp(expected)
+
+
+def test_incremental_state_rebuilds_on_rewrite(sample_transactions):
+    """Тест полной перестройки при изменении уже учтенной истории."""
+    state = IncrementalReportState(path=None)
+    state.refresh(sample_transactions)
+
+    rewritten = [dict(t) for t in sample_transactions]
+    rewritten[-1]["Сумма операции"] = 1.0
+    assert state.refresh(rewritten) == 4
+    assert state.report("workday")["total"] == 601.0
+
+    # Подмена истории в обход refresh обнаруживается сверкой
+    state.apply([{"Дата операции": "2024-03-01", "Сумма операции": 5.0, "Категория": "Такси"}], rewritten)
+    assert not state.verify(rewritten)
+    assert state.verify(rewritten)
+    assert state.report("workday")["total"] == 601.0
@@ -0,0 +1,228 @@
+"""
+Тесты для модуля search.
+"""
+import pytest
+import pandas as pd
+from src.search import (
+    InvertedIndex,
+    KeywordMatcher,
+    PhoneIndex,
+    TrigramIndex,
+    get_inverted_index,
+    extract_phones,
+    normalize_phone,
+    normalize_text,
+    run_batch_queries,
+)
+
+
+@pytest.fixture
+def descriptions():
+    """Фикстура с транзакциями с разными описаниями."""
+    return [
+        {"Описание": "Покупка в магазине Пятерочка"},
+        {"Описание": "Такси Яндекс"},
+        {"Описание": "Магазин одежды"},
+        {"Описание": "Перевод Иванов И."},
+    ]
+
+
+def test_inverted_index_prefix_query(descriptions):
+    """Тест поиска по префиксам слов с AND и OR."""
+    index = InvertedIndex(descriptions)
+    assert index.query(["магаз"]) == [0, 2]
+    assert index.query(["магаз", "пят"]) == [0]
+    assert index.query(["такси", "перевод"], mode="or") == [1, 3]
+    assert index.query(["нет"]) == []
+
+
+def test_inverted_index_substring_rows(descriptions):
+    """Тест поиска подстроки, в том числе через границу слов."""
+    index = InvertedIndex(descriptions)
+    assert index.substring_rows("агазин") == [0, 2]
+    assert index.substring_rows("в магазине") == [0]
+    assert index.substring_rows("ов и.") == [3]
+
+
+def test_inverted_index_add_and_project(descriptions):
+    """Тест инкрементального добавления и ленивой проекции."""
+    index = InvertedIndex(descriptions[:2])
+    index.add(descriptions[2:])
+    rows = index.query(["магазин"])
+    assert list(index.project(rows)) == [descriptions[0], descriptions[2]]
+
+
+def test_get_inverted_index_appends_new_rows(descriptions):
+    """Тест дополнения закешированного индекса при росте списка."""
+    transactions = descriptions[:2]
+    index = get_inverted_index(transactions)
+    transactions.append({"Описание": "Такси Ситимобил"})
+
+    assert get_inverted_index(transactions) is index
+    assert index.substring_rows("такси") == [1, 2]
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("Пятёрочка", "pyaterochka"),
+        ("ПЯТЕРОЧКА", "pyaterochka"),
+        ("Pyaterochka!", "pyaterochka"),
+        ("Такси  Яндекс", "taksi yandeks"),
+    ],
+)
+def test_normalize_text(text, expected):
+    """Тест нормализации регистра, ё и транслитерации."""
+    assert normalize_text(text) == expected
+
+
+def test_trigram_index_ranks_exact_matches_first():
+    """Тест ранжирования нечеткого поиска."""
+    transactions = [
+        {"Описание": "Покупка в магазине Пятерочка"},
+        {"Описание": "Перекресток"},
+        {"Описание": "Пятёрочка"},
+        {"Описание": "PYATEROCHKA"},
+    ]
+    index = TrigramIndex(transactions)
+
+    rows = [row for row, _ in index.search("Pyaterochka")]
+    assert rows[:2] == [2, 3]
+    assert set(rows) == {0, 2, 3}
+    assert [row for row, _ in index.search("пятерчка")][:2] == [2, 3]
+
+
+def test_trigram_index_threshold_and_limit():
+    """Тест порога сходства и ограничения числа результатов."""
+    transactions = [{"Описание": "Магнит"}] * 5 + [{"Описание": "Такси"}]
+    index = TrigramIndex(transactions)
+
+    assert len(index.texts) == 2
+    assert len(index.search("магнит", limit=3)) == 3
+    assert index.search("такси", threshold=0.9) == [(5, 1.0)]
+    assert index.search("") == []
+
+
+def test_keyword_matcher_overlapping_keywords():
+    """Тест поиска пересекающихся ключевых слов за один проход."""
+    matcher = KeywordMatcher(["перевод", "перевод физ", "вод", "иванов"])
+
+    assert matcher.find("Перевод физлицу Иванову") == ["перевод", "вод", "перевод физ", "иванов"]
+    assert matcher.first("Перевод физлицу") == "перевод"
+    assert matcher.find("Оплата услуг") == []
+    assert matcher.first("Оплата услуг") is None
+
+
+def test_keyword_matcher_match_series():
+    """Тест векторизованного режима по столбцу описаний."""
+    matcher = KeywordMatcher(["такси", "метро"])
+    series = pd.Series(["Такси", None, "Метро и такси", "Такси"])
+
+    assert matcher.match_series(series).tolist() == [["такси"], [], ["метро", "такси"], ["такси"]]
+
+
+@pytest.mark.parametrize(
+    "phone,expected",
+    [
+        ("+7 916 123-45-67", "+79161234567"),
+        ("89161234567", "+79161234567"),
+        ("(916) 123 45 67", "+79161234567"),
+        ("12345", None),
+    ],
+)
+def test_normalize_phone(phone, expected):
+    """Тест приведения номеров к E.164."""
+    assert normalize_phone(phone) == expected
+
+
+def test_extract_phones():
+    """Тест векторизованного извлечения номеров."""
+    series = pd.Series(["Такси 89161234567", "Оплата", None, "Перевод +7 916 123-45-67 или 89001112233"])
+    assert extract_phones(series).tolist() == [
+        ["+79161234567"], [], [], ["+79161234567", "+79001112233"],
+    ]
+    assert extract_phones(pd.Series([], dtype=object)).tolist() == []
+
+
+def test_phone_index_lookups():
+    """Тест поиска по номеру и рейтинга получателей."""
+    transactions = [
+        {"Описание": "Перевод +7 916 123-45-67", "Сумма операции": 100},
+        {"Описание": "Оплата услуг", "Сумма операции": 50},
+        {"Описание": "Перевод 89161234567", "Сумма операции": 200},
+        {"Описание": "Такси 8 900 000 00 00", "Сумма операции": 300},
+    ]
+    index = PhoneIndex(transactions[:2])
+    index.add(transactions[2:])
+
+    assert index.phone_rows() == [0, 2, 3]
+    assert index.transactions_for("9161234567") == [transactions[0], transactions[2]]
+    assert index.top_recipients(1) == [{"phone": "+79161234567", "count": 2, "amount": 300}]
+
+
+def test_phone_index_matches_batch_predicates():
+    """Тест: индекс находит все номера описания, как и пакетный предикат phone."""
+    transactions = [
+        {"Описание": "Перевод 89161234567, копия на +7 900 111-22-33", "Сумма операции": 100},
+        {"Описание": "Перевод 89001112233", "Сумма операции": 50},
+    ]
+    index = PhoneIndex(transactions)
+
+    assert index.transactions_for("+79001112233") == transactions
+    assert {item["phone"] for item in index.top_recipients()} == {"+79161234567", "+79001112233"}
+    batch = run_batch_queries(transactions, [("phone", "89001112233")])
+    assert batch[("phone", "89001112233")] == [0, 1]
+
+
+@pytest.fixture
+def batch_transactions():
+    """Фикстура с транзакциями для пакетных запросов."""
+    return [
+        {"Описание": "Покупка в магазине"},
+        {"Описание": "Перевод Иванову +7 916 123-45-67"},
+        {"Описание": "Такси 89001112233"},
+        {"Описание": "Магазин KFC"},
+    ]
+
+
+def test_run_batch_queries(batch_transactions):
+    """Тест пакетной проверки предикатов разных видов."""
+    predicates = [
+        ("substring", "магазин"),
+        ("substring", ""),
+        ("keywords", ("перевод", "такси")),
+        ("regex", r"KFC"),
+        ("phone", None),
+        ("phone", "89161234567"),
+    ]
+    result = run_batch_queries(batch_transactions, predicates)
+
+    assert result[("substring", "магазин")] == [0, 3]
+    assert result[("substring", "")] == [0, 1, 2, 3]
+    assert result[("keywords", ("перевод", "такси"))] == [1, 2]
+    assert result[("regex", r"KFC")] == [3]
+    assert result[("phone", None)] == [1, 2]
+    assert result[("phone", "89161234567")] == [1]
+
+
+def test_run_batch_queries_list_keywords(batch_transactions):
+    """Тест набора слов, переданного списком: ключ результата - кортеж."""
+    predicates = [("keywords", ["перевод", "такси"]), ("keywords", ("перевод", "такси")), ("keywords", {"kfc"})]
+    result = run_batch_queries(batch_transactions, predicates)
+
+    assert result == {("keywords", ("перевод", "такси")): [1, 2], ("keywords", ("kfc",)): [3]}
+
+
+def test_run_batch_queries_with_workers(batch_transactions):
+    """Тест разбиения на части по процессам."""
+    transactions = batch_transactions * 5
+    predicates = [("substring", "магазин"), ("phone", None)]
+
+    parallel = run_batch_queries(transactions, predicates, workers=2, min_rows_per_worker=5)
+    assert parallel == run_batch_queries(transactions, predicates)
+
+
+def test_run_batch_queries_unknown_kind(batch_transactions):
+    """Тест ошибки для неизвестного вида предиката."""
+    with pytest.raises(ValueError):
+        run_batch_queries(batch_transactions, [("fuzzy", "такси")])
@@ -0,0 +1,123 @@
+"""
+Тесты для модуля serialization.
+"""
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import serialization
+from src.serialization import dumps, iter_encode, json_default, write_json
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    """Фикстура, проверяющая оба кодировщика: orjson и стандартный json."""
+    if request.param == "orjson":
+        if serialization.orjson is None:
+            pytest.skip("orjson не установлен")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+@pytest.fixture
+def page():
+    """Фикстура со страницей, содержащей типы numpy и pandas."""
+    return {
+        "date": pd.Timestamp("2024-02-13 10:30:00"),
+        "missing_date": pd.NaT,
+        "missing": pd.NA,
+        "total": np.float64(1234.5),
+        "count": np.int64(7),
+        "share": np.float32(0.5),
+        "flag": np.bool_(True),
+        "amount": Decimal("99.90"),
+        "day": date(2024, 2, 13),
+        "period": pd.Period("2024-02", freq="M"),
+        "series": np.array([1, 2, 3]),
+        "top_transactions": [
+            {"date": datetime(2024, 2, day), "amount": np.float64(-day * 10.0), "description": "Магазин"}
+            for day in range(1, 4)
+        ],
+    }
+
+
+@pytest.fixture
+def expected_page():
+    """Фикстура с ожидаемым результатом разбора страницы."""
+    return {
+        "date": "2024-02-13T10:30:00",
+        "missing_date": None,
+        "missing": None,
+        "total": 1234.5,
+        "count": 7,
+        "share": 0.5,
+        "flag": True,
+        "amount": 99.9,
+        "day": "2024-02-13",
+        "period": "2024-02",
+        "series": [1, 2, 3],
+        "top_transactions": [
+            {"date": f"2024-02-0{day}T00:00:00", "amount": -day * 10.0, "description": "Магазин"}
+            for day in range(1, 4)
+        ],
+    }
+
+
+def test_dumps_numpy_and_pandas(encoder, page, expected_page):
+    """Тест кодирования скаляров numpy, pandas, Decimal и дат без приведения на местах."""
+    encoded = dumps(page)
+
+    assert json.loads(encoded) == expected_page
+    assert "Магазин" in encoded.decode("utf-8")
+
+
+def test_dumps_indent(encoder):
+    """Тест форматирования с отступом."""
+    encoded = dumps({"a": [np.int64(1)]}, indent=True).decode("utf-8")
+
+    assert json.loads(encoded) == {"a": [1]}
+    assert "\n  " in encoded
+
+
+def test_json_default_unsupported():
+    """Тест ошибки на неподдерживаемом типе."""
+    with pytest.raises(TypeError):
+        json_default(object())
+
+
+def test_json_default_frames():
+    """Тест приведения DataFrame, Series и datetime64."""
+    frame = pd.DataFrame({"a": [1, 2]})
+
+    assert json_default(frame) == [{"a": 1}, {"a": 2}]
+    assert json_default(frame["a"]) == [1, 2]
+    assert json_default(np.datetime64("2024-01-02T03:04:05")) == "2024-01-02T03:04:05"
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 5, 1000])
+def test_iter_encode_matches_dumps(encoder, page, expected_page, batch_size):
+    """Тест потокового кодирования пачками."""
+    page["months"] = [{"month": f"2024-{m:02d}", "amount": np.float64(m)} for m in range(1, 13)]
+    expected_page["months"] = [{"month": f"2024-{m:02d}", "amount": float(m)} for m in range(1, 13)]
+    page[1] = "числовой ключ"
+    expected_page["1"] = "числовой ключ"
+
+    chunks = list(iter_encode(page, batch_size))
+
+    assert json.loads(b"".join(chunks)) == expected_page
+    if batch_size < 12:
+        assert len(chunks) > len(page) * 2
+
+
+def test_write_json_empty_list():
+    """Тест записи пустых и коротких списков."""
+    stream = io.BytesIO()
+    write_json({"rows": [], "items": [1, 2, 3]}, stream, batch_size=2)
+
+    assert json.loads(stream.getvalue()) == {"rows": [], "items": [1, 2, 3]}
@@ -5,9 +5,16 @@ import pytest
 from src.services import (
     analyze_cashback_categories,
     calculate_investment_piggybank,
+    simulate_investment_piggybank,
+    compare_cashback_programs,
     search_transactions,
+    fuzzy_search_transactions,
     find_phone_transactions,
+    find_transactions_by_phone,
+    get_top_phone_recipients,
     find_personal_transfers,
+    find_personal_transfer_keywords,
+    batch_search_transactions,
 )
 
 
@@ -20,6 +27,7 @@ def sample_transactions():
             "Кешбэк": 50,
             "Сумма операции": 1000,
             "Описание": "Покупка в магазине",
+            "Дата операции": "2024-01-05",
             "Округление на «Инвесткопилку»": 10,
         },
         {
@@ -27,6 +35,7 @@ def sample_transactions():
             "Кешбэк": 10,
             "Сумма операции": 500,
             "Описание": "Такси 89161234567",
+            "Дата операции": "2024-01-10",
             "Округление на «Инвесткопилку»": 5,
         },
         {
@@ -34,6 +43,7 @@ def sample_transactions():
             "Кешбэк": 100,
             "Сумма операции": 2000,
             "Описание": "Оплата за ужин",
+            "Дата операции": "2023-12-20",
             "Округление на «Инвесткопилку»": 20,
         },
     ]
@@ -45,6 +55,32 @@ def test_analyze_cashback_categories(sample_transactions):
     assert len(result) > 0
 
 
+def test_analyze_cashback_period_deltas(sample_transactions):
+    """Тест кешбэка за период с разницей к предыдущему периоду."""
+    result = analyze_cashback_categories(sample_transactions, "1/2024")
+    assert result == [
+        {"category": "Супермаркеты", "cashback": 50, "previous_cashback": 0, "delta": 50},
+        {"category": "Транспорт", "cashback": 10, "previous_cashback": 0, "delta": 10},
+    ]
+
+    december = analyze_cashback_categories(sample_transactions, "12/2023")
+    assert december == [{"category": "Рестораны", "cashback": 100, "previous_cashback": 0, "delta": 100}]
+
+
+def test_analyze_cashback_rolling_and_all(sample_transactions):
+    """Тест скользящего периода и всей истории."""
+    rolling = analyze_cashback_categories(sample_transactions, "last 2")
+    assert [item["category"] for item in rolling] == ["Рестораны", "Супермаркеты", "Транспорт"]
+
+    history = analyze_cashback_categories(sample_transactions, "all")
+    assert history[0] == {"category": "Рестораны", "cashback": 100}
+
+
+def test_analyze_cashback_invalid_period(sample_transactions):
+    """Тест некорректного периода."""
+    assert analyze_cashback_categories(sample_transactions, "13/2024") == []
+
+
 def test_analyze_cashback_empty():
     """Тест с пустым списком транзакций."""
     result = analyze_cashback_categories([], "1/2024")
@@ -63,6 +99,34 @@ def test_calculate_investment_empty():
     assert result == 0
 
 
+def test_simulate_investment_piggybank():
+    """Тест моделирования копилки для нескольких политик."""
+    transactions = [
+        {"Дата операции": "2024-01-05", "Сумма операции": 123.45},
+        {"Дата операции": "2024-01-20", "Сумма операции": 100.00},
+        {"Дата операции": "2024-02-01", "Сумма операции": 61.00},
+        {"Дата операции": "2024-02-02", "Сумма операции": -500.00},
+        {"Дата операции": "2024-02-03", "Сумма операции": -1000.00},
+    ]
+    policies = [
+        {"name": "round_10", "type": "round", "step": 10},
+        {"name": "round_100", "type": "round", "step": 100},
+        {"name": "percent_10", "type": "percent", "percent": 10},
+    ]
+    result = simulate_investment_piggybank(transactions, policies)
+
+    assert result["round_10"] == {"total": 15.55, "months": {"2024-01": 6.55, "2024-02": 9.0}}
+    assert result["round_100"]["total"] == 115.55
+    assert result["percent_10"]["months"] == {"2024-01": 22.34, "2024-02": 6.1}
+
+
+def test_simulate_investment_piggybank_defaults():
+    """Тест политик по умолчанию и некорректной политики."""
+    result = simulate_investment_piggybank([{"Сумма операции": 95}])
+    assert result["round_50"] == {"total": 5.0, "months": {}}
+    assert simulate_investment_piggybank([{"Сумма операции": 95}], [{"name": "x", "type": "x"}]) == {}
+
+
 @pytest.mark.parametrize(
     "search_term,expected_count",
     [
@@ -78,12 +142,31 @@ def test_search_transactions(sample_transactions, search_term, expected_count):
     assert len(result) == expected_count
 
 
+def test_fuzzy_search_transactions():
+    """Тест нечеткого поиска с опечаткой и транслитерацией."""
+    transactions = [
+        {"Описание": "Пятёрочка", "Сумма операции": 100},
+        {"Описание": "Такси", "Сумма операции": 200},
+    ]
+    assert fuzzy_search_transactions(transactions, "Pyaterochka") == [transactions[0]]
+    assert fuzzy_search_transactions(transactions, "пятерчка") == [transactions[0]]
+    assert fuzzy_search_transactions(transactions, "") == []
+
+
 def test_find_phone_transactions(sample_transactions):
     """Тест поиска транзакций с телефонными номерами."""
     result = find_phone_transactions(sample_transactions)
     assert len(result) == 1
 
 
+def test_phone_lookups(sample_transactions):
+    """Тест поиска по номеру телефона и рейтинга получателей."""
+    assert find_transactions_by_phone(sample_transactions, "+7 916 123-45-67") == [sample_transactions[1]]
+    assert get_top_phone_recipients(sample_transactions) == [
+        {"phone": "+79161234567", "count": 1, "amount": 500}
+    ]
+
+
 def test_find_personal_transfers():
     """Тест поиска переводов физлицам."""
     transactions = [
@@ -92,3 +175,47 @@ def test_find_personal_transfers():
     ]
     result = find_personal_transfers(transactions)
     assert len(result) == 1
+
+
+def test_find_personal_transfers_custom_keywords():
+    """Тест поиска переводов по своему списку ключевых слов."""
+    transactions = [
+        {"Описание": "Перевод Сидорову", "Сумма операции": 1000},
+        {"Описание": "Сидоров С.", "Сумма операции": 500},
+        {"Описание": "Оплата услуг", "Сумма операции": 300},
+    ]
+    result = find_personal_transfers(transactions, ["сидоров"])
+    assert result == transactions[:2]
+
+    matches = find_personal_transfer_keywords(transactions)
+    assert matches == {0: ["перевод"]}
+
+
+def test_batch_search_transactions(sample_transactions):
+    """Тест пакетного поиска в сервисах."""
+    result = batch_search_transactions(
+        sample_transactions, [("substring", "такси"), ("phone", None), ("keywords", ("ужин",))]
+    )
+    assert result == {("substring", "такси"): [1], ("phone", None): [1], ("keywords", ("ужин",)): [2]}
+    assert batch_search_transactions(sample_transactions, [("keywords", ["ужин"])]) == {("keywords", ("ужин",)): [2]}
+    assert batch_search_transactions(sample_transactions, [("unknown", "x")]) == {}
+
+
+def test_compare_cashback_programs():
+    """Тест сравнения программ кешбэка на транзакциях."""
+    transactions = [
+        {"Дата операции": "2024-01-05", "Сумма операции": 1000, "Категория": "Супермаркеты", "MCC": 5411},
+        {"Дата операции": "2024-01-06", "Сумма операции": 2000, "Категория": "Рестораны", "MCC": 5812},
+        {"Дата операции": "2024-01-07", "Сумма операции": -5000, "Категория": "Пополнение", "MCC": 0},
+    ]
+    programs = [
+        {"name": "base", "base_rate": 1},
+        {"name": "restaurants", "base_rate": 1, "mcc_multipliers": {5812: 5}},
+    ]
+    result = compare_cashback_programs(transactions, programs)
+
+    assert [(item["name"], item["payout"], item["rank"]) for item in result] == [
+        ("restaurants", 110.0, 1),
+        ("base", 30.0, 2),
+    ]
+    assert compare_cashback_programs(transactions, []) == []
@@ -0,0 +1,76 @@
+"""
+Тесты для модуля stats.
+"""
+import random
+
+import pytest
+from src.stats import KLLSketch, StreamingStats
+
+
+def test_streaming_stats_basic():
+    """Тест среднего, дисперсии и экстремумов."""
+    stats = StreamingStats().update_many([2, 4, 4, 4, 5, 5, 7, 9])
+    result = stats.to_dict()
+
+    assert result["total_count"] == 8
+    assert result["total_amount"] == 40
+    assert result["avg_amount"] == 5
+    assert result["min_amount"] == 2
+    assert result["max_amount"] == 9
+    assert stats.variance == pytest.approx(32 / 7)
+    assert result["median_amount"] == 4
+
+
+def test_streaming_stats_empty():
+    """Тест пустого накопителя."""
+    result = StreamingStats().to_dict()
+    assert result["total_count"] == 0
+    assert result["avg_amount"] == 0
+    assert result["median_amount"] == 0
+
+
+def test_streaming_stats_merge_matches_single_pass():
+    """Тест объединения накопителей по частям данных."""
+    values = [random.Random(1).uniform(-5000, 5000) for _ in range(10)] + list(range(100))
+    single = StreamingStats().update_many(values)
+
+    merged = StreamingStats()
+    for start in range(0, len(values), 25):
+        merged.merge(StreamingStats().update_many(values[start:start + 25]))
+
+    assert merged.count == single.count
+    assert merged.mean == pytest.approx(single.mean)
+    assert merged.variance == pytest.approx(single.variance)
+    assert merged.min == single.min
+    assert merged.max == single.max
+
+
+def test_kll_sketch_exact_for_small_input():
+    """Тест точных квантилей на небольшом наборе."""
+    sketch = KLLSketch()
+    for value in range(1, 101):
+        sketch.update(value)
+    assert sketch.quantiles([0.5, 0.9, 0.99]) == [50, 90, 99]
+
+
+def test_kll_sketch_approximate_for_large_input():
+    """Тест погрешности квантилей на большом наборе с объединением."""
+    values = list(range(20000))
+    random.Random(42).shuffle(values)
+
+    sketch = KLLSketch(seed=1)
+    for part in range(4):
+        chunk = KLLSketch(seed=part)
+        for value in values[part::4]:
+            chunk.update(value)
+        sketch.merge(chunk)
+
+    p50, p90 = sketch.quantiles([0.5, 0.9])
+    assert sketch.size < 1000
+    assert abs(p50 - 10000) < 600
+    assert abs(p90 - 18000) < 600
+
+
+def test_kll_sketch_empty():
+    """Тест пустого скетча."""
+    assert KLLSketch().quantiles([0.5]) == [None]
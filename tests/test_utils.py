@@ -12,6 +12,10 @@ from src.utils import (
     analyze_cards,
     get_top_transactions,
     get_time_based_greeting,
+    filter_by_date_range,
+    filter_by_date_ranges,
+    calculate_statistics,
+    parse_period,
 )
 
 
@@ -159,6 +163,21 @@ class TestAnalyzeCards:
             assert "total_spent" in card
             assert "total_cashback" in card
 
+    def test_analyze_cards_with_fingerprint(self):
+        """Тест: с отпечатком данные не хешируются заново"""
+        df = pd.DataFrame({
+            "Номер карты": ["1234567812345678", "8765432187654321"],
+            "Сумма операции": [1000, 1500],
+            "Кешбэк": [10, 15]
+        })
+
+        with patch('src.cube.dataset_fingerprint') as mock_fingerprint:
+            result = analyze_cards(df, fingerprint="test_analyze_cards_with_fingerprint")
+            analyze_cards(df, fingerprint="test_analyze_cards_with_fingerprint")
+
+        mock_fingerprint.assert_not_called()
+        assert {card["card_last_four"]: card["total_spent"] for card in result} == {"5678": 1000, "4321": 1500}
+
 
 class TestTopTransactions:
     """Тесты для функции get_top_transactions"""
@@ -212,5 +231,97 @@ class TestTimeGreeting:
         assert greeting == "Доброй ночи"
 
 
+class TestFilterByDateRange:
+    """Тесты для функций filter_by_date_range и filter_by_date_ranges"""
+
+    transactions = [
+        {"Дата операции": "2024-01-15", "Сумма операции": 100},
+        {"Дата операции": "2024-01-01", "Сумма операции": 200},
+        {"Дата операции": "2024-02-10", "Сумма операции": 300},
+    ]
+
+    def test_filter_keeps_original_order(self):
+        """Тест сохранения исходного порядка транзакций"""
+        result = filter_by_date_range(self.transactions, "2024-01-01", "2024-01-31")
+        assert [t["Сумма операции"] for t in result] == [100, 200]
+
+    def test_filter_without_bounds(self):
+        """Тест фильтрации без границ"""
+        assert filter_by_date_range(self.transactions) == self.transactions
+
+    def test_filter_by_date_ranges(self):
+        """Тест пакетной фильтрации"""
+        result = filter_by_date_ranges(
+            self.transactions, [("2024-02-01", None), (None, "2024-01-10")]
+        )
+        assert [t["Сумма операции"] for t in result[0]] == [300]
+        assert [t["Сумма операции"] for t in result[1]] == [200]
+
+    def test_filter_reuses_date_index(self):
+        """Тест: повторные запросы не разбирают даты заново, дописанные транзакции учитываются"""
+        transactions = list(self.transactions)
+        filter_by_date_range(transactions, "2024-01-01", "2024-01-31")
+        with patch("src.indexes.parse_dates") as mock_parse:
+            result = filter_by_date_ranges(transactions, [("2024-01-01", "2024-01-31")])
+        mock_parse.assert_not_called()
+        assert [t["Сумма операции"] for t in result[0]] == [100, 200]
+
+        transactions.append({"Дата операции": "2024-01-20", "Сумма операции": 400})
+        result = filter_by_date_range(transactions, "2024-01-01", "2024-01-31")
+        assert [t["Сумма операции"] for t in result] == [100, 200, 400]
+
+
+class TestCalculateStatistics:
+    """Тесты для функции calculate_statistics"""
+
+    def test_statistics_by_category_and_month(self):
+        """Тест статистики по категориям и месяцам"""
+        transactions = [
+            {"Дата операции": "2024-01-05", "Сумма операции": 100, "Категория": "Супермаркеты"},
+            {"Дата операции": "2024-01-20", "Сумма операции": 300, "Категория": "Транспорт"},
+            {"Дата операции": "2024-02-01", "Сумма операции": 200, "Категория": "Супермаркеты"},
+        ]
+        result = calculate_statistics(transactions)
+
+        assert result["total_count"] == 3
+        assert result["total_amount"] == 600
+        assert result["avg_amount"] == 200
+        assert result["median_amount"] == 200
+        assert result["by_category"]["Супермаркеты"]["total_amount"] == 300
+        assert result["by_month"]["2024-01"]["max_amount"] == 300
+        assert list(result["by_month"]) == ["2024-01", "2024-02"]
+
+    def test_statistics_empty(self):
+        """Тест статистики по пустому списку"""
+        assert calculate_statistics([])["total_count"] == 0
+
+
+class TestParsePeriod:
+    """Тесты для функции parse_period"""
+
+    @pytest.mark.parametrize("period,expected", [
+        ("1/2024", ("2024-01", "2024-01")),
+        ("2024-03", ("2024-03", "2024-03")),
+        ("1/2024 - 3/2024", ("2024-01", "2024-03")),
+        ("2024-01..2024-02", ("2024-01", "2024-02")),
+        ("last 3", ("2024-01", "2024-03")),
+    ])
+    def test_parse_period(self, period, expected):
+        """Тест разбора форматов периода"""
+        start, end = parse_period(period, pd.Period("2024-03", freq="M"))
+        assert (str(start), str(end)) == expected
+
+    def test_parse_period_all(self):
+        """Тест периода за всю историю"""
+        assert parse_period("all") == (None, None)
+        assert parse_period("") == (None, None)
+
+    @pytest.mark.parametrize("period", ["13/2024", "вчера", "3/2024 - 1/2024", "last 0"])
+    def test_parse_period_invalid(self, period):
+        """Тест некорректных периодов"""
+        with pytest.raises(ValueError):
+            parse_period(period, pd.Period("2024-03", freq="M"))
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])